@@ -42,6 +42,7 @@ const frontEndStack = new FrontEndStack(app, "InvestmentAnalystGPFrontEndStack",
   powerToolsLayer: genai_infra.powerToolsLayer,
   bedrockGuardrailsId: genai_infra.bedrockGuardrailsId,
   bedrockGuardrailsVersion: genai_infra.bedrockGuardrailsVersion,
+  kbGenerationParameterName: genai_infra.kbGenerationParameterName,
 });
 
 frontEndStack.addDependency(genai_infra);
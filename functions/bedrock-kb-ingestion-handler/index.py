@@ -1,7 +1,9 @@
 from aws_lambda_powertools import Logger, Tracer
+import json
 import os
 
 import boto3
+from botocore.exceptions import ClientError
 import time
 
 logger = Logger(service="investment-analyst-websocket-handler")
@@ -9,35 +11,164 @@ tracer = Tracer(service="investment-analyst-websocket-handler")
 
 KB_ID = os.environ["KB_ID"]
 DS_ID = os.environ["DS_ID"]
+# Readers key their retrieval caches on this value, so bumping it invalidates them
+KB_GENERATION_PARAM = os.environ.get("KB_GENERATION_PARAM")
+# Data source bucket and the manifest of the ETags that were last ingested from it
+KB_BUCKET = os.environ["KB_BUCKET"]
+MANIFEST_TBL_NM = os.environ["MANIFEST_TBL_NM"]
+# S3 events arrive here batched; poll and retry messages are sent back with a delay
+INGESTION_QUEUE_URL = os.environ["INGESTION_QUEUE_URL"]
+POLL_BASE_DELAY_SECONDS = int(os.environ.get("POLL_BASE_DELAY_SECONDS", "30"))
+POLL_MAX_DELAY_SECONDS = 900  # SQS DelaySeconds limit
+POLL_MAX_ATTEMPTS = int(os.environ.get("POLL_MAX_ATTEMPTS", "40"))
+SYNC_RETRY_DELAY_SECONDS = int(os.environ.get("SYNC_RETRY_DELAY_SECONDS", "300"))
+# Changes ride along in the poll message; above this the manifest is rebuilt from a listing
+MAX_MESSAGE_CHANGES_BYTES = 200_000
 
 br_agent_client = boto3.client('bedrock-agent')
+ssm_client = boto3.client('ssm')
+s3_client = boto3.client('s3')
+sqs_client = boto3.client('sqs')
+manifest_table = boto3.resource('dynamodb').Table(MANIFEST_TBL_NM)
 
-def interactive_sleep(seconds: int):
-    dots = ''
-    for i in range(seconds):
-        dots += '.'
-        print(dots, end='\r')
-        time.sleep(1)
+def bump_kb_generation(ingestion_job_id: str):
+    if not KB_GENERATION_PARAM:
+        return
+    generation = f"{int(time.time())}-{ingestion_job_id}"
+    ssm_client.put_parameter(Name=KB_GENERATION_PARAM, Value=generation, Type="String", Overwrite=True)
+    logger.info(f"Knowledge base generation bumped to {generation}")
 
-@logger.inject_lambda_context(
-    log_event=True
-)
-def handler(event, context):
-    start_ingestion_job_response = br_agent_client.start_ingestion_job(
-        knowledgeBaseId=KB_ID,
-        dataSourceId=DS_ID,
-    )
+def list_data_source_objects():
+    """Return {key: etag} for every object in the data source bucket."""
+    objects = {}
+    paginator = s3_client.get_paginator('list_objects_v2')
+    for page in paginator.paginate(Bucket=KB_BUCKET):
+        for obj in page.get('Contents', []):
+            if not obj['Key'].endswith('/'):
+                objects[obj['Key']] = obj['ETag']
+    return objects
+
+def load_manifest():
+    manifest = {}
+    kwargs = {"ProjectionExpression": "object_key, etag"}
+    while True:
+        response = manifest_table.scan(**kwargs)
+        for item in response.get('Items', []):
+            manifest[item['object_key']] = item['etag']
+        if 'LastEvaluatedKey' not in response:
+            return manifest
+        kwargs['ExclusiveStartKey'] = response['LastEvaluatedKey']
+
+def diff_manifest(current, manifest):
+    """Objects added or modified map to their new ETag, deleted ones to None."""
+    changes = {key: etag for key, etag in current.items() if manifest.get(key) != etag}
+    changes.update({key: None for key in manifest if key not in current})
+    return changes
+
+def apply_changes(changes):
+    with manifest_table.batch_writer() as batch:
+        for key, etag in changes.items():
+            if etag is None:
+                batch.delete_item(Key={"object_key": key})
+            else:
+                batch.put_item(Item={"object_key": key, "etag": etag})
+
+def send_message(message, delay_seconds=0):
+    sqs_client.send_message(QueueUrl=INGESTION_QUEUE_URL, MessageBody=json.dumps(message),
+                            DelaySeconds=min(delay_seconds, POLL_MAX_DELAY_SECONDS))
+
+def poll_delay(attempt: int) -> int:
+    return min(POLL_BASE_DELAY_SECONDS * 2 ** attempt, POLL_MAX_DELAY_SECONDS)
+
+@tracer.capture_method
+def start_sync():
+    """Start an ingestion job if the bucket differs from what was last ingested."""
+    changes = diff_manifest(list_data_source_objects(), load_manifest())
+    if not changes:
+        logger.info("Data source unchanged since the last ingestion, skipping")
+        return None
+    logger.info(f"{len(changes)} changed objects: {sorted(changes)[:20]}")
 
+    try:
+        start_ingestion_job_response = br_agent_client.start_ingestion_job(
+            knowledgeBaseId=KB_ID,
+            dataSourceId=DS_ID,
+        )
+    except ClientError as e:
+        if e.response['Error']['Code'] != 'ConflictException':
+            raise
+        # A job is already running; look again once it has had time to finish
+        logger.info(f"Ingestion job already running, retrying in {SYNC_RETRY_DELAY_SECONDS}s")
+        send_message({"type": "sync"}, SYNC_RETRY_DELAY_SECONDS)
+        return None
+
+    ingestion_job_id = start_ingestion_job_response['ingestionJob']['ingestionJobId']
+    logger.info(f"Started ingestion job {ingestion_job_id}")
+    if len(json.dumps(changes)) > MAX_MESSAGE_CHANGES_BYTES:
+        changes = None
+    send_message({"type": "poll", "ingestion_job_id": ingestion_job_id, "attempt": 0, "changes": changes},
+                 poll_delay(0))
+    return ingestion_job_id
+
+@tracer.capture_method
+def poll_ingestion_job(message):
+    ingestion_job_id = message['ingestion_job_id']
     get_ingestion_job_response = br_agent_client.get_ingestion_job(
         knowledgeBaseId=KB_ID,
         dataSourceId=DS_ID,
-        ingestionJobId=start_ingestion_job_response['ingestionJob']['ingestionJobId']
+        ingestionJobId=ingestion_job_id
     )
+    ingestion_job = get_ingestion_job_response['ingestionJob']
+    status = ingestion_job['status']
 
-    while get_ingestion_job_response['ingestionJob']['status'] == "IN_PROGRESS":
-        interactive_sleep(5)
-        get_ingestion_job_response = br_agent_client.get_ingestion_job(
-            knowledgeBaseId=KB_ID,
-            dataSourceId=DS_ID,
-            ingestionJobId=start_ingestion_job_response['ingestionJob']['ingestionJobId']
-        )
\ No newline at end of file
+    if status in ("STARTING", "IN_PROGRESS", "STOPPING"):
+        attempt = message['attempt'] + 1
+        if attempt >= POLL_MAX_ATTEMPTS:
+            logger.error(f"Gave up polling ingestion job {ingestion_job_id} after {attempt} attempts")
+            return
+        send_message(dict(message, attempt=attempt), poll_delay(attempt))
+        return
+
+    logger.info(f"Ingestion job {ingestion_job_id} finished with status {status}, "
+                f"statistics {ingestion_job.get('statistics')}")
+    if status != "COMPLETE":
+        # The manifest is left as it was, so the next sync picks these changes up again
+        logger.warning(f"Ingestion job {ingestion_job_id} failed: {ingestion_job.get('failureReasons')}")
+        return
+    changes = message.get('changes')
+    if changes is None:
+        changes = diff_manifest(list_data_source_objects(), load_manifest())
+    apply_changes(changes)
+    bump_kb_generation(ingestion_job_id)
+
+@logger.inject_lambda_context(
+    log_event=True
+)
+def handler(event, context):
+    records = event.get('Records')
+    if not records:
+        # Invoked directly, e.g. by the deployment trigger
+        start_sync()
+        return
+
+    # Failed messages are reported individually so SQS redelivers only those
+    failed_ids = []
+    sync_ids = []
+    for record in records:
+        try:
+            message = json.loads(record['body'])
+            if message.get('type') == 'poll':
+                poll_ingestion_job(message)
+            elif message.get('type') == 'sync' or 'Records' in message:
+                # S3 notifications for the whole batch window collapse into one sync
+                sync_ids.append(record['messageId'])
+        except Exception:
+            logger.exception(f"Couldn't process message {record['messageId']}")
+            failed_ids.append(record['messageId'])
+    if sync_ids:
+        try:
+            start_sync()
+        except Exception:
+            logger.exception("Couldn't start the ingestion sync")
+            failed_ids.extend(sync_ids)
+    return {"batchItemFailures": [{"itemIdentifier": message_id} for message_id in failed_ids]}
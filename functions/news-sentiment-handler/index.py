@@ -1,9 +1,9 @@
 import json
 import os
 
-import requests
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.logging import correlation_paths
+from news_client import RateLimited, fetch_news_feed, news_cache
 
 tracer = Tracer()
 logger = Logger()
@@ -20,7 +20,6 @@ def handler(event, context):
         parameters = event.get('parameters', [])
         
         # Get the input parameters from environment variables
-        apikey = os.environ.get('API_KEY')
         topics = os.environ.get('NEWS_TOPICS', 'earnings')
         limit = os.environ.get('NEWS_LIMIT', '10')
 
@@ -28,16 +27,26 @@ def handler(event, context):
         ticker = parameters[0]['value']
         logger.info(f"Ticker: {ticker}")
 
-        base_url = 'https://www.alphavantage.co/query'
-        url = f'{base_url}?function=NEWS_SENTIMENT&limit={limit}&tickers={ticker}&sort=LATEST&topics={topics}&apikey={apikey}'
-        logger.info(f"Request URL: {url}")
-
-        r = requests.get(url, timeout=180)
-        data = r.json()
+        # Served from the container's feed cache when the agent asks about the same ticker again
+        try:
+            feed = fetch_news_feed(ticker, topics, limit)
+            rate_limited = None
+        except RateLimited as e:
+            # Answer the agent instead of failing the action group call
+            logger.warning(f"News request rate limited: {e}")
+            feed = None
+            rate_limited = str(e)
+        logger.info(f"News cache: {news_cache.counters}")
 
         # Check if the response contains news items
-        if 'feed' in data:
-            news_items = data['feed'][:int(limit)]  # Slice the list to get the top N items
+        if rate_limited:
+            response_body = {
+                'TEXT': {
+                    'body': json.dumps([{'error': 'The news service is busy, please try again in a minute.'}])
+                }
+            }
+        elif feed is not None:
+            news_items = feed[:int(limit)]  # Slice the list to get the top N items
             table_data = []
             for item in news_items:
                 # Check if the news item has a 'ticker_sentiment' key
@@ -0,0 +1,246 @@
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import boto3
+import requests
+from aws_lambda_powertools import Logger
+from botocore.exceptions import BotoCoreError, ClientError
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = Logger()
+
+ALPHA_VANTAGE_URL = 'https://www.alphavantage.co/query'
+# A cached feed is served as is for this long, then refreshed with only the newer articles
+NEWS_CACHE_TTL_SECONDS = int(os.environ.get('NEWS_CACHE_TTL_SECONDS', '300'))
+NEWS_CACHE_MAX_ENTRIES = int(os.environ.get('NEWS_CACHE_MAX_ENTRIES', '128'))
+NEWS_CONNECT_TIMEOUT_SECONDS = float(os.environ.get('NEWS_CONNECT_TIMEOUT_SECONDS', '5'))
+NEWS_READ_TIMEOUT_SECONDS = float(os.environ.get('NEWS_READ_TIMEOUT_SECONDS', '180'))
+# Alpha Vantage quota, counted per minute in a table shared by every container;
+# requests wait for the next minute until the deadline passes
+RATE_LIMIT_TBL_NM = os.environ['RATE_LIMIT_TBL_NM']
+ALPHA_VANTAGE_REQUESTS_PER_MINUTE = int(os.environ.get('ALPHA_VANTAGE_REQUESTS_PER_MINUTE', '5'))
+RATE_LIMIT_WINDOW_SECONDS = 60
+RATE_LIMIT_MAX_WAIT_SECONDS = float(os.environ.get('RATE_LIMIT_MAX_WAIT_SECONDS', '30'))
+# How long to stop calling after the API reports the quota is used up
+QUOTA_BACKOFF_SECONDS = float(os.environ.get('QUOTA_BACKOFF_SECONDS', '60'))
+
+
+class RateLimited(Exception):
+    """No request could be made within the deadline, or the API reported its quota exceeded."""
+
+
+def _build_session():
+    # One pooled keep-alive session per container, reused by every warm invocation
+    session = requests.Session()
+    retries = Retry(total=2, backoff_factor=0.5, status_forcelist=(500, 502, 503, 504),
+                    allowed_methods=frozenset(['GET']))
+    session.mount('https://', HTTPAdapter(pool_connections=1, pool_maxsize=8, max_retries=retries))
+    return session
+
+
+session = _build_session()
+
+
+class SharedRateLimiter:
+    """Fixed-window request counter in DynamoDB, one item per window.
+
+    The count is only incremented while it is below the limit, so concurrent
+    invocations in any number of containers can't go over the quota between them.
+    """
+
+    def __init__(self, table, limit=ALPHA_VANTAGE_REQUESTS_PER_MINUTE,
+                 window_seconds=RATE_LIMIT_WINDOW_SECONDS, name='alphavantage'):
+        self.table = table
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.name = name
+
+    def _window(self, now):
+        return int(now // self.window_seconds) * self.window_seconds
+
+    def _expires_at(self, window):
+        return window + 2 * self.window_seconds
+
+    def _take(self, window):
+        try:
+            self.table.update_item(
+                Key={'window_key': f"{self.name}#{window}"},
+                UpdateExpression='ADD request_count :one SET expires_at = :expires_at',
+                ConditionExpression='attribute_not_exists(request_count) OR request_count < :limit',
+                ExpressionAttributeValues={':one': 1, ':limit': self.limit,
+                                           ':expires_at': self._expires_at(window)},
+            )
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'ConditionalCheckFailedException':
+                return False
+            raise
+
+    def acquire(self, max_wait=RATE_LIMIT_MAX_WAIT_SECONDS):
+        """Take a slot, sleeping until a window has one; False if that would exceed ``max_wait``."""
+        deadline = time.time() + max_wait
+        while True:
+            now = time.time()
+            window = self._window(now)
+            try:
+                if self._take(window):
+                    return True
+            except (BotoCoreError, ClientError) as e:
+                # The API still reports an exceeded quota, so don't fail the tool over the table
+                logger.warning(f"Rate limit table unavailable, calling Alpha Vantage anyway: {e}")
+                return True
+            next_window = window + self.window_seconds
+            if next_window > deadline:
+                return False
+            # Jitter so the containers that are waiting don't all retry at the same instant
+            wait = next_window - now + random.uniform(0, 1)
+            logger.info(f"Rate limited, waiting {wait:.1f}s for an Alpha Vantage slot")
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Use up every window in the next ``seconds``, e.g. after the API reported its quota exceeded."""
+        now = time.time()
+        window = self._window(now)
+        while window < now + seconds:
+            try:
+                self.table.update_item(
+                    Key={'window_key': f"{self.name}#{window}"},
+                    UpdateExpression='SET request_count = :limit, expires_at = :expires_at',
+                    ExpressionAttributeValues={':limit': self.limit, ':expires_at': self._expires_at(window)},
+                )
+            except (BotoCoreError, ClientError) as e:
+                logger.warning(f"Couldn't record the Alpha Vantage quota pause: {e}")
+                return
+            window += self.window_seconds
+
+
+rate_limiter = SharedRateLimiter(boto3.resource('dynamodb').Table(RATE_LIMIT_TBL_NM))
+
+
+class NewsFeedCache:
+    """LRU of Alpha Vantage feeds keyed on (ticker, topics, limit)."""
+
+    def __init__(self, ttl_seconds=NEWS_CACHE_TTL_SECONDS, max_entries=NEWS_CACHE_MAX_ENTRIES):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {'hits': 0, 'refreshes': 0, 'misses': 0, 'rate_limited': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key, feed):
+        with self._lock:
+            self._entries[key] = {'fetched_at': time.time(), 'feed': feed}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_fresh(self, entry):
+        return time.time() - entry['fetched_at'] < self.ttl_seconds
+
+    def count(self, counter):
+        with self._lock:
+            self.counters[counter] += 1
+
+
+news_cache = NewsFeedCache()
+
+
+def request_news(params):
+    """Call NEWS_SENTIMENT on the pooled session and return the decoded body.
+
+    Raises RateLimited when no slot frees up in time or the API reports its quota exceeded.
+    """
+    if not rate_limiter.acquire():
+        raise RateLimited('Timed out waiting for an Alpha Vantage request slot')
+    query = dict(params, function='NEWS_SENTIMENT', sort='LATEST', apikey=os.environ.get('API_KEY'))
+    logger.info(f"Requesting NEWS_SENTIMENT {params}")
+    r = session.get(ALPHA_VANTAGE_URL, params=query,
+                    timeout=(NEWS_CONNECT_TIMEOUT_SECONDS, NEWS_READ_TIMEOUT_SECONDS))
+    if r.status_code == 429:
+        rate_limiter.pause(QUOTA_BACKOFF_SECONDS)
+        raise RateLimited('Alpha Vantage returned 429')
+    r.raise_for_status()
+    data = r.json()
+    # Quota errors come back as 200 with an "Information" or "Note" message and no feed
+    message = data.get('Information') or data.get('Note')
+    if 'feed' not in data and message and ('rate limit' in message.lower() or 'frequency' in message.lower()):
+        rate_limiter.pause(QUOTA_BACKOFF_SECONDS)
+        raise RateLimited(message)
+    return data
+
+
+def _time_from(feed):
+    # time_published looks like 20240131T154500; time_from takes YYYYMMDDTHHMM
+    newest = max((item.get('time_published', '') for item in feed), default='')
+    return newest[:13] or None
+
+
+def merge_feeds(newer, older, limit):
+    """Newest-first union of two feeds, de-duplicated on the article URL."""
+    seen = set()
+    merged = []
+    for item in sorted(newer + older, key=lambda item: item.get('time_published', ''), reverse=True):
+        if item.get('url') in seen:
+            continue
+        seen.add(item.get('url'))
+        merged.append(item)
+    return merged[:limit]
+
+
+def fetch_news_feed(ticker, topics, limit):
+    """Return the latest ``limit`` articles for the ticker, or None when the API has no feed.
+
+    Fresh cache entries are served without a request. Expired ones are refreshed with
+    ``time_from`` set to the newest cached article, so only new articles are downloaded;
+    if that refresh fails or is rate limited the cached feed is served.
+    """
+    limit = int(limit)
+    key = (ticker.upper(), topics, limit)
+    entry = news_cache.get(key)
+    if entry is not None and news_cache.is_fresh(entry):
+        news_cache.count('hits')
+        return entry['feed']
+
+    params = {'tickers': ticker, 'topics': topics, 'limit': limit}
+    time_from = _time_from(entry['feed']) if entry is not None else None
+    if time_from is None:
+        news_cache.count('misses')
+        try:
+            data = request_news(params)
+        except RateLimited:
+            news_cache.count('rate_limited')
+            raise
+        if 'feed' not in data:
+            logger.info(f"No feed in the response: {data}")
+            return None
+        feed = data['feed'][:limit]
+        news_cache.set(key, feed)
+        return feed
+
+    news_cache.count('refreshes')
+    try:
+        data = request_news(dict(params, time_from=time_from))
+    except (requests.RequestException, RateLimited) as e:
+        if isinstance(e, RateLimited):
+            news_cache.count('rate_limited')
+        logger.warning(f"Couldn't refresh news for {ticker}, serving cached feed: {e}")
+        return entry['feed']
+    if 'feed' not in data:
+        # Nothing published since time_from, or the API declined the call
+        logger.info(f"No newer articles for {ticker}: {data}")
+        news_cache.set(key, entry['feed'])
+        return entry['feed']
+    feed = merge_feeds(data['feed'], entry['feed'], limit)
+    news_cache.set(key, feed)
+    return feed
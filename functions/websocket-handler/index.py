@@ -1,26 +1,90 @@
 import json
 import os
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
 from aws_lambda_powertools import Logger, Tracer
 from aws_lambda_powertools.logging import correlation_paths
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from boto3.dynamodb.conditions import Key
+from botocore.exceptions import BotoCoreError, ClientError
 from lib.financial_analysis import analyze_financials
-from lib.investment_agent import analyze_investment
-from lib.investment_chat import chat_investment
+from lib.investment_agent import analyze_investment, analyze_investment_fast
+from lib.chat_history import chat_history_stats, flush_chat_histories
+from lib.investment_chat import answer_cache_stats, chat_investment, set_session_cache_bypass
+from lib.jobs import (enqueue_job, get_job_queue, get_job_status_store, new_job,
+                      process_job)
 from lib.news import fetch_news_and_sentiments
+from lib.prompts.financial_analysis_prompt import FinancialAnalysisPrompt
+from lib.prompts.investment_analysis_prompt import InvestmentAnalysisPrompt
+from lib.result_cache import result_cache
+from lib.retrieval_cache import retrieval_cache_stats
 from lib.macro_industry_report import generate_macro_industry_report
+from lib.ticker_batch import TICKER_BATCH_MAX_TICKERS, batch_tickers, run_ticker_batch
+from lib.streaming import (FinalAnswerStreamHandler, TokenStreamHandler,
+                           WebSocketStreamer)
+from lib.tools.compact_encoding import encoding_stats
+from lib.tools.market_data import market_data_cache_stats, normalize_ticker
+from lib.tools.stockPrice import get_latest_trading_day
 
 logger = Logger(service="investment-analyst-websocket-handler")
 tracer = Tracer(service="investment-analyst-websocket-handler")
 
 table_name = os.environ["WEBSOCKET_TBL_NM"]
 
+# Connections are spread over shards of a keys-only GSI so broadcasts can page through
+# them with queries instead of scanning the whole table.
+CONNECTIONS_INDEX_NM = os.environ.get("CONNECTIONS_INDEX_NM")
+CONNECTION_SHARDS = int(os.environ.get("CONNECTION_SHARDS", "10"))
+BROADCAST_MAX_WORKERS = int(os.environ.get("BROADCAST_MAX_WORKERS", "16"))
+
+# Analysis mode per ticker report action. "agent" runs the ReAct agent; "fast" makes a
+# single model call over the prefetched ticker data and is opted into per action here,
+# e.g. ANALYSIS_MODES='{"getInvestmentAnalysis": "fast"}', or per request with "mode".
+ANALYSIS_MODES = {"getInvestmentAnalysis": "agent", "getFinancialData": "agent"}
+ANALYSIS_MODES.update(json.loads(os.environ.get("ANALYSIS_MODES", "{}")))
+
+# Ticker analyses are cached per trading day, model and prompt version, see lib/result_cache.py
+LLM_MODEL_ID = os.environ["LLM_MODEL_ID"]
+CACHED_ACTIONS = {
+    "getFundamentalAnalysis": FinancialAnalysisPrompt.prompt_version,
+    "getInvestmentAnalysis": InvestmentAnalysisPrompt.prompt_version,
+    "getFinancialData": InvestmentAnalysisPrompt.prompt_version,
+}
+
+REQ_RECVD_RESPONSE = {"statusCode": 200, "body": "RECEIVED"}
+
+# Long-running actions are queued for the job worker when JOB_QUEUE_URL is set
+# ("memory" queues them in-process, see lib/jobs.py)
+ASYNC_ACTIONS = {"getTickerNews", "getFundamentalAnalysis", "getInvestmentAnalysis",
+                 "getFinancialData", "chat", "getIndustryReport"}
+job_queue = get_job_queue()
+job_status_store = get_job_status_store()
+
+# API Gateway Management API clients are cached per endpoint and reused across warm
+# invocations, keeping their pooled keep-alive connections open between posts.
+APIG_CLIENT_CONFIG = Config(
+    max_pool_connections=int(os.environ.get("APIG_MAX_POOL_CONNECTIONS", "20")),
+    tcp_keepalive=True,
+    connect_timeout=float(os.environ.get("APIG_CONNECT_TIMEOUT_SECONDS", "2")),
+    read_timeout=float(os.environ.get("APIG_READ_TIMEOUT_SECONDS", "5")),
+    retries={"max_attempts": int(os.environ.get("APIG_MAX_ATTEMPTS", "3")), "mode": "standard"},
+)
+apig_clients = {}
+apig_clients_lock = threading.Lock()
+send_stats = {"posts": 0, "client_builds": 0, "client_setup_ms": 0.0, "post_ms": 0.0}
+send_stats_lock = threading.Lock()
+
 @tracer.capture_method
-def handle_connect(principal_id, table, connection_id, email):
+def handle_connect(principal_id, table, connection_id, email, bypass_answer_cache=False):
     status_code = 200
     try:
-        table.put_item(Item={"connection_id": connection_id, "principal_id": principal_id, "email": email})
+        table.put_item(Item={"connection_id": connection_id, "principal_id": principal_id, "email": email,
+                             "conn_shard": connection_shard(connection_id),
+                             "bypass_answer_cache": bypass_answer_cache})
         logger.info("Added connection %s for user %s.", connection_id, principal_id)
     except ClientError:
         logger.exception(
@@ -40,64 +104,342 @@ def handle_disconnect(table, connection_id):
         status_code = 503
     return status_code
 
+def connection_shard(connection_id):
+    return str(zlib.crc32(connection_id.encode("utf-8")) % CONNECTION_SHARDS)
+
+def iter_connection_pages(table):
+    """Yield pages of connection ids, following LastEvaluatedKey until exhausted."""
+    if CONNECTIONS_INDEX_NM:
+        for shard in range(CONNECTION_SHARDS):
+            kwargs = {
+                "IndexName": CONNECTIONS_INDEX_NM,
+                "KeyConditionExpression": Key("conn_shard").eq(str(shard)),
+                "ProjectionExpression": "connection_id",
+            }
+            while True:
+                page = table.query(**kwargs)
+                yield [item["connection_id"] for item in page["Items"]]
+                if "LastEvaluatedKey" not in page:
+                    break
+                kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+    else:
+        kwargs = {"ProjectionExpression": "connection_id"}
+        while True:
+            page = table.scan(**kwargs)
+            yield [item["connection_id"] for item in page["Items"]]
+            if "LastEvaluatedKey" not in page:
+                break
+            kwargs["ExclusiveStartKey"] = page["LastEvaluatedKey"]
+
+def post_to_connection(apig_management_client, connection_id, message):
+    """Post the message; return the connection id if it is gone, otherwise None."""
+    try:
+        apig_management_client.post_to_connection(Data=message, ConnectionId=connection_id)
+    except apig_management_client.exceptions.GoneException:
+        logger.info("Connection %s is gone, removing.", connection_id)
+        return connection_id
+    except (BotoCoreError, ClientError):
+        # Timeouts and connection errors too, so one bad post doesn't fail the broadcast
+        logger.exception("Couldn't post to connection %s.", connection_id)
+    return None
+
 @tracer.capture_method
 def handle_message(table, connection_id, event_body, apig_management_client):
     status_code = 200
     user_name = "guest"
     try:
         item_response = table.get_item(Key={"connection_id": connection_id})
-        user_name = item_response["Item"]["user_name"]
+        user_name = item_response.get("Item", {}).get("user_name", user_name)
         logger.info("Got user name %s.", user_name)
     except ClientError:
         logger.exception("Couldn't find user name. Using %s.", user_name)
 
-    connection_ids = []
-    try:
-        scan_response = table.scan(ProjectionExpression="connection_id")
-        connection_ids = [item["connection_id"] for item in scan_response["Items"]]
-        logger.info("Found %s active connections.", len(connection_ids))
-    except ClientError:
-        logger.exception("Couldn't get connections.")
-        status_code = 404
-
     message = f"{user_name}: {event_body['msg']}".encode()  # utf-8
     logger.info("Message: %s", message)
 
-    for other_conn_id in connection_ids:
+    # Posts for each page are in flight while the next page is fetched
+    futures = []
+    connection_count = 0
+    with ThreadPoolExecutor(max_workers=BROADCAST_MAX_WORKERS) as executor:
         try:
-            if other_conn_id != connection_id:
-                send_response = apig_management_client.post_to_connection(
-                    Data=message, ConnectionId=other_conn_id
-                )
-                logger.info(
-                    "Posted message to connection %s, got response %s.",
-                    other_conn_id,
-                    send_response,
+            for page in iter_connection_pages(table):
+                connection_count += len(page)
+                futures.extend(
+                    executor.submit(post_to_connection, apig_management_client, other_conn_id, message)
+                    for other_conn_id in page if other_conn_id != connection_id
                 )
         except ClientError:
-            logger.exception("Couldn't post to connection %s.", other_conn_id)
-        except apig_management_client.exceptions.GoneException:
-            logger.info("Connection %s is gone, removing.", other_conn_id)
-            try:
-                table.delete_item(Key={"connection_id": other_conn_id})
-            except ClientError:
-                logger.exception("Couldn't remove connection %s.", other_conn_id)
+            logger.exception("Couldn't get connections.")
+            status_code = 404
+    logger.info("Broadcast to %s active connections.", connection_count)
+
+    gone_ids = [gone_id for gone_id in (future.result() for future in futures) if gone_id is not None]
+    if gone_ids:
+        try:
+            # batch_writer sends BatchWriteItem requests and retries unprocessed items
+            with table.batch_writer() as batch:
+                for gone_id in gone_ids:
+                    batch.delete_item(Key={"connection_id": gone_id})
+            logger.info("Removed %s stale connections.", len(gone_ids))
+        except ClientError:
+            logger.exception("Couldn't remove stale connections %s.", gone_ids)
 
     return status_code
 
+@tracer.capture_method
+def run_investment_analysis(action, body, user_input, streamer=None):
+    tickr = body['tickr']
+    mode = body.get("mode") or ANALYSIS_MODES.get(action, "agent")
+    logger.info(f"Running {action} for {tickr} in {mode} mode")
+    if mode == "fast":
+        return analyze_investment_fast(tickr, callbacks=stream_callbacks(streamer))
+    return analyze_investment(user_input, ticker=tickr, callbacks=stream_callbacks(streamer, agent=True))
+
+def analysis_cache_key(action, body):
+    mode = body.get("mode") or ANALYSIS_MODES.get(action, "agent")
+    return ":".join([f"{action}/{mode}", normalize_ticker(body['tickr']), get_latest_trading_day(),
+                     LLM_MODEL_ID, CACHED_ACTIONS[action]])
+
+@tracer.capture_method
+def cached_analysis(action, body, streamer, compute, deliver):
+    """Serve a ticker analysis from the result cache, computing it at most once across requests.
+
+    ``compute(streamer)`` runs the analysis; it only streams when the client is still waiting,
+    not when it refreshes a stale result that was already delivered.
+    """
+    delivered = []
+
+    def deliver_once(result):
+        delivered.append(True)
+        deliver(result)
+
+    def compute_result():
+        result = compute(None if delivered else streamer)
+        if streamer and not delivered:
+            streamer.done()
+        return result
+
+    return result_cache.get_or_compute(
+        analysis_cache_key(action, body), compute_result, deliver_once,
+        # Failed analyses come back as an (error, None) tuple and are not cached
+        cacheable=lambda result: not isinstance(result, tuple))
+
+@tracer.capture_method
+def process_ticker_batch(body, user_input_template, domainName, stg, connection_id):
+    """Analyze a "tickrs" watchlist, posting each ticker's result as soon as it is ready."""
+    action = body["action"]
+    tickers = batch_tickers(body["tickrs"])
+    if not tickers or len(tickers) > TICKER_BATCH_MAX_TICKERS:
+        response = {"statusCode": 400, "body": {
+            "error": f"'tickrs' must list between 1 and {TICKER_BATCH_MAX_TICKERS} tickers"}}
+        send_response(domainName, stg, connection_id, response)
+        return response
+
+    def analyze(tickr):
+        ticker_body = {key: value for key, value in body.items() if key not in ("tickrs", "stream")}
+        ticker_body["tickr"] = tickr
+
+        def deliver(investment_response):
+            # A failed analysis comes back as an (error, None) tuple; the loop below reports it
+            if not isinstance(investment_response, tuple):
+                send_response(domainName, stg, connection_id, {
+                    "statusCode": 200, "body": {"tickr": tickr, "investment_response": investment_response}})
+
+        return cached_analysis(
+            action, ticker_body, None,
+            lambda streamer: run_investment_analysis(
+                action, ticker_body, user_input_template.format(tickr=tickr), streamer),
+            deliver)
+
+    failed = []
+    for tickr, _, error in run_ticker_batch(tickers, analyze):
+        if error is not None:
+            failed.append(tickr)
+            send_response(domainName, stg, connection_id, {
+                "statusCode": 500, "body": {"tickr": tickr, "error": str(error)}})
+    response = {"statusCode": 200, "body": {"tickrs": tickers, "failed": failed, "status": "COMPLETE"}}
+    send_response(domainName, stg, connection_id, response)
+    return response
+
+def get_streamer(domain_nm, stg, connection_id, body):
+    """Return a token streamer when the client asked for a streamed answer with "stream": true."""
+    if not body.get("stream"):
+        return None
+    return WebSocketStreamer(
+        lambda frame: send_response(domain_nm, stg, connection_id, frame), body["action"])
+
+def stream_callbacks(streamer, agent=False):
+    if streamer is None:
+        return None
+    # Agents emit a JSON blob per turn; only the final answer is forwarded
+    return [FinalAnswerStreamHandler(streamer) if agent else TokenStreamHandler(streamer)]
+
+def get_apig_management_client(domain_nm, stg):
+    endpoint_url = f"https://{domain_nm}/{stg}"
+    client = apig_clients.get(endpoint_url)
+    if client is None:
+        with apig_clients_lock:
+            client = apig_clients.get(endpoint_url)
+            if client is None:
+                client = boto3.client(
+                    "apigatewaymanagementapi",
+                    endpoint_url=endpoint_url,
+                    config=APIG_CLIENT_CONFIG,
+                )
+                apig_clients[endpoint_url] = client
+                with send_stats_lock:
+                    send_stats["client_builds"] += 1
+    return client
+
 def send_response(domain_nm, stg, connection_id, response):
+    started = time.perf_counter()
     try:
-        apig_management_client = boto3.client(
-            "apigatewaymanagementapi",
-            endpoint_url=f"https://{domain_nm}/{stg}",
-        )
+        apig_management_client = get_apig_management_client(domain_nm, stg)
+        setup_done = time.perf_counter()
         send_response = apig_management_client.post_to_connection(
             Data=json.dumps(response).encode("utf-8"), ConnectionId=connection_id
         )
-        logger.info("Sent response to connection %s, got %s.", connection_id, send_response)
+        posted = time.perf_counter()
+        setup_ms = (setup_done - started) * 1000
+        post_ms = (posted - setup_done) * 1000
+        with send_stats_lock:
+            send_stats["posts"] += 1
+            send_stats["client_setup_ms"] += setup_ms
+            send_stats["post_ms"] += post_ms
+        logger.info("Sent response to connection %s in %.1f ms (client setup %.1f ms), got %s.",
+                    connection_id, post_ms, setup_ms, send_response)
     except ClientError as e:
         logger.error("Error sending response to connection %s: %s", connection_id, e)
 
+@tracer.capture_method
+def process_action(body, connection_id, domainName, stg, acknowledge_request=True):
+    """Run a $default route action and post its result to the connection."""
+    response = {"statusCode": 200, "body": "OK"}
+
+    def acknowledge():
+        if acknowledge_request:
+            send_response(domainName, stg, connection_id, REQ_RECVD_RESPONSE)
+
+    if body["action"] == "getTickerNews":
+        logger.info(f"Received getTickerNews request for {body['tickr']}")
+        acknowledge() # Responding with request received to avoid connection timeout
+        streamer = get_streamer(domainName, stg, connection_id, body)
+        news_response = fetch_news_and_sentiments(
+            body['tickr'], on_item=streamer.send_item if streamer else None)
+        if streamer:
+            streamer.done()
+        send_response(domainName, stg, connection_id, news_response)
+        logger.info("Posted message to connection %s, got response %s.", connection_id, send_response)
+    elif body["action"] == "getFundamentalAnalysis":
+        tickr = body['tickr']
+        logger.info(f"Received getFundamentalAnalysis request for: {tickr}")
+        acknowledge() # Responding with request received to avoid connection timeout
+        streamer = get_streamer(domainName, stg, connection_id, body)
+        cached_analysis(
+            body["action"], body, streamer,
+            lambda streamer: analyze_financials(
+                f"{tickr}? Answer in JSON Format.", callbacks=stream_callbacks(streamer, agent=True)),
+            lambda fundamental_analysis_response: send_response(
+                domainName, stg, connection_id, fundamental_analysis_response))
+    elif body["action"] == "getInvestmentAnalysis" and body.get("tickrs"):
+        logger.info(f"Received getInvestmentAnalysis request for: {body['tickrs']}")
+        acknowledge() # Responding with request received to avoid connection timeout
+        response = process_ticker_batch(body, "{tickr}? Answer in JSON Format.", domainName, stg, connection_id)
+    elif body["action"] == "getInvestmentAnalysis":
+        tickr = body['tickr']
+        logger.info(f"Received getInvestmentAnalysis request for: {tickr}")
+        acknowledge() # Responding with request received to avoid connection timeout
+        user_input = f"{tickr}? Answer in JSON Format."
+        streamer = get_streamer(domainName, stg, connection_id, body)
+        investment_response = cached_analysis(
+            body["action"], body, streamer,
+            lambda streamer: run_investment_analysis(body["action"], body, user_input, streamer),
+            lambda investment_response: send_response(domainName, stg, connection_id, {
+                "statusCode": 200, "body": {"investment_response": investment_response}}))
+        response = {"statusCode": 200, "body": {
+            "investment_response": investment_response}}
+    elif body["action"] == "getFinancialData" and body.get("tickrs"):
+        logger.info(f"Received getFinancialData request for: {body['tickrs']}")
+        acknowledge() # Responding with request received to avoid connection timeout
+        response = process_ticker_batch(body, "{tickr}. Answer in JSON Format.", domainName, stg, connection_id)
+    elif body["action"] == "getFinancialData":
+        tickr = body['tickr']
+        logger.info(f"Received getFinancialData request for: {tickr}")
+        acknowledge() # Responding with request received to avoid connection timeout
+        user_input = f"{tickr}. Answer in JSON Format."
+        streamer = get_streamer(domainName, stg, connection_id, body)
+        investment_response = cached_analysis(
+            body["action"], body, streamer,
+            lambda streamer: run_investment_analysis(body["action"], body, user_input, streamer),
+            lambda investment_response: send_response(domainName, stg, connection_id, {
+                "statusCode": 200, "body": {"investment_response": investment_response}}))
+        response = {"statusCode": 200, "body": {
+            "investment_response": investment_response}}
+    elif body["action"] == "getQualitativeQnA":
+        tickr = body['tickr']
+        logger.info(f"Received getQualitativeQnA request for: {tickr}")
+        acknowledge() # Responding with request received to avoid connection timeout
+        send_response(domainName, stg, connection_id, "getQualitativeQnA")
+    elif body["action"] == "chat":
+        question = body['question']
+        logger.info(f"Received chat request for: {question}")
+        acknowledge() # Responding with request received to avoid connection timeout
+        streamer = get_streamer(domainName, stg, connection_id, body)
+        # "bypass_cache" overrides the session's setting (see setChatCacheBypass) for this message
+        bypass_cache = body.get("bypass_cache")
+        chat_response = chat_investment(question, connection_id, callbacks=stream_callbacks(streamer),
+                                        bypass_cache=None if bypass_cache is None else bool(bypass_cache))
+        if streamer:
+            streamer.done()
+        send_response(domainName, stg, connection_id, str(chat_response))
+        # The reply is out; now persist the turn (write-behind)
+        flush_chat_histories()
+    elif body["action"] == "setChatCacheBypass":
+        bypass_cache = bool(body.get("bypass_cache", True))
+        logger.info(f"Setting chat cache bypass to {bypass_cache}")
+        try:
+            set_session_cache_bypass(connection_id, bypass_cache)
+            response = {"statusCode": 200, "body": {"bypass_cache": bypass_cache}}
+        except ClientError:
+            logger.exception("Couldn't update the chat cache setting of connection %s.", connection_id)
+            response = {"statusCode": 500, "body": {"error": "Couldn't update the chat cache setting"}}
+        send_response(domainName, stg, connection_id, response)
+    elif body["action"] == "getIndustryReport":
+        industry = body.get('industry', '')
+        region = body.get('region', 'global')
+        time_horizon = body.get('time_horizon', 'next 12 months')
+        if not industry:
+            response = {"statusCode": 400, "body": {"error": "'industry' is required"}}
+            send_response(domainName, stg, connection_id, response)
+        else:
+            logger.info(f"Received getIndustryReport request for: {industry} | region={region} | horizon={time_horizon}")
+            acknowledge()
+            streamer = get_streamer(domainName, stg, connection_id, body)
+            report = generate_macro_industry_report(
+                industry, region, time_horizon, callbacks=stream_callbacks(streamer))
+            if streamer:
+                streamer.done()
+            response = {"statusCode": 200, "body": {"industry_report": report}}
+            send_response(domainName, stg, connection_id, response)
+    else:
+        response["statusCode"] = 404
+    return response
+
+@tracer.capture_method
+def dispatch_job(body, connection_id, domainName, stg):
+    """Queue the request for a worker instead of running it inline, then acknowledge it."""
+    job = new_job(body, connection_id, domainName, stg)
+    if not enqueue_job(job_queue, job_status_store, job):
+        # Nothing will answer this request, so say so instead of acknowledging it
+        response = {"statusCode": 500, "body": {"error": "Couldn't queue the request, please try again."}}
+        send_response(domainName, stg, connection_id, response)
+        return response
+    send_response(domainName, stg, connection_id, REQ_RECVD_RESPONSE) # Responding with request received to avoid connection timeout
+    return {"statusCode": 200, "body": "QUEUED"}
+
+def run_job(job):
+    process_action(job["body"], job["connection_id"], job["domain_name"], job["stage"], acknowledge_request=False)
+
 @logger.inject_lambda_context(
     log_event=True, correlation_id_path=correlation_paths.API_GATEWAY_REST
 )
@@ -116,11 +458,13 @@ def handler(event, context):
     logger.info("Request: %s, use table %s.", route_key, table.name)
 
     response = {"statusCode": 200, "body": "OK"}
-    req_recvd_response = {"statusCode": 200, "body": "RECEIVED"}
     if route_key == "$connect":
         principalId = event["requestContext"]["authorizer"]["principalId"]
         user_email = event["requestContext"]["authorizer"]["email"]
-        response["statusCode"] = handle_connect(principalId, table, connection_id, user_email)
+        # ?bypassCache=true turns the chat answer cache off for the whole session
+        query = event.get("queryStringParameters") or {}
+        response["statusCode"] = handle_connect(principalId, table, connection_id, user_email,
+                                                query.get("bypassCache") == "true")
     elif route_key == "$disconnect":
         response["statusCode"] = handle_disconnect(table, connection_id)
     elif route_key == "$default":
@@ -141,64 +485,45 @@ def handler(event, context):
             )
             response["statusCode"] = 400
         else:
-            if body["action"] == "getTickerNews":
-                logger.info(f"Received getTickerNews request for {body['tickr']}")
-                send_response(domainName, stg, connection_id, req_recvd_response) # Responding with request received to avoid connection timeout
-                news_response = fetch_news_and_sentiments(body['tickr'])
-                send_response(domainName, stg, connection_id, news_response)
-                logger.info("Posted message to connection %s, got response %s.", connection_id, send_response)
-            elif body["action"] == "getFundamentalAnalysis":
-                tickr = body['tickr']
-                logger.info(f"Received getFundamentalAnalysis request for: {tickr}")
-                send_response(domainName, stg, connection_id, req_recvd_response) # Responding with request received to avoid connection timeout
-                fundamental_analysis_response = analyze_financials(f"{tickr}? Answer in JSON Format.")
-                send_response(domainName, stg, connection_id, fundamental_analysis_response)
-            elif body["action"] == "getInvestmentAnalysis":
-                tickr = body['tickr']
-                logger.info(f"Received getInvestmentAnalysis request for: {tickr}")
-                send_response(domainName, stg, connection_id, req_recvd_response) # Responding with request received to avoid connection timeout
-                user_input = f"{tickr}? Answer in JSON Format."
-                investment_response = analyze_investment(user_input)
-                response = {"statusCode": 200, "body": {
-                    "investment_response": investment_response}}    
-                send_response(domainName, stg, connection_id, response)
-            elif body["action"] == "getFinancialData":
-                tickr = body['tickr']
-                logger.info(f"Received getFinancialData request for: {tickr}")
-                send_response(domainName, stg, connection_id, req_recvd_response) # Responding with request received to avoid connection timeout
-                user_input = f"{tickr}. Answer in JSON Format."
-                investment_response = analyze_investment(user_input)
-                response = {"statusCode": 200, "body": {
-                    "investment_response": investment_response}}
-                send_response(domainName, stg, connection_id, response)
-            elif body["action"] == "getQualitativeQnA":
-                tickr = body['tickr']
-                logger.info(f"Received getQualitativeQnA request for: {tickr}")
-                send_response(domainName, stg, connection_id, req_recvd_response) # Responding with request received to avoid connection timeout
-                send_response(domainName, stg, connection_id, "getQualitativeQnA")
-            elif body["action"] == "chat":
-                question = body['question']
-                logger.info(f"Received chat request for: {question}")
-                send_response(domainName, stg, connection_id, req_recvd_response) # Responding with request received to avoid connection timeout
-                chat_response = chat_investment(question, connection_id)
-                send_response(domainName, stg, connection_id, str(chat_response))
-            elif body["action"] == "getIndustryReport":
-                industry = body.get('industry', '')
-                region = body.get('region', 'global')
-                time_horizon = body.get('time_horizon', 'next 12 months')
-                if not industry:
-                    response = {"statusCode": 400, "body": {"error": "'industry' is required"}}
-                    send_response(domainName, stg, connection_id, response)
-                else:
-                    logger.info(f"Received getIndustryReport request for: {industry} | region={region} | horizon={time_horizon}")
-                    send_response(domainName, stg, connection_id, req_recvd_response)
-                    report = generate_macro_industry_report(industry, region, time_horizon)
-                    response = {"statusCode": 200, "body": {"industry_report": report}}
-                    send_response(domainName, stg, connection_id, response)
+            if job_queue is not None and body.get("action") in ASYNC_ACTIONS:
+                response = dispatch_job(body, connection_id, domainName, stg)
             else:
-                response["statusCode"] = 404
+                response = process_action(body, connection_id, domainName, stg)
     else:
         response["statusCode"] = 404
 
     logger.info(f"prepared response: {response}")
+    flush_chat_histories()
+    logger.info(f"market data cache stats: {market_data_cache_stats()}")
+    logger.info(f"result cache stats: {result_cache.stats()}")
+    logger.info(f"retrieval cache stats: {retrieval_cache_stats()}")
+    logger.info(f"chat answer cache stats: {answer_cache_stats()}")
+    logger.info(f"chat history stats: {chat_history_stats()}")
+    logger.info(f"tool output encoding stats: {encoding_stats()}")
+    logger.info(f"send stats: {send_stats}")
     return response
+
+@logger.inject_lambda_context(log_event=True)
+def job_handler(event, context):
+    """SQS worker entry point; failed jobs are reported back for redelivery."""
+    failures = []
+    for record in event.get("Records", []):
+        try:
+            job = json.loads(record["body"])
+            if not isinstance(job, dict) or not {"job_id", "action"} <= job.keys():
+                raise ValueError("not a job description")
+        except ValueError as e:
+            # Redelivering a malformed message can't help; drop it without failing the batch
+            logger.error(f"Dropping malformed job message {record.get('messageId')}: {e}")
+            continue
+        if not process_job(job, run_job, job_status_store):
+            failures.append({"itemIdentifier": record["messageId"]})
+    flush_chat_histories()
+    logger.info(f"market data cache stats: {market_data_cache_stats()}")
+    logger.info(f"result cache stats: {result_cache.stats()}")
+    logger.info(f"retrieval cache stats: {retrieval_cache_stats()}")
+    logger.info(f"chat answer cache stats: {answer_cache_stats()}")
+    logger.info(f"chat history stats: {chat_history_stats()}")
+    logger.info(f"tool output encoding stats: {encoding_stats()}")
+    logger.info(f"send stats: {send_stats}")
+    return {"batchItemFailures": failures}
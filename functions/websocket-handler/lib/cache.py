@@ -0,0 +1,244 @@
+# cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import boto3
+from aws_lambda_powertools import Logger, Tracer
+from botocore.exceptions import ClientError
+
+logger = Logger(service="cache")
+tracer = Tracer(service="cache")
+
+# Optional second-level stores. When neither is set only the in-process L1 is used.
+CACHE_TBL_NM = os.environ.get("CACHE_TBL_NM")
+CACHE_DIR = os.environ.get("CACHE_DIR")
+
+
+class LRUCache:
+    """Thread-safe in-process LRU with per-entry expiry.
+
+    Lives at module level so entries survive warm Lambda invocations.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        """Return (hit, value) for the key; expired entries are dropped."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False, None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return False, None
+            self._entries.move_to_end(key)
+            return True, value
+
+    def set(self, key: str, value: Any, ttl: float):
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class FileCacheStore:
+    """L2 store keeping one JSON file per key under a local directory (e.g. /tmp)."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, key: str):
+        hit, value, _ = self.get_with_expiry(key)
+        return hit, value
+
+    def get_with_expiry(self, key: str):
+        """Return (hit, value, expires_at)."""
+        try:
+            with open(self._path(key), "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False, None, 0
+        expires_at = entry.get("expires_at", 0)
+        if expires_at <= time.time():
+            return False, None, 0
+        return True, entry.get("value"), expires_at
+
+    def set(self, key: str, value: Any, ttl: float):
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"key": key, "expires_at": time.time() + ttl, "value": value}, f)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Couldn't write cache file for {key}: {e}")
+
+    def delete(self, key: str):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+
+class DynamoDBCacheStore:
+    """L2 store backed by a DynamoDB table keyed on ``cache_key`` with TTL attribute ``expires_at``."""
+
+    def __init__(self, table_name: str):
+        self.table = boto3.resource("dynamodb").Table(table_name)
+
+    def get(self, key: str):
+        hit, value, _ = self.get_with_expiry(key)
+        return hit, value
+
+    def get_with_expiry(self, key: str):
+        """Return (hit, value, expires_at)."""
+        try:
+            item = self.table.get_item(Key={"cache_key": key}).get("Item")
+        except ClientError as e:
+            logger.warning(f"Couldn't read cache item {key}: {e}")
+            return False, None, 0
+        # DynamoDB TTL deletion is lazy, so expiry is checked on read as well.
+        expires_at = int(item.get("expires_at", 0)) if item else 0
+        if expires_at <= time.time():
+            return False, None, 0
+        return True, json.loads(item["value"]), expires_at
+
+    def set(self, key: str, value: Any, ttl: float):
+        try:
+            self.table.put_item(Item={
+                "cache_key": key,
+                "value": json.dumps(value),
+                "expires_at": int(time.time() + ttl),
+            })
+        except ClientError as e:
+            logger.warning(f"Couldn't write cache item {key}: {e}")
+
+    def delete(self, key: str):
+        try:
+            self.table.delete_item(Key={"cache_key": key})
+        except ClientError as e:
+            logger.warning(f"Couldn't delete cache item {key}: {e}")
+
+
+def default_l2_store():
+    """Return the configured L2 store, preferring DynamoDB over the local file store."""
+    if CACHE_TBL_NM:
+        return DynamoDBCacheStore(CACHE_TBL_NM)
+    if CACHE_DIR:
+        return FileCacheStore(CACHE_DIR)
+    return None
+
+
+class TieredCache:
+    """Read-through cache with an in-process L1 in front of an optional shared L2.
+
+    Entries are grouped by dataset, each with its own TTL. Values must be JSON
+    serializable so they can be written to the L2 store.
+    """
+
+    def __init__(self, namespace: str, ttls: Dict[str, float], default_ttl: float = 300,
+                 l1_max_entries: int = 512, l2=None):
+        self.namespace = namespace
+        self.ttls = dict(ttls)
+        self.default_ttl = default_ttl
+        self.l1 = LRUCache(l1_max_entries)
+        self.l2 = l2
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def _key(self, dataset: str, key: str) -> str:
+        return f"{self.namespace}:{dataset}:{key}"
+
+    def _count(self, dataset: str, counter: str):
+        with self._lock:
+            counters = self._counters.setdefault(
+                dataset, {"l1_hits": 0, "l2_hits": 0, "misses": 0, "errors": 0})
+            counters[counter] += 1
+
+    def ttl_for(self, dataset: str) -> float:
+        return self.ttls.get(dataset, self.default_ttl)
+
+    def _lookup(self, dataset: str, key: str):
+        """Return (counter, value), promoting L2 hits into L1 for the rest of their lifetime."""
+        cache_key = self._key(dataset, key)
+        hit, value = self.l1.get(cache_key)
+        if hit:
+            return "l1_hits", value
+        if self.l2 is not None:
+            hit, value, expires_at = self.l2.get_with_expiry(cache_key)
+            if hit:
+                self.l1.set(cache_key, value, expires_at - time.time())
+                return "l2_hits", value
+        return "misses", None
+
+    def get(self, dataset: str, key: str):
+        """Return (hit, value) from L1, falling back to L2 and promoting hits into L1."""
+        counter, value = self._lookup(dataset, key)
+        self._count(dataset, counter)
+        return counter != "misses", value
+
+    def contains(self, dataset: str, key: str) -> bool:
+        """Like ``get``, but not counted in the stats; for warming the cache."""
+        return self._lookup(dataset, key)[0] != "misses"
+
+    def set(self, dataset: str, key: str, value: Any, ttl: Optional[float] = None):
+        ttl = self.ttl_for(dataset) if ttl is None else ttl
+        cache_key = self._key(dataset, key)
+        self.l1.set(cache_key, value, ttl)
+        if self.l2 is not None:
+            self.l2.set(cache_key, value, ttl)
+
+    @tracer.capture_method
+    def get_or_load(self, dataset: str, key: str, loader: Callable[[], Any], ttl: Optional[float] = None):
+        """Return the cached value or call ``loader`` and cache its result.
+
+        ``None`` results and loader exceptions are never cached.
+        """
+        hit, value = self.get(dataset, key)
+        if hit:
+            return value
+        try:
+            value = loader()
+        except Exception:
+            self._count(dataset, "errors")
+            raise
+        if value is not None:
+            self.set(dataset, key, value, ttl)
+        return value
+
+    def invalidate(self, dataset: str, key: str):
+        cache_key = self._key(dataset, key)
+        self.l1.delete(cache_key)
+        if self.l2 is not None:
+            self.l2.delete(cache_key)
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Return a copy of the hit/miss counters per dataset."""
+        with self._lock:
+            return {dataset: dict(counters) for dataset, counters in self._counters.items()}
@@ -0,0 +1,42 @@
+# chain_registry.py
+
+import threading
+from typing import Any, Callable, Dict
+
+from aws_lambda_powertools import Logger
+
+logger = Logger(service="chain_registry")
+
+
+class ChainRegistry:
+    """Compiled chains built once per container and shared by every request.
+
+    Chains registered here must only hold per-container state (model clients,
+    prompts, tools); request data is passed to ``invoke``.
+    """
+
+    def __init__(self):
+        self._chains: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, name: str, builder: Callable[[], Any]):
+        """Return the chain registered as ``name``, building it on first use."""
+        chain = self._chains.get(name)
+        if chain is None:
+            with self._lock:
+                chain = self._chains.get(name)
+                if chain is None:
+                    logger.info(f"Building chain {name}")
+                    chain = builder()
+                    self._chains[name] = chain
+        return chain
+
+    def clear(self):
+        with self._lock:
+            self._chains.clear()
+
+    def names(self):
+        return list(self._chains)
+
+
+chain_registry = ChainRegistry()
@@ -0,0 +1,218 @@
+# chat_history.py
+
+import os
+import threading
+import uuid
+from typing import Callable, Dict, List, Sequence
+
+import boto3
+from aws_lambda_powertools import Logger, Tracer
+from botocore.exceptions import ClientError
+from langchain_core.chat_history import BaseChatMessageHistory
+from langchain_core.messages import BaseMessage, SystemMessage, messages_from_dict
+
+logger = Logger(service="chat_history")
+tracer = Tracer(service="chat_history")
+
+# Turns (a question and its answer) kept verbatim
+CHAT_HISTORY_WINDOW_TURNS = int(os.environ.get("CHAT_HISTORY_WINDOW_TURNS", "6"))
+# Older turns are folded into the summary this many at a time, so the summary
+# model runs once every few turns instead of on every message
+CHAT_HISTORY_SUMMARY_BATCH_TURNS = int(os.environ.get("CHAT_HISTORY_SUMMARY_BATCH_TURNS", "4"))
+WRITE_ATTEMPTS = 3
+# Buffer new messages and persist them with flush_chat_histories() once the answer
+# has been sent, instead of writing before the reply
+CHAT_HISTORY_WRITE_BEHIND = os.environ.get("CHAT_HISTORY_WRITE_BEHIND", "true").lower() == "true"
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def _encode(message: BaseMessage):
+    # Only what the prompt needs; response metadata would bloat the item. The id makes
+    # a retried flush idempotent.
+    return {"id": uuid.uuid4().hex, "type": message.type,
+            "content": message.content if isinstance(message.content, str) else str(message.content)}
+
+
+def _from_legacy(history) -> list:
+    # Items written by DynamoDBChatMessageHistory keep every message in "History"
+    return [{"id": uuid.uuid4().hex, "type": message["type"], "content": str(message["data"]["content"])}
+            for message in history]
+
+
+def _decode(items) -> List[BaseMessage]:
+    return messages_from_dict([{"type": item["type"], "data": {"content": item["content"]}} for item in items])
+
+
+class WindowedChatMessageHistory(BaseChatMessageHistory):
+    """Chat history holding the last turns verbatim plus a rolling summary of older ones.
+
+    One item per session keyed on ``SessionId`` carries ``Window`` (the recent
+    messages), ``Summary``, the ``LastMessageId`` applied and a ``Version`` for
+    optimistic concurrency. Its size is bounded, so every read and write costs the
+    same however long the session is. An item written by
+    ``DynamoDBChatMessageHistory`` is read through its ``History`` list and
+    replaced in this format by the first write.
+
+    In write-behind mode ``add_messages`` only buffers; ``flush`` persists the
+    buffered messages in order with a single write.
+    """
+
+    def __init__(self, table_name: str, session_id: str,
+                 summarize: Callable[[str, List[BaseMessage]], str],
+                 window_turns: int = CHAT_HISTORY_WINDOW_TURNS,
+                 batch_turns: int = CHAT_HISTORY_SUMMARY_BATCH_TURNS,
+                 write_behind: bool = CHAT_HISTORY_WRITE_BEHIND):
+        self.table = boto3.resource("dynamodb").Table(table_name)
+        self.session_id = session_id
+        self.summarize = summarize
+        self.window_messages = 2 * window_turns
+        self.max_messages = 2 * (window_turns + batch_turns)
+        self.write_behind = write_behind
+        self._state = None
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._state is None:
+            item = self.table.get_item(
+                Key={"SessionId": self.session_id},
+                ProjectionExpression="#w, #s, #v, #l, #h",
+                ExpressionAttributeNames={"#w": "Window", "#s": "Summary", "#v": "Version", "#l": "LastMessageId",
+                                          "#h": "History"},
+            ).get("Item", {})
+            window = item.get("Window")
+            if window is None:
+                window = _from_legacy(item.get("History", []))
+            self._state = (window, item.get("Summary", ""), int(item.get("Version", 0)),
+                           item.get("LastMessageId"))
+        return self._state
+
+    @property
+    def messages(self) -> List[BaseMessage]:
+        window, summary, _, _ = self._load()
+        messages = _decode(window + self._pending)
+        if summary:
+            return [SystemMessage(content=SUMMARY_PREFIX + summary)] + messages
+        return messages
+
+    def _fold(self, window, summary):
+        """Fold the turns beyond the window into the summary once the batch is full."""
+        if len(window) <= self.max_messages:
+            return window, summary
+        older, recent = window[:-self.window_messages], window[-self.window_messages:]
+        try:
+            summary = self.summarize(summary, _decode(older))
+        except Exception as e:
+            # Keep the turns verbatim and try again on the next write
+            logger.warning(f"Couldn't summarize chat history of {self.session_id}: {e}")
+            return window, summary
+        logger.info(f"Folded {len(older)} messages of {self.session_id} into the summary")
+        return recent, summary
+
+    def add_messages(self, messages: Sequence[BaseMessage]) -> None:
+        with self._lock:
+            self._pending.extend(_encode(message) for message in messages)
+        if not (self.write_behind and _register(self)):
+            self.flush()
+
+    @tracer.capture_method
+    def flush(self) -> None:
+        """Persist the buffered messages in order; safe to retry."""
+        with self._lock:
+            for _ in range(WRITE_ATTEMPTS):
+                if not self._pending:
+                    return
+                window, summary, version, last_id = self._load()
+                ids = [message["id"] for message in self._pending]
+                if last_id in ids:
+                    # An earlier flush was applied but its response was lost
+                    self._pending = self._pending[ids.index(last_id) + 1:]
+                    continue
+                new_window, new_summary = self._fold(window + self._pending, summary)
+                try:
+                    self.table.put_item(
+                        Item={"SessionId": self.session_id, "Window": new_window, "Summary": new_summary,
+                              "Version": version + 1, "LastMessageId": ids[-1]},
+                        # A legacy item has no Version yet
+                        ConditionExpression=("attribute_not_exists(SessionId) OR attribute_not_exists(Version)"
+                                             " OR Version = :version"),
+                        ExpressionAttributeValues={":version": version},
+                    )
+                    self._state = (new_window, new_summary, version + 1, ids[-1])
+                    self._pending = []
+                    return
+                except ClientError as e:
+                    if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                        raise
+                    # Another writer got in first; re-read and apply on top of it
+                    self._state = None
+        raise RuntimeError(f"Couldn't update chat history of {self.session_id} after {WRITE_ATTEMPTS} attempts")
+
+    def clear(self) -> None:
+        self.table.delete_item(Key={"SessionId": self.session_id})
+        with self._lock:
+            self._state = None
+            self._pending = []
+
+
+# Histories with buffered messages, one instance per session so reads within the
+# invocation see the messages not yet written
+_open_histories: Dict[str, WindowedChatMessageHistory] = {}
+_open_histories_lock = threading.Lock()
+_flush_stats = {"flushed": 0, "failed": 0}
+
+
+def _register(history: WindowedChatMessageHistory) -> bool:
+    """Track ``history`` for the next flush; False when the session already has another instance."""
+    with _open_histories_lock:
+        return _open_histories.setdefault(history.session_id, history) is history
+
+
+def get_chat_history(table_name: str, session_id: str, summarize) -> WindowedChatMessageHistory:
+    """The session's history for this invocation, shared until ``flush_chat_histories``."""
+    with _open_histories_lock:
+        history = _open_histories.get(session_id)
+        if history is None:
+            history = WindowedChatMessageHistory(table_name, session_id, summarize)
+            _open_histories[session_id] = history
+    return history
+
+
+def _retry_later(history: WindowedChatMessageHistory):
+    """Keep a history whose flush failed registered, so the next flush in this container retries it."""
+    with history._lock:
+        # Re-read on next use; the stored item may have moved on
+        history._state = None
+    with _open_histories_lock:
+        current = _open_histories.setdefault(history.session_id, history)
+        if current is not history:
+            # The session was opened again meanwhile; its messages come after these
+            with current._lock:
+                current._pending = history._pending + current._pending
+
+
+@tracer.capture_method
+def flush_chat_histories():
+    """Write every buffered message; call once the reply has been sent.
+
+    A session that can't be written keeps its messages and is retried by the next call.
+    """
+    with _open_histories_lock:
+        histories = list(_open_histories.values())
+        _open_histories.clear()
+    for history in histories:
+        try:
+            history.flush()
+            outcome = "flushed"
+        except Exception:
+            logger.exception(f"Couldn't persist chat history of {history.session_id}, will retry")
+            outcome = "failed"
+            _retry_later(history)
+        with _open_histories_lock:
+            _flush_stats[outcome] += 1
+
+
+def chat_history_stats():
+    with _open_histories_lock:
+        return dict(_flush_stats, pending_sessions=len(_open_histories))
@@ -8,7 +8,9 @@ from aws_lambda_powertools import Logger, Tracer
 from langchain.agents import AgentExecutor, Tool, create_json_chat_agent
 from langchain_aws import ChatBedrock
 from langchain_core.prompts import ChatPromptTemplate
+from lib.chain_registry import chain_registry
 from lib.prompts.financial_analysis_prompt import FinancialAnalysisPrompt
+from lib.token_budget import budget_intermediate_steps, prompt_budget
 from lib.tools.stockIncomeStatement import IncomeStatementTool
 from lib.tools.stockPrice import StockPriceTool
 
@@ -25,6 +27,8 @@ claude_chat_llm = ChatBedrock(
     model_kwargs={"temperature": 0.0, "top_p": 0.99, "max_tokens": 4096},
     disable_streaming=True
 )
+# Same model with token streaming, used when the client asked for a streamed answer
+claude_chat_stream_llm = claude_chat_llm.model_copy(update={"streaming": True})
 
 # Initialize tools
 stock_price = StockPriceTool()
@@ -52,11 +56,11 @@ def _handle_error(error) -> str:
     return str(error)
 
 @tracer.capture_method
-def get_agentic_chain(user_input, verbose=True):
+def build_agentic_chain(verbose=True, llm=claude_chat_llm):
     # Create the XML agent with the specified prompt and tools
     # agent = create_xml_agent(
     agent = create_json_chat_agent(
-        llm=claude_chat_llm,
+        llm=llm,
         tools=LLM_AGENT_TOOLS,
         prompt=ChatPromptTemplate.from_messages(FinancialAnalysisPrompt.messages),
     )
@@ -67,18 +71,29 @@ def get_agentic_chain(user_input, verbose=True):
         tools=LLM_AGENT_TOOLS,
         return_intermediate_steps=True,  # Capture intermediate steps
         verbose=verbose,
-        handle_parsing_errors=_handle_error
+        handle_parsing_errors=_handle_error,
+        # Raw tool output must not outgrow the model's prompt budget
+        trim_intermediate_steps=budget_intermediate_steps(prompt_budget(LLM_MODEL_ID)),
     )
     return agent_executor
 
 @tracer.capture_method
-def analyze_financials(user_input):
+def get_agentic_chain(user_input=None, verbose=True, streaming=False):
+    # The executor holds no request state, so one instance serves every invocation
+    if streaming:
+        return chain_registry.get("financial_analysis:streaming",
+                                  lambda: build_agentic_chain(verbose, claude_chat_stream_llm))
+    return chain_registry.get("financial_analysis", lambda: build_agentic_chain(verbose))
+
+@tracer.capture_method
+def analyze_financials(user_input, callbacks=None):
     # Get the agentic chain with the specified parameters
-    conversation_chain = get_agentic_chain(user_input)
+    conversation_chain = get_agentic_chain(user_input, streaming=bool(callbacks))
 
     try:
         # Invoke the agent to get the response with intermediate steps
-        response = conversation_chain.invoke({"input": user_input, "chat_history": []})
+        response = conversation_chain.invoke({"input": user_input, "chat_history": []},
+                                             {"callbacks": callbacks} if callbacks else None)
 
         logger.info(f"response: {response}")
         # Extract the final output and intermediate steps
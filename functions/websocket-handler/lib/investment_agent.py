@@ -8,10 +8,14 @@ from aws_lambda_powertools import Logger, Tracer
 from langchain.agents import AgentExecutor, Tool, create_json_chat_agent
 from langchain.tools.retriever import create_retriever_tool
 from langchain_aws import ChatBedrock
-from langchain_aws.retrievers import AmazonKnowledgeBasesRetriever
 from langchain_core.output_parsers import PydanticOutputParser
 from langchain_core.prompts import ChatPromptTemplate
+from lib.chain_registry import chain_registry
+from lib.prefetch import start_prefetch, use_prefetch
 from lib.prompts.investment_analysis_prompt import InvestmentAnalysisPrompt
+from lib.retrieval_cache import CachedKnowledgeBasesRetriever
+from lib.token_budget import budget_intermediate_steps, fit_parts, prompt_budget
+from lib.tools.compact_encoding import compact_observation
 from lib.tools.investment_analysis_tool import (InvestmentAnalysisOutput,
                                                 InvestmentAnalysisTool,
                                                 get_cash_flow,
@@ -38,8 +42,10 @@ nova_chat_llm = ChatBedrock(
     model_kwargs={"temperature": 0.2, "top_p": 0.99, "max_tokens": 4096},
     disable_streaming=True
 )
+# Same model with token streaming, used when the client asked for a streamed answer
+nova_chat_stream_llm = nova_chat_llm.model_copy(update={"streaming": True})
 
-amzn_kb_retriever = AmazonKnowledgeBasesRetriever(
+amzn_kb_retriever = CachedKnowledgeBasesRetriever(
     knowledge_base_id=KB_ID,
     retrieval_config={"vectorSearchConfiguration": {"numberOfResults": 3}},
 )
@@ -103,6 +109,20 @@ LLM_AGENT_TOOLS = [
     )
 ]
 
+# Tools the agent calls with the ticker as input; fetched concurrently up front.
+PREFETCH_TOOLS = [
+    search_knowledge_base,
+    get_price_history,
+    get_income_statement,
+    get_cash_flow,
+    get_recommendations,
+    get_latest_news,
+]
+
+@tracer.capture_method
+def prefetch_ticker_data(ticker):
+    return start_prefetch(ticker, {tool.name: tool.func for tool in PREFETCH_TOOLS})
+
 @tracer.capture_method
 def _handle_error(error) -> str:
     logger.info("---"*80)
@@ -111,7 +131,7 @@ def _handle_error(error) -> str:
     return str(error)[:50]
 
 @tracer.capture_method
-def get_agentic_chain(user_input, verbose=True):
+def build_agentic_chain(verbose=True, llm=nova_chat_llm):
     logger.info("Creating XML Agent")
     # Create the XML agent with the specified prompt and tools
     parser = PydanticOutputParser(pydantic_object=InvestmentAnalysisOutput)
@@ -126,7 +146,7 @@ def get_agentic_chain(user_input, verbose=True):
     )
 
     agent = create_json_chat_agent(    
-        nova_chat_llm,
+        llm,
         LLM_AGENT_TOOLS,
         prompt
     )
@@ -142,18 +162,36 @@ def get_agentic_chain(user_input, verbose=True):
         return_intermediate_steps=True,  # Capture intermediate steps
         verbose=verbose,
         max_iterations=10,  # Setting max iteration to avoid loop.
-        handle_parsing_errors=_handle_error
+        handle_parsing_errors=_handle_error,
+        # Raw tool output must not outgrow the model's prompt budget
+        trim_intermediate_steps=budget_intermediate_steps(prompt_budget(LLM_MODEL_ID)),
     )
     return agent_executor
 
 @tracer.capture_method
-def analyze_investment(user_input):
+def get_agentic_chain(user_input=None, verbose=True, streaming=False):
+    # The executor holds no request state, so one instance serves every invocation
+    if streaming:
+        return chain_registry.get("investment_agent:streaming",
+                                  lambda: build_agentic_chain(verbose, nova_chat_stream_llm))
+    return chain_registry.get("investment_agent", lambda: build_agentic_chain(verbose))
+
+@tracer.capture_method
+def analyze_investment(user_input, ticker=None, callbacks=None):
+    # Start fetching the ticker's data before the agent asks for it
+    prefetch = prefetch_ticker_data(ticker) if ticker else None
+
     # Get the agentic chain with the specified parameters
-    conversation_chain = get_agentic_chain(user_input)
+    conversation_chain = get_agentic_chain(user_input, streaming=bool(callbacks))
+    config = {"callbacks": callbacks} if callbacks else None
 
     try:
         # Invoke the agent to get the response with intermediate steps
-        response = conversation_chain.invoke({"input": user_input})
+        if prefetch is not None:
+            with use_prefetch(prefetch):
+                response = conversation_chain.invoke({"input": user_input}, config)
+        else:
+            response = conversation_chain.invoke({"input": user_input}, config)
         # Extract the final output and intermediate steps
         logger.info("response = %s", response)
         final_output = response.get("output", "")
@@ -187,6 +225,100 @@ def analyze_investment(user_input):
         return str(e), None
 
 
+def _format_knowledge(knowledge) -> str:
+    if isinstance(knowledge, dict):
+        return "\n\n".join(knowledge.get("news_list", []))
+    return knowledge or ""
+
+def _format_analysis_markdown(analysis: InvestmentAnalysisOutput) -> str:
+    sections = [
+        ("Recommendation", analysis.recommendation),
+        ("Profitability", analysis.profitability),
+        ("Growth Rate", analysis.growth_rate),
+        ("Valuation", analysis.valuation),
+        ("Cash Flow", analysis.cash_flow),
+        ("Income Statement", analysis.income_statement),
+        ("Price History", analysis.price_history),
+        ("Latest News", analysis.latest_news),
+        ("Future Projection", analysis.future_projection),
+    ]
+    return "\n\n".join(f"**{title}**\n\n{text}" for title, text in sections if text)
+
+# Report inputs trimmed first when the prompt is over budget have the lowest priority
+REPORT_PART_PRIORITIES = {
+    "knowledge": 1,
+    "latest_news": 2,
+    "price_history": 3,
+    "recommendations": 4,
+    "cash_flow": 5,
+    "income_statement": 6,
+}
+
+def _prompt_data(data, tool_name: str) -> str:
+    value = data.get(tool_name)
+    return compact_observation(tool_name, value) if isinstance(value, str) and value else value or "Not available"
+
+REPORT_PARSER = PydanticOutputParser(pydantic_object=InvestmentAnalysisOutput)
+
+@tracer.capture_method
+def build_report_chain(llm=nova_chat_llm):
+    prompt = ChatPromptTemplate(
+        messages=InvestmentAnalysisPrompt.report_messages,
+        input_variables=["ticker", "price_history", "income_statement", "cash_flow",
+                         "recommendations", "latest_news", "knowledge"],
+        partial_variables={"format_instructions": REPORT_PARSER.get_format_instructions()},
+    )
+    return prompt | llm
+
+def get_report_chain(streaming=False):
+    if streaming:
+        return chain_registry.get("investment_report:streaming",
+                                  lambda: build_report_chain(nova_chat_stream_llm))
+    return chain_registry.get("investment_report", build_report_chain)
+
+@tracer.capture_method
+def analyze_investment_fast(ticker, callbacks=None):
+    """Build the ticker report from prefetched data with a single model call."""
+    data = prefetch_ticker_data(ticker).results()
+    knowledge = _format_knowledge(data.get("search_knowledge_base"))
+    # The prompt gets the compact encoding; the response keeps the tools' JSON for the UI
+    report_input = fit_parts({
+        "ticker": ticker,
+        "price_history": _prompt_data(data, "get_price_history"),
+        "income_statement": _prompt_data(data, "get_income_statement"),
+        "cash_flow": _prompt_data(data, "get_cash_flow"),
+        "recommendations": _prompt_data(data, "get_recommendations"),
+        "latest_news": data.get("get_latest_news") or "Not available",
+        "knowledge": knowledge or "Not available",
+    }, REPORT_PART_PRIORITIES, prompt_budget(LLM_MODEL_ID))
+
+    try:
+        raw = get_report_chain(streaming=bool(callbacks)).invoke(
+            report_input, {"callbacks": callbacks} if callbacks else None)
+        try:
+            analysis = REPORT_PARSER.invoke(raw)
+            investment_summary = _format_analysis_markdown(analysis)
+        except Exception as e:
+            # Still one round-trip: fall back to the unparsed model answer
+            logger.warning(f"Couldn't parse the structured report: {e}")
+            analysis = None
+            investment_summary = raw.content
+
+        investment_response = {
+            "investment_summary": investment_summary,
+            "analysis": analysis.model_dump() if analysis else None,
+            "recommendation": data.get("get_recommendations") or "",
+            "price_history": data.get("get_price_history") or "",
+            "latest_news": data.get("get_latest_news") or "",
+            "knowledge": data.get("search_knowledge_base") or ""
+        }
+        logger.info(f"investment_response = {json.dumps(investment_response)}")
+        return investment_response
+    except Exception as e:
+        logger.exception(f"Failed to generate report: {str(e)}")
+        return str(e), None
+
+
 # Example usage
 if __name__ == "__main__":
     
@@ -1,15 +1,22 @@
 import os
+from operator import itemgetter
 
 import boto3
 from aws_lambda_powertools import Logger, Tracer
+from botocore.exceptions import BotoCoreError, ClientError
 from langchain.agents import Tool
 from langchain.tools.retriever import create_retriever_tool
-from langchain_aws import ChatBedrock
-from langchain_aws.retrievers import AmazonKnowledgeBasesRetriever
-from langchain_community.chat_message_histories import \
-    DynamoDBChatMessageHistory
+from langchain_aws import BedrockEmbeddings, ChatBedrock
+from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain_core.runnables import RunnablePassthrough
 from langchain_core.runnables.history import RunnableWithMessageHistory
+from lib.chain_registry import chain_registry
+from lib.chat_history import get_chat_history
+from lib.prompts.chat_history_prompt import ChatHistoryPrompt
+from lib.retrieval_cache import CachedKnowledgeBasesRetriever
+from lib.semantic_cache import SemanticAnswerCache, fingerprint
+from lib.token_budget import history_trimmer, prompt_budget
 from lib.tools.investment_analysis_tool import (InvestmentAnalysisTool,
                                                 get_latest_news,
                                                 get_price_history,
@@ -26,6 +33,13 @@ KB_ID = os.environ["KB_ID"]
 CHAT_HISTORY_TBL_NM = os.environ["CHAT_HISTORY_TBL_NM"]
 GUARDRAILS_ID = os.environ["BEDROCK_GUARDRAILSID"]
 GUARDRAIL_VERSION = os.environ["BEDROCK_GUARDRAILSVERSION"]
+EMBEDDINGS_MODEL_ID = os.environ.get("EMBEDDINGS_MODEL_ID")
+# Per-session chat settings live on the connection's item
+WEBSOCKET_TBL_NM = os.environ.get("WEBSOCKET_TBL_NM")
+# Bump when the chat prompt changes so answers cached for the old prompt are not served
+CHAT_PROMPT_VERSION = "1"
+# Trailing history messages that are part of a cached answer's context
+SEMANTIC_CACHE_HISTORY_MESSAGES = int(os.environ.get("SEMANTIC_CACHE_HISTORY_MESSAGES", "4"))
 
 bedrock_region = os.environ["AWS_REGION"]
 bedrock_runtime = boto3.client("bedrock-runtime", region_name=bedrock_region)
@@ -39,8 +53,37 @@ nova_chat_llm = ChatBedrock(
     guardrails={"guardrailIdentifier": GUARDRAILS_ID, "guardrailVersion": GUARDRAIL_VERSION},
     disable_streaming=True
 )
+# Same model with token streaming, used when the client asked for a streamed answer
+nova_chat_stream_llm = nova_chat_llm.model_copy(update={"streaming": True})
 
-amzn_kb_retriever = AmazonKnowledgeBasesRetriever(
+# Earlier answers to semantically equivalent questions asked in the same context
+answer_cache = SemanticAnswerCache(
+    BedrockEmbeddings(model_id=EMBEDDINGS_MODEL_ID, client=bedrock_runtime).embed_query
+) if EMBEDDINGS_MODEL_ID else None
+
+connections_table = boto3.resource("dynamodb").Table(WEBSOCKET_TBL_NM) if WEBSOCKET_TBL_NM else None
+
+def set_session_cache_bypass(socket_conn_id, bypass):
+    """Turn the answer cache off (or back on) for the rest of the connection's session."""
+    connections_table.update_item(
+        Key={"connection_id": socket_conn_id},
+        UpdateExpression="SET bypass_answer_cache = :bypass",
+        ConditionExpression="attribute_exists(connection_id)",
+        ExpressionAttributeValues={":bypass": bool(bypass)},
+    )
+
+def session_bypasses_cache(socket_conn_id):
+    if connections_table is None:
+        return False
+    try:
+        item = connections_table.get_item(
+            Key={"connection_id": socket_conn_id}, ProjectionExpression="bypass_answer_cache").get("Item")
+    except (BotoCoreError, ClientError) as e:
+        logger.warning(f"Couldn't read the cache setting of session {socket_conn_id}: {e}")
+        return False
+    return bool(item and item.get("bypass_answer_cache"))
+
+amzn_kb_retriever = CachedKnowledgeBasesRetriever(
     knowledge_base_id=KB_ID,
     retrieval_config={"vectorSearchConfiguration": {"numberOfResults": 3}},
 )
@@ -94,13 +137,20 @@ LLM_AGENT_TOOLS = [
 ]
 
 
-def chat_investment(user_input, socket_conn_id):
-    nova_chat_llm.bind_tools(LLM_AGENT_TOOLS)
-    history = DynamoDBChatMessageHistory(
-        table_name=CHAT_HISTORY_TBL_NM,
-        session_id=socket_conn_id
-    )
-    print(f'history: {history.messages}')
+summary_chain = ChatPromptTemplate.from_messages(ChatHistoryPrompt.messages) | nova_chat_llm
+
+@tracer.capture_method
+def summarize_history(summary, messages):
+    transcript = "\n".join(f"{message.type}: {message.content}" for message in messages)
+    return summary_chain.invoke({"summary": summary or "(none)", "messages": transcript}).content
+
+def get_session_history(session_id):
+    # Reads only the recent window and the rolling summary of the session; new messages
+    # are written by flush_chat_histories() after the reply is sent
+    return get_chat_history(CHAT_HISTORY_TBL_NM, session_id, summarize_history)
+
+@tracer.capture_method
+def build_chat_chain(llm=nova_chat_llm):
     prompt = ChatPromptTemplate.from_messages(
     [
         ("system", "You are a helpful assistant."),
@@ -108,14 +158,46 @@ def chat_investment(user_input, socket_conn_id):
         ("human", "{question}"),
     ])
 
-    chain = prompt | nova_chat_llm
+    # Only the most recent history that fits the model's prompt budget is sent
+    chain = RunnablePassthrough.assign(
+        history=itemgetter("history") | history_trimmer(prompt_budget(LLM_MODEL_ID))) | prompt | llm
 
-    chain_with_history = RunnableWithMessageHistory(
+    # The history is resolved per request from the session_id in the config
+    return RunnableWithMessageHistory(
         chain,
-        lambda session_id: history,
+        get_session_history,
         input_messages_key="question",
         history_messages_key="history",
     )
-    response = chain_with_history.invoke({"question": user_input}, {"configurable": {"session_id": socket_conn_id}})
+
+def chat_investment(user_input, socket_conn_id, callbacks=None, bypass_cache=None):
+    """Answer a chat message; ``bypass_cache`` overrides the session's cache setting when given."""
+    context = vector = None
+    if answer_cache is not None:
+        if bypass_cache is None:
+            bypass_cache = session_bypasses_cache(socket_conn_id)
+        # Cached answers are only shared between conversations at the same point
+        history = get_session_history(socket_conn_id)
+        recent = history.messages[-SEMANTIC_CACHE_HISTORY_MESSAGES:] if SEMANTIC_CACHE_HISTORY_MESSAGES else []
+        context = fingerprint(LLM_MODEL_ID, CHAT_PROMPT_VERSION,
+                              *(f"{message.type}:{message.content}" for message in recent))
+        answer, vector = answer_cache.lookup(user_input, context, bypass=bypass_cache)
+        if answer is not None:
+            history.add_messages([HumanMessage(content=user_input), AIMessage(content=answer)])
+            return markdown.markdown(answer)
+
+    config = {"configurable": {"session_id": socket_conn_id}}
+    if callbacks:
+        chain_with_history = chain_registry.get("investment_chat:streaming",
+                                                lambda: build_chat_chain(nova_chat_stream_llm))
+        config["callbacks"] = callbacks
+    else:
+        chain_with_history = chain_registry.get("investment_chat", build_chat_chain)
+    response = chain_with_history.invoke({"question": user_input}, config)
     logger.info(f"chat response: {response.content}")
-    return markdown.markdown(response.content)
\ No newline at end of file
+    if answer_cache is not None:
+        answer_cache.store(vector, user_input, context, response.content)
+    return markdown.markdown(response.content)
+
+def answer_cache_stats():
+    return answer_cache.stats() if answer_cache is not None else {}
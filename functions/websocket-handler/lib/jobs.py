@@ -0,0 +1,208 @@
+# jobs.py
+
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import boto3
+from aws_lambda_powertools import Logger, Tracer
+from botocore.exceptions import BotoCoreError, ClientError
+
+logger = Logger(service="jobs")
+tracer = Tracer(service="jobs")
+
+JOB_QUEUE_URL = os.environ.get("JOB_QUEUE_URL")
+JOBS_TBL_NM = os.environ.get("JOBS_TBL_NM")
+# Status items expire a day after their last update
+JOB_STATUS_TTL_SECONDS = int(os.environ.get("JOB_STATUS_TTL_SECONDS", str(24 * 60 * 60)))
+
+QUEUED = "QUEUED"
+RUNNING = "RUNNING"
+SUCCEEDED = "SUCCEEDED"
+FAILED = "FAILED"
+
+
+def new_job(body: Dict[str, Any], connection_id: str, domain_name: str, stage: str) -> Dict[str, Any]:
+    """Describe a websocket action so any worker can run it and reply to the connection."""
+    return {
+        "job_id": str(uuid.uuid4()),
+        "action": body.get("action"),
+        "ticker": body.get("tickr") or ",".join(body.get("tickrs") or []),
+        "body": body,
+        "connection_id": connection_id,
+        "domain_name": domain_name,
+        "stage": stage,
+        "enqueued_at": time.time(),
+    }
+
+
+class SqsJobQueue:
+    def __init__(self, queue_url: str):
+        self.queue_url = queue_url
+        self.client = boto3.client("sqs")
+
+    def enqueue(self, job: Dict[str, Any]):
+        self.client.send_message(QueueUrl=self.queue_url, MessageBody=json.dumps(job))
+
+
+class InMemoryJobQueue:
+    """Local stand-in for the SQS queue; ``run_pending`` plays the worker."""
+
+    def __init__(self):
+        self._jobs = queue.Queue()
+
+    def enqueue(self, job: Dict[str, Any]):
+        self._jobs.put(job)
+
+    def __len__(self):
+        return self._jobs.qsize()
+
+    def run_pending(self, worker: Callable[[Dict[str, Any]], Any], status_store) -> int:
+        """Process every queued job in order and return how many ran."""
+        processed = 0
+        while True:
+            try:
+                job = self._jobs.get_nowait()
+            except queue.Empty:
+                return processed
+            process_job(job, worker, status_store)
+            processed += 1
+
+
+class DynamoDBJobStatusStore:
+    """Job status items keyed on ``job_id`` with TTL attribute ``expires_at``."""
+
+    def __init__(self, table_name: str):
+        self.table = boto3.resource("dynamodb").Table(table_name)
+
+    def put(self, job: Dict[str, Any], status: str):
+        now = int(time.time())
+        self.table.put_item(Item={
+            "job_id": job["job_id"],
+            "status": status,
+            "action": job.get("action") or "",
+            "ticker": job.get("ticker") or "",
+            "connection_id": job["connection_id"],
+            "updated_at": now,
+            "expires_at": now + JOB_STATUS_TTL_SECONDS,
+        })
+
+    def update(self, job_id: str, status: str, error: Optional[str] = None):
+        now = int(time.time())
+        names = {"#status": "status"}
+        values = {":status": status, ":now": now, ":expires": now + JOB_STATUS_TTL_SECONDS}
+        expression = "SET #status = :status, updated_at = :now, expires_at = :expires"
+        if error is not None:
+            expression += ", job_error = :error"
+            values[":error"] = error[:1000]
+        self.table.update_item(
+            Key={"job_id": job_id},
+            UpdateExpression=expression,
+            ExpressionAttributeNames=names,
+            ExpressionAttributeValues=values,
+        )
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.table.get_item(Key={"job_id": job_id}).get("Item")
+
+
+class InMemoryJobStatusStore:
+    def __init__(self):
+        self._items: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def put(self, job: Dict[str, Any], status: str):
+        with self._lock:
+            self._items[job["job_id"]] = {
+                "job_id": job["job_id"],
+                "status": status,
+                "action": job.get("action"),
+                "ticker": job.get("ticker"),
+                "connection_id": job["connection_id"],
+                "updated_at": time.time(),
+            }
+
+    def update(self, job_id: str, status: str, error: Optional[str] = None):
+        with self._lock:
+            item = self._items.setdefault(job_id, {"job_id": job_id})
+            item.update(status=status, updated_at=time.time())
+            if error is not None:
+                item["job_error"] = error
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            item = self._items.get(job_id)
+            return dict(item) if item else None
+
+
+def get_job_queue():
+    """Return the configured queue; ``None`` means actions run inline.
+
+    ``JOB_QUEUE_URL=memory`` selects ``InMemoryJobQueue`` for local runs and tests.
+    """
+    if JOB_QUEUE_URL == "memory":
+        return InMemoryJobQueue()
+    return SqsJobQueue(JOB_QUEUE_URL) if JOB_QUEUE_URL else None
+
+
+def get_job_status_store():
+    return DynamoDBJobStatusStore(JOBS_TBL_NM) if JOBS_TBL_NM else InMemoryJobStatusStore()
+
+
+@tracer.capture_method
+def enqueue_job(job_queue, status_store, job: Dict[str, Any]) -> bool:
+    """Record the job as queued and send it to the worker. Returns False, with the job
+    marked failed, when it couldn't be queued."""
+    try:
+        # Recorded first so the worker never finds the job without a status
+        status_store.put(job, QUEUED)
+        job_queue.enqueue(job)
+    except (BotoCoreError, ClientError) as e:
+        logger.exception(f"Couldn't queue job {job['job_id']}: {e}")
+        _set_status(status_store, job["job_id"], FAILED, str(e))
+        return False
+    logger.info(f"Queued job {job['job_id']} ({job['action']}) for connection {job['connection_id']}")
+    return True
+
+
+@tracer.capture_method
+def process_job(job: Dict[str, Any], worker: Callable[[Dict[str, Any]], Any], status_store) -> bool:
+    """Run ``worker`` for the job, recording its status. Returns False when it failed."""
+    job_id = job["job_id"]
+    current = _get_status(status_store, job_id)
+    if current and current.get("status") == SUCCEEDED:
+        # Redelivered message; the connection already has its answer
+        logger.info(f"Skipping job {job_id}, already succeeded.")
+        return True
+
+    logger.info(f"Running job {job_id} ({job['action']}), "
+                f"queued for {time.time() - job.get('enqueued_at', time.time()):.1f}s")
+    _set_status(status_store, job_id, RUNNING)
+    try:
+        worker(job)
+    except Exception as e:
+        logger.exception(f"Job {job_id} failed: {e}")
+        _set_status(status_store, job_id, FAILED, str(e))
+        return False
+    _set_status(status_store, job_id, SUCCEEDED)
+    return True
+
+
+def _get_status(status_store, job_id: str):
+    try:
+        return status_store.get(job_id)
+    except ClientError as e:
+        logger.warning(f"Couldn't read status of job {job_id}: {e}")
+        return None
+
+
+def _set_status(status_store, job_id: str, status: str, error: Optional[str] = None):
+    # Status bookkeeping must never fail the job itself
+    try:
+        status_store.update(job_id, status, error)
+    except (BotoCoreError, ClientError) as e:
+        logger.warning(f"Couldn't update status of job {job_id} to {status}: {e}")
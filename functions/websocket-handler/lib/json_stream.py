@@ -0,0 +1,121 @@
+# json_stream.py
+
+import codecs
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+from aws_lambda_powertools import Logger
+
+logger = Logger(service="json_stream")
+
+
+class StreamingItemsParser:
+    """Incrementally scans streamed text for a JSON object with an array of items.
+
+    Bytes are fed as they arrive; each element of ``obj[key]`` is decoded and
+    passed to ``on_item`` as soon as its closing brace is seen. Text around the
+    object (agent preamble, code fences) is ignored, whatever its formatting.
+    Scanning is linear in the completion length.
+    """
+
+    def __init__(self, key: str = "news", on_item: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.key = key
+        self.on_item = on_item
+        self.items: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        self._reset()
+
+    def _reset(self):
+        self._root = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._last_string = None
+        self._current_key = None
+        self._in_items = False
+        self._saw_items = False
+        self._item_start = None
+
+    def feed(self, data: bytes) -> List[Dict[str, Any]]:
+        """Consume a chunk and return the items it completed."""
+        completed = []
+        for ch in self._decoder.decode(data):
+            if self.result is not None:
+                break
+            if self._depth == 0:
+                if ch == "{":
+                    self._root.append(ch)
+                    self._depth = 1
+                continue
+
+            pos = len(self._root)
+            self._root.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._last_string = "".join(self._root[self._string_start:pos + 1])
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = pos
+            elif ch == ":" and self._depth == 1:
+                self._current_key = json.loads(self._last_string) if self._last_string else None
+            elif ch == "," and self._depth == 1:
+                self._current_key = None
+            elif ch in "{[":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._current_key == self.key:
+                    self._in_items = True
+                    self._saw_items = True
+                elif ch == "{" and self._depth == 3 and self._in_items:
+                    self._item_start = pos
+            elif ch in "}]":
+                self._depth -= 1
+                if ch == "}" and self._depth == 2 and self._item_start is not None:
+                    self._emit("".join(self._root[self._item_start:pos + 1]), completed)
+                    self._item_start = None
+                elif ch == "]" and self._depth == 1:
+                    self._in_items = False
+                elif self._depth == 0:
+                    self._finish_root()
+        return completed
+
+    def _emit(self, text: str, completed: List[Dict[str, Any]]):
+        try:
+            item = json.loads(text)
+        except ValueError as e:
+            logger.warning(f"Skipping malformed {self.key} item: {e}")
+            return
+        self.items.append(item)
+        completed.append(item)
+        if self.on_item is not None:
+            self.on_item(item)
+
+    def _finish_root(self):
+        text = "".join(self._root)
+        try:
+            obj = json.loads(text)
+        except ValueError as e:
+            if self._saw_items:
+                logger.warning(f"Couldn't decode streamed JSON object: {e}")
+            obj = None
+        if isinstance(obj, dict) and self.key in obj:
+            self.result = obj
+        else:
+            # Some other object in the preamble; keep looking
+            self._reset()
+
+    def close(self) -> Dict[str, Any]:
+        """Return the complete object; raises ValueError when none was found."""
+        self.feed(self._decoder.decode(b"", final=True).encode("utf-8"))
+        if self.result is None:
+            raise ValueError(f"No JSON object with a '{self.key}' field in the completion")
+        return self.result
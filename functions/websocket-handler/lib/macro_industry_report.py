@@ -5,13 +5,15 @@ from typing import List, Dict, Any
 import boto3
 from aws_lambda_powertools import Logger, Tracer
 from langchain_aws import ChatBedrock
-from langchain_aws.retrievers import AmazonKnowledgeBasesRetriever
 from langchain_core.documents import Document
 from langchain_core.runnables import RunnableLambda
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
+from lib.chain_registry import chain_registry
 from lib.prompts.macro_industry_report_prompt import MacroIndustryReportPrompt
+from lib.retrieval_cache import CachedKnowledgeBasesRetriever
+from lib.token_budget import fit_documents, prompt_budget
 
 logger = Logger(service="macro_industry_report")
 tracer = Tracer(service="macro_industry_report")
@@ -22,8 +24,27 @@ AWS_REGION = os.environ["AWS_REGION"]
 
 bedrock_runtime = boto3.client("bedrock-runtime", region_name=AWS_REGION)
 
+retriever = CachedKnowledgeBasesRetriever(
+    knowledge_base_id=KB_ID,
+    retrieval_config={"vectorSearchConfiguration": {"numberOfResults": 6}},
+)
 
-def _format_context(docs: List[Document]) -> str:
+chat = ChatBedrock(
+    model_id=LLM_MODEL_ID,
+    client=bedrock_runtime,
+    model_kwargs={"temperature": 0.2, "top_p": 0.95, "max_tokens": 2048},
+    disable_streaming=True,
+)
+# Same model with token streaming, used when the client asked for a streamed answer
+chat_stream = chat.model_copy(update={"streaming": True})
+
+
+def build_report_chain(llm=chat):
+    return MacroIndustryReportPrompt | llm | JsonOutputParser()
+
+
+def _format_context(docs: List[Document], max_tokens: int = None) -> str:
+    """Join the retrieved documents in rank order, cut to ``max_tokens`` (the model's budget by default)."""
     parts = []
     for i, d in enumerate(docs, start=1):
         meta = d.metadata or {}
@@ -31,17 +52,13 @@ def _format_context(docs: List[Document]) -> str:
         src = meta.get("source") or meta.get("s3Uri") or meta.get("x-amz-bedrock-kb-source-uri") or ""
         header = f"[Doc {i}] {title} | {src}"
         parts.append(f"{header}\n{d.page_content}")
-    return "\n\n".join(parts)
+    return "\n\n".join(fit_documents(parts, max_tokens or prompt_budget(LLM_MODEL_ID)))
 
 
 @tracer.capture_method
-def generate_macro_industry_report(industry: str, region: str = "global", time_horizon: str = "next 12 months") -> Dict[str, Any]:
+def generate_macro_industry_report(industry: str, region: str = "global", time_horizon: str = "next 12 months",
+                                   callbacks=None) -> Dict[str, Any]:
     """Generates a macro industry report from Bedrock KB context."""
-    retriever = AmazonKnowledgeBasesRetriever(
-        knowledge_base_id=KB_ID,
-        retrieval_config={"vectorSearchConfiguration": {"numberOfResults": 6}},
-    )
-
     query = f"{industry} industry analysis {region} {time_horizon} key drivers policy regulation competitive landscape risks trends outlook"
     docs = retriever.get_relevant_documents(query)
 
@@ -63,15 +80,11 @@ def generate_macro_industry_report(industry: str, region: str = "global", time_h
 
     context = _format_context(docs)
 
-    chat = ChatBedrock(
-        model_id=LLM_MODEL_ID,
-        client=bedrock_runtime,
-        model_kwargs={"temperature": 0.2, "top_p": 0.95, "max_tokens": 2048},
-        disable_streaming=True,
-    )
-
     prompt = MacroIndustryReportPrompt
-    chain = prompt | chat | JsonOutputParser()
+    if callbacks:
+        chain = chain_registry.get("macro_industry_report:streaming", lambda: build_report_chain(chat_stream))
+    else:
+        chain = chain_registry.get("macro_industry_report", build_report_chain)
 
     try:
         result = chain.invoke({
@@ -79,7 +92,7 @@ def generate_macro_industry_report(industry: str, region: str = "global", time_h
             "region": region,
             "time_horizon": time_horizon,
             "context": context,
-        })
+        }, {"callbacks": callbacks} if callbacks else None)
     except Exception as e:
         logger.exception("Failed to parse JSON output: %s", e)
         # As a fallback, try raw invoke without parser and then best-effort JSON load
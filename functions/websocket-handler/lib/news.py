@@ -5,6 +5,7 @@ import uuid
 import boto3
 from aws_lambda_powertools import Logger, Tracer
 from botocore.config import Config
+from lib.json_stream import StreamingItemsParser
 
 LLM_MODEL_ID = os.environ["LLM_MODEL_ID"]
 
@@ -62,7 +63,7 @@ def generate_session_id():
     
 # Function to invoke the Bedrock agent
 @tracer.capture_method
-def invoke_agent(agent_id, agent_alias_id, session_id, prompt):
+def invoke_agent(agent_id, agent_alias_id, session_id, prompt, on_item=None):
     """
     Sends a prompt for the agent to process and respond to.
 
@@ -71,6 +72,7 @@ def invoke_agent(agent_id, agent_alias_id, session_id, prompt):
     :param session_id: The unique identifier of the session. Use the same value across requests
                        to continue the same conversation.
     :param prompt: The prompt that you want the agent to complete.
+    :param on_item: Optional callback given each news item as soon as it has been streamed.
     :return: Inference response from the model.
     """
     try:
@@ -84,12 +86,12 @@ def invoke_agent(agent_id, agent_alias_id, session_id, prompt):
         )
         
         event_stream = response['completion']
-        final_answer = ""
+        # Items are parsed out of the chunks as they arrive rather than after the whole answer
+        parser = StreamingItemsParser("news", on_item)
         try:
             for event in event_stream:
                 if 'chunk' in event:
-                    data = event['chunk']['bytes']
-                    final_answer = final_answer + data.decode('utf8')
+                    parser.feed(event['chunk']['bytes'])
                 elif 'trace' in event:
                     logger.info(json.dumps(event['trace'], indent=2))
                 else: 
@@ -97,11 +99,9 @@ def invoke_agent(agent_id, agent_alias_id, session_id, prompt):
         except Exception as e:
             raise Exception("unexpected event.",e)
         
-        pos = final_answer.index('{\n  \"news\":')
-        final_answer_json = final_answer[pos:]
-        logger.info(f"final_answer_json = {final_answer_json}")
-        decoder = json.JSONDecoder()
-        return decoder.decode(final_answer_json)
+        final_answer_json = parser.close()
+        logger.info(f"final_answer_json = {json.dumps(final_answer_json)}")
+        return final_answer_json
 
     except boto3.exceptions.Boto3Error as e:
         logger.exception(f"Couldn't invoke agent. {e}")
@@ -109,10 +109,10 @@ def invoke_agent(agent_id, agent_alias_id, session_id, prompt):
 
 # Function to fetch news and sentiment data
 @tracer.capture_method
-def fetch_news_and_sentiments(ticker):
+def fetch_news_and_sentiments(ticker, on_item=None):
     logger.info(f"fetching news and sentiment for {ticker}")
     session_id = generate_session_id()
     prompt = f"Provide the latest news and sentiment analysis for {ticker}, including the URL of each news article. Answer in JSON Format."
-    response = invoke_agent(agent_id, agent_alias_id, session_id, prompt)
+    response = invoke_agent(agent_id, agent_alias_id, session_id, prompt, on_item)
 
     return response
@@ -0,0 +1,89 @@
+# prefetch.py
+
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+from aws_lambda_powertools import Logger, Tracer
+from lib.tools.market_data import normalize_ticker
+
+logger = Logger(service="prefetch")
+tracer = Tracer(service="prefetch")
+
+PREFETCH_MAX_WORKERS = int(os.environ.get("PREFETCH_MAX_WORKERS", "8"))
+PREFETCH_TIMEOUT_SECONDS = float(os.environ.get("PREFETCH_TIMEOUT_SECONDS", "60"))
+
+# Module level so the worker threads are reused across warm invocations.
+_executor = ThreadPoolExecutor(max_workers=PREFETCH_MAX_WORKERS, thread_name_prefix="prefetch")
+
+_current_prefetch = contextvars.ContextVar("current_prefetch", default=None)
+
+
+class TickerPrefetch:
+    """In-flight tool results for a single ticker, fetched concurrently."""
+
+    def __init__(self, ticker: str, futures: Dict[str, Any]):
+        self.ticker = normalize_ticker(ticker)
+        self.futures = futures
+
+    def get(self, tool_name: str, tool_input: Any):
+        """Return (hit, value) when the tool call matches a prefetched fetch.
+
+        Waits for the fetch if it is still running. A failed fetch is a miss so
+        the caller can retry and surface the error itself.
+        """
+        future = self.futures.get(tool_name)
+        if future is None or not isinstance(tool_input, str) or normalize_ticker(tool_input) != self.ticker:
+            return False, None
+        try:
+            return True, future.result(timeout=PREFETCH_TIMEOUT_SECONDS)
+        except FutureTimeoutError:
+            logger.warning(f"Prefetch of {tool_name} for {self.ticker} timed out.")
+        except Exception as e:
+            logger.warning(f"Prefetch of {tool_name} for {self.ticker} failed: {e}")
+        return False, None
+
+    def results(self) -> Dict[str, Any]:
+        """Wait for every fetch and return the results by tool name; failures map to None."""
+        return {name: self.get(name, self.ticker)[1] for name in self.futures}
+
+
+@tracer.capture_method
+def start_prefetch(ticker: str, fetchers: Dict[str, Callable[[str], Any]]) -> TickerPrefetch:
+    """Fan all ``fetchers`` out on the shared thread pool for ``ticker``."""
+    logger.info(f"Prefetching {', '.join(fetchers)} for {ticker}")
+    futures = {name: _executor.submit(fetch, ticker) for name, fetch in fetchers.items()}
+    return TickerPrefetch(ticker, futures)
+
+
+@contextmanager
+def use_prefetch(prefetch: TickerPrefetch):
+    """Make ``prefetch`` visible to ``prefetchable`` tools called within the block."""
+    token = _current_prefetch.set(prefetch)
+    try:
+        yield prefetch
+    finally:
+        _current_prefetch.reset(token)
+
+
+def prefetchable(func):
+    """Serve a single-argument tool function from the active prefetch when possible.
+
+    Pool threads do not inherit the caller's context, so the fetches issued by
+    ``start_prefetch`` always fall through to ``func`` itself.
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        prefetch = _current_prefetch.get()
+        if prefetch is not None:
+            tool_input = args[0] if args else next(iter(kwargs.values()), None)
+            hit, value = prefetch.get(func.__name__, tool_input)
+            if hit:
+                logger.debug(f"{func.__name__} served from prefetch.")
+                return value
+        return func(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,13 @@
+class ChatHistoryPrompt:
+    summary_system_message = '''You maintain the running summary of a conversation between a user and an investment analysis assistant.
+    Merge the new messages into the summary so far. Keep tickers, figures, dates, the user's goals and preferences and any open questions.
+    Drop greetings and repetition. Reply with the updated summary only, in at most 200 words.'''
+
+    summary_user_message = '''Summary so far:
+    {summary}
+
+    New messages:
+    {messages}'''
+
+    messages = [("system", summary_system_message),
+                ("human", summary_user_message)]
@@ -2,6 +2,8 @@ from langchain_core.prompts import MessagesPlaceholder
 
 
 class FinancialAnalysisPrompt:
+    # Bump when the prompts change so cached analyses made with older prompts are not served
+    prompt_version = "1"
     system_message = '''You are a financial analyst tasked with analyzing Company's financial data. Your goal is to provide a comprehensive analysis of the data, identifying trends, issues, and significant insights. The data includes revenue, net income, costs, and other financial metrics for various quarters.
 
     **Processing Instructions.**
@@ -2,6 +2,8 @@ from langchain_core.prompts import MessagesPlaceholder
 
 
 class InvestmentAnalysisPrompt:
+    # Bump when the prompts change so cached analyses made with older prompts are not served
+    prompt_version = "1"
 
     fa_prompt = '''You are a financial analyst with detailed understanding of financial system, technical analysis of stock and investment methodologies. 
     You help your customers with financial advice based on facts and historical events, technical trends. 
@@ -77,4 +79,41 @@ class InvestmentAnalysisPrompt:
         MessagesPlaceholder("chat_history", optional=True),
         MessagesPlaceholder("agent_scratchpad"),
     ]
-        
+
+    report_prompt = '''You are a financial analyst with detailed understanding of financial system, technical analysis of stock and investment methodologies. 
+    You help your customers with financial advice based on facts and historical events, technical trends. 
+
+    **Processing Instructions.**
+    1. All the data available for the stock has already been collected and is provided below. Do not ask for more data.
+    2. Base every statement on the provided data. If a section has no data, say that there is not enough information.
+    3. For any price target use the price history to support the projection.
+    4. Each field of the report is a short markdown formatted string.
+
+    {format_instructions}
+    '''
+
+    report_message = '''Ticker: {ticker}
+
+    PRICE HISTORY (past 6 months)
+    {price_history}
+
+    INCOME STATEMENT
+    {income_statement}
+
+    CASH FLOW
+    {cash_flow}
+
+    ANALYST RECOMMENDATIONS
+    {recommendations}
+
+    LATEST NEWS
+    {latest_news}
+
+    KNOWLEDGE BASE
+    {knowledge}'''
+
+    # Single-call report over prefetched data, used by the fast path
+    report_messages = [
+        ("system", report_prompt),
+        ("human", report_message),
+    ]
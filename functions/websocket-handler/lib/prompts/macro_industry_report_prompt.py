@@ -3,7 +3,7 @@ from langchain_core.prompts import ChatPromptTemplate
 
 macro_industry_report_system = """
 You are a macro industry analyst. Using the provided context, produce a concise, executive-ready report in valid JSON matching this schema:
-{
+{{
   "industry": string,
   "region": string,
   "time_horizon": string,
@@ -16,9 +16,9 @@ You are a macro industry analyst. Using the provided context, produce a concise,
   "risks": [string],
   "outlook": string,
   "citations": [
-    {"title": string, "source": string}
+    {{"title": string, "source": string}}
   ]
-}
+}}
 
 Guidelines:
 - Base all claims on the context only. If information is missing, say "Insufficient context" for that section.
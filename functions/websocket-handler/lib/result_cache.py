@@ -0,0 +1,176 @@
+# result_cache.py
+
+import os
+import threading
+import time
+from typing import Any, Callable, Optional
+
+import boto3
+from aws_lambda_powertools import Logger, Tracer
+from botocore.exceptions import ClientError
+from lib.cache import CACHE_TBL_NM, TieredCache, default_l2_store
+
+logger = Logger(service="result_cache")
+tracer = Tracer(service="result_cache")
+
+# Results younger than FRESH are served as is; until FRESH + STALE they are served
+# immediately and then recomputed (stale-while-revalidate).
+RESULT_CACHE_FRESH_SECONDS = int(os.environ.get("RESULT_CACHE_FRESH_SECONDS", str(15 * 60)))
+RESULT_CACHE_STALE_SECONDS = int(os.environ.get("RESULT_CACHE_STALE_SECONDS", str(6 * 60 * 60)))
+# How long a computation may hold the single-flight lease and how long others wait on it
+SINGLE_FLIGHT_LEASE_SECONDS = int(os.environ.get("SINGLE_FLIGHT_LEASE_SECONDS", "300"))
+SINGLE_FLIGHT_WAIT_SECONDS = int(os.environ.get("SINGLE_FLIGHT_WAIT_SECONDS", "240"))
+SINGLE_FLIGHT_POLL_SECONDS = 0.5
+
+
+class SingleFlight:
+    """Non-blocking per-key lease: an in-process lock plus an optional DynamoDB lease.
+
+    The DynamoDB lease (a conditional put on the cache table) extends the lock
+    across Lambda containers; it expires on its own if the holder dies.
+    """
+
+    def __init__(self, table_name: Optional[str] = None, lease_seconds: int = SINGLE_FLIGHT_LEASE_SECONDS):
+        self.lease_seconds = lease_seconds
+        self.table = boto3.resource("dynamodb").Table(table_name) if table_name else None
+        self._held = set()
+        self._lock = threading.Lock()
+
+    def acquire(self, key: str) -> bool:
+        with self._lock:
+            if key in self._held:
+                return False
+            self._held.add(key)
+        if self.table is None:
+            return True
+        now = int(time.time())
+        try:
+            self.table.put_item(
+                Item={"cache_key": f"lock:{key}", "value": "null", "expires_at": now + self.lease_seconds},
+                ConditionExpression="attribute_not_exists(cache_key) OR expires_at < :now",
+                ExpressionAttributeValues={":now": now},
+            )
+            return True
+        except ClientError as e:
+            if e.response["Error"]["Code"] != "ConditionalCheckFailedException":
+                logger.warning(f"Couldn't take single-flight lease for {key}: {e}")
+            with self._lock:
+                self._held.discard(key)
+            return False
+
+    def release(self, key: str):
+        try:
+            if self.table is not None:
+                self.table.delete_item(Key={"cache_key": f"lock:{key}"})
+        except ClientError as e:
+            logger.warning(f"Couldn't release single-flight lease for {key}: {e}")
+        finally:
+            with self._lock:
+                self._held.discard(key)
+
+
+class ResultCache:
+    """Caches expensive results with stale-while-revalidate and single-flight computation."""
+
+    def __init__(self, cache: TieredCache, single_flight: SingleFlight,
+                 fresh_seconds: int = RESULT_CACHE_FRESH_SECONDS, stale_seconds: int = RESULT_CACHE_STALE_SECONDS):
+        self.cache = cache
+        self.single_flight = single_flight
+        self.fresh_seconds = fresh_seconds
+        self.stale_seconds = stale_seconds
+        self._counters = {"fresh_hits": 0, "stale_hits": 0, "computes": 0, "waits": 0, "wait_timeouts": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    def _get(self, key: str):
+        hit, entry = self.cache.get("result", key)
+        return entry if hit else None
+
+    def _is_fresh(self, entry) -> bool:
+        return time.time() - entry["created_at"] < self.fresh_seconds
+
+    def _compute(self, key: str, compute: Callable[[], Any], cacheable: Callable[[Any], bool]):
+        self._count("computes")
+        value = compute()
+        if cacheable(value):
+            self.cache.set("result", key, {"created_at": time.time(), "value": value},
+                           ttl=self.fresh_seconds + self.stale_seconds)
+        return value
+
+    def _wait(self, key: str):
+        """Wait for another computation of ``key`` to publish its result."""
+        self._count("waits")
+        deadline = time.monotonic() + SINGLE_FLIGHT_WAIT_SECONDS
+        while time.monotonic() < deadline:
+            time.sleep(SINGLE_FLIGHT_POLL_SECONDS)
+            entry = self._get(key)
+            if entry is not None and self._is_fresh(entry):
+                return entry
+            if self.single_flight.acquire(key):
+                # The other computation finished without a result or its lease expired
+                self.single_flight.release(key)
+                return None
+        self._count("wait_timeouts")
+        return None
+
+    @tracer.capture_method
+    def get_or_compute(self, key: str, compute: Callable[[], Any],
+                       deliver: Callable[[Any], None] = lambda value: None,
+                       cacheable: Callable[[Any], bool] = lambda value: True):
+        """Return the result for ``key``, passing it to ``deliver`` as early as possible.
+
+        A stale result is delivered first and then recomputed by whichever caller
+        holds the single-flight lease. On a miss, concurrent callers wait for the
+        lease holder's result instead of computing it again.
+        """
+        entry = self._get(key)
+        if entry is not None:
+            if self._is_fresh(entry):
+                self._count("fresh_hits")
+                deliver(entry["value"])
+                return entry["value"]
+            self._count("stale_hits")
+            deliver(entry["value"])
+            if self.single_flight.acquire(key):
+                try:
+                    logger.info(f"Revalidating stale result {key}")
+                    self._compute(key, compute, cacheable)
+                except Exception:
+                    logger.exception(f"Couldn't revalidate {key}")
+                finally:
+                    self.single_flight.release(key)
+            return entry["value"]
+
+        if not self.single_flight.acquire(key):
+            entry = self._wait(key)
+            if entry is not None:
+                deliver(entry["value"])
+                return entry["value"]
+            if not self.single_flight.acquire(key):
+                # Still contended after waiting; compute without the lease
+                value = self._compute(key, compute, cacheable)
+                deliver(value)
+                return value
+        try:
+            entry = self._get(key)
+            if entry is not None and self._is_fresh(entry):
+                value = entry["value"]
+            else:
+                value = self._compute(key, compute, cacheable)
+        finally:
+            self.single_flight.release(key)
+        deliver(value)
+        return value
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+
+result_cache = ResultCache(
+    cache=TieredCache(namespace="result", ttls={}, l1_max_entries=256, l2=default_l2_store()),
+    single_flight=SingleFlight(CACHE_TBL_NM),
+)
@@ -0,0 +1,107 @@
+# retrieval_cache.py
+
+import copy
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List
+
+import boto3
+from aws_lambda_powertools import Logger, Tracer
+from botocore.exceptions import ClientError
+from langchain_aws.retrievers import AmazonKnowledgeBasesRetriever
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from lib.cache import TieredCache, default_l2_store
+
+logger = Logger(service="retrieval_cache")
+tracer = Tracer(service="retrieval_cache")
+
+RETRIEVAL_CACHE_TTL_SECONDS = int(os.environ.get("RETRIEVAL_CACHE_TTL_SECONDS", str(60 * 60)))
+# SSM parameter bumped by the KB ingestion handler after every completed ingestion job.
+# It is part of every cache key, so a new generation invalidates all cached retrievals.
+KB_GENERATION_PARAM = os.environ.get("KB_GENERATION_PARAM")
+KB_GENERATION_CHECK_SECONDS = int(os.environ.get("KB_GENERATION_CHECK_SECONDS", "60"))
+
+retrieval_cache = TieredCache(
+    namespace="kb-retrieval",
+    ttls={"retrieve": RETRIEVAL_CACHE_TTL_SECONDS},
+    l1_max_entries=int(os.environ.get("RETRIEVAL_CACHE_MAX_ENTRIES", "256")),
+    l2=default_l2_store(),
+)
+
+_PUNCTUATION = re.compile(r"[^\w\s.&$%-]+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case, punctuation and spacing differences map to the same cache entry."""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", query.lower())).strip(" .")
+
+
+class KbGeneration:
+    """Current knowledge base generation, re-read from SSM at most once per interval."""
+
+    def __init__(self, parameter_name: str = None, check_seconds: int = KB_GENERATION_CHECK_SECONDS):
+        self.parameter_name = parameter_name
+        self.check_seconds = check_seconds
+        self.client = boto3.client("ssm") if parameter_name else None
+        self._value = "0"
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get(self) -> str:
+        if self.client is None:
+            return self._value
+        with self._lock:
+            if time.monotonic() - self._checked_at >= self.check_seconds:
+                try:
+                    value = self.client.get_parameter(Name=self.parameter_name)["Parameter"]["Value"]
+                    if value != self._value:
+                        logger.info(f"Knowledge base generation is now {value}")
+                    self._value = value
+                except ClientError as e:
+                    logger.warning(f"Couldn't read KB generation {self.parameter_name}: {e}")
+                self._checked_at = time.monotonic()
+            return self._value
+
+
+kb_generation = KbGeneration(KB_GENERATION_PARAM)
+
+
+@tracer.capture_method
+def cached_retrieve(request: Dict[str, Any], retrieve: Callable[[Dict[str, Any]], List[Dict[str, Any]]]):
+    """Serve a bedrock-agent-runtime ``retrieve`` request from the retrieval cache.
+
+    ``retrieve`` is called with the request on a miss and returns its
+    ``retrievalResults``. The query text is normalized before keying. Callers get
+    their own copy since langchain's document conversion consumes the results.
+    """
+    query = request["retrievalQuery"]["text"]
+    keyed = {**request, "retrievalQuery": {**request["retrievalQuery"], "text": normalize_query(query)}}
+    digest = hashlib.sha256(json.dumps(keyed, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    key = f"{request['knowledgeBaseId']}:{kb_generation.get()}:{digest}"
+    return copy.deepcopy(retrieval_cache.get_or_load("retrieve", key, lambda: retrieve(request)))
+
+
+class CachedKnowledgeBasesRetriever(AmazonKnowledgeBasesRetriever):
+    """``AmazonKnowledgeBasesRetriever`` that reads through the shared retrieval cache."""
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> List[Document]:
+        results = cached_retrieve(
+            self._get_retrieve_request(query),
+            lambda request: self.client.retrieve(**request)["retrievalResults"])
+        documents = AmazonKnowledgeBasesRetriever._retrieval_results_to_documents(results)
+        return self._filter_by_score_confidence(docs=documents)
+
+
+def retrieval_cache_stats():
+    return retrieval_cache.stats()
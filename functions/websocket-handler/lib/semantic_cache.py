@@ -0,0 +1,128 @@
+# semantic_cache.py
+
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from aws_lambda_powertools import Logger, Tracer
+
+logger = Logger(service="semantic_cache")
+tracer = Tracer(service="semantic_cache")
+
+# Questions at least this similar (cosine) with the same context fingerprint share an answer
+SEMANTIC_CACHE_THRESHOLD = float(os.environ.get("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_TTL_SECONDS = int(os.environ.get("SEMANTIC_CACHE_TTL_SECONDS", str(60 * 60)))
+SEMANTIC_CACHE_MAX_ENTRIES = int(os.environ.get("SEMANTIC_CACHE_MAX_ENTRIES", "2048"))
+
+
+def fingerprint(*parts: Any) -> str:
+    """Stable digest of the context an answer depends on (model, prompt, history, ...)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(str(part).encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:32]
+
+
+class InMemoryVectorIndex:
+    """Unit vectors in one NumPy matrix, searched with a single matrix-vector product.
+
+    Entries expire after their TTL; when full, the oldest entry is replaced.
+    """
+
+    def __init__(self, max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._vectors: Optional[np.ndarray] = None
+        self._payloads: List[Any] = []
+        self._expires_at = np.zeros(0)
+        self._next = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _unit(vector: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def add(self, vector: Sequence[float], payload: Any, ttl: float):
+        unit = self._unit(vector)
+        with self._lock:
+            if self._vectors is None:
+                self._vectors = np.zeros((self.max_entries, unit.shape[0]), dtype=np.float32)
+                self._payloads = [None] * self.max_entries
+                self._expires_at = np.zeros(self.max_entries)
+            slot = self._next % self.max_entries
+            self._vectors[slot] = unit
+            self._payloads[slot] = payload
+            self._expires_at[slot] = time.time() + ttl
+            self._next += 1
+
+    def search(self, vector: Sequence[float], threshold: float,
+               accept: Callable[[Any], bool] = lambda payload: True) -> Tuple[float, Any]:
+        """Return ``(score, payload)`` of the most similar live entry above ``threshold``."""
+        with self._lock:
+            if self._vectors is None:
+                return 0.0, None
+            scores = self._vectors @ self._unit(vector)
+            scores[self._expires_at <= time.time()] = -1.0
+            candidates = np.flatnonzero(scores >= threshold)
+            for slot in candidates[np.argsort(scores[candidates])[::-1]]:
+                if accept(self._payloads[slot]):
+                    return float(scores[slot]), self._payloads[slot]
+        return 0.0, None
+
+    def __len__(self):
+        return min(self._next, self.max_entries)
+
+
+class SemanticAnswerCache:
+    """Answers keyed by question embedding and an exact context fingerprint."""
+
+    def __init__(self, embed: Callable[[str], List[float]], index: InMemoryVectorIndex = None,
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl: float = SEMANTIC_CACHE_TTL_SECONDS):
+        self.embed = embed
+        self.index = index if index is not None else InMemoryVectorIndex()
+        self.threshold = threshold
+        self.ttl = ttl
+        self._counters = {"hits": 0, "misses": 0, "bypassed": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    def _count(self, counter: str):
+        with self._lock:
+            self._counters[counter] += 1
+
+    @tracer.capture_method
+    def lookup(self, question: str, context: str, bypass: bool = False):
+        """Return ``(answer, vector)``; ``answer`` is None on a miss.
+
+        ``vector`` is the question's embedding, to pass to ``store`` afterwards.
+        With ``bypass`` nothing is served but the fresh answer can still be stored.
+        """
+        try:
+            vector = self.embed(question)
+        except Exception as e:
+            logger.warning(f"Couldn't embed question for the semantic cache: {e}")
+            self._count("errors")
+            return None, None
+        if bypass:
+            self._count("bypassed")
+            return None, vector
+        score, payload = self.index.search(vector, self.threshold, lambda entry: entry["context"] == context)
+        if payload is None:
+            self._count("misses")
+            return None, vector
+        self._count("hits")
+        logger.info(f"Semantic cache hit ({score:.3f}) for {question!r}, matched {payload['question']!r}")
+        return payload["answer"], vector
+
+    def store(self, vector, question: str, context: str, answer: Any):
+        if vector is None:
+            return
+        self.index.add(vector, {"question": question, "context": context, "answer": answer}, self.ttl)
+
+    def stats(self):
+        with self._lock:
+            return {**self._counters, "entries": len(self.index)}
@@ -0,0 +1,162 @@
+# streaming.py
+
+import json
+import threading
+import time
+from typing import Any, Callable, Dict
+
+from aws_lambda_powertools import Logger
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = Logger(service="streaming")
+
+# Tokens are coalesced so each post_to_connection carries a useful amount of text.
+STREAM_MIN_CHARS = 48
+STREAM_MAX_INTERVAL_SECONDS = 0.25
+
+
+class WebSocketStreamer:
+    """Coalesces model tokens into numbered frames for a websocket connection.
+
+    Frames look like ``{"type": "chunk", "action": ..., "seq": n, "data": text}``;
+    the stream ends with a single ``{"type": "done", ...}`` frame.
+    """
+
+    def __init__(self, send: Callable[[Dict[str, Any]], None], action: str,
+                 min_chars: int = STREAM_MIN_CHARS, max_interval: float = STREAM_MAX_INTERVAL_SECONDS):
+        self.send = send
+        self.action = action
+        self.min_chars = min_chars
+        self.max_interval = max_interval
+        self.seq = 0
+        self.first_token_at = None
+        self.started_at = time.monotonic()
+        self._buffer = []
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def write(self, text: str):
+        if not text:
+            return
+        with self._lock:
+            if self.first_token_at is None:
+                self.first_token_at = time.monotonic()
+                logger.info(f"{self.action} time to first token: "
+                            f"{(self.first_token_at - self.started_at) * 1000:.0f} ms")
+            self._buffer.append(text)
+            self._buffered_chars += len(text)
+            if (self._buffered_chars >= self.min_chars
+                    or time.monotonic() - self._last_flush >= self.max_interval):
+                self._flush()
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        data = "".join(self._buffer)
+        self._buffer = []
+        self._buffered_chars = 0
+        self._last_flush = time.monotonic()
+        self.send({"type": "chunk", "action": self.action, "seq": self.seq, "data": data})
+        self.seq += 1
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def send_item(self, item: Dict[str, Any]):
+        """Send a structured result (e.g. one news article) as its own chunk frame."""
+        with self._lock:
+            self._flush()
+            self.send({"type": "chunk", "action": self.action, "seq": self.seq, "data": item})
+            self.seq += 1
+
+    def done(self):
+        """Flush what is left and send the closing frame."""
+        with self._lock:
+            self._flush()
+            self.send({"type": "done", "action": self.action, "seq": self.seq})
+            self.seq += 1
+
+
+class TokenStreamHandler(BaseCallbackHandler):
+    """Forwards every generated token to a ``WebSocketStreamer``."""
+
+    def __init__(self, streamer: WebSocketStreamer):
+        self.streamer = streamer
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        self.streamer.write(token)
+
+
+class FinalAnswerStreamHandler(BaseCallbackHandler):
+    """Forwards only the ``action_input`` of a JSON chat agent's "Final Answer".
+
+    Each agent turn is a JSON blob; tool calls are swallowed and the final answer
+    string is decoded incrementally so escapes reach the client as plain text.
+    """
+
+    _ESCAPES = {'"': '"', "\\": "\\", "/": "/", "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t"}
+
+    def __init__(self, streamer: WebSocketStreamer):
+        self.streamer = streamer
+        self._reset()
+
+    def _reset(self):
+        self._text = []
+        self._seen = ""
+        self._in_answer = False
+        self._finished = False
+        self._escape = ""
+
+    def on_llm_start(self, *args: Any, **kwargs: Any) -> None:
+        self._reset()
+
+    def on_chat_model_start(self, *args: Any, **kwargs: Any) -> None:
+        self._reset()
+
+    def on_llm_new_token(self, token: str, **kwargs: Any) -> None:
+        if self._finished:
+            return
+        if not self._in_answer:
+            self._text.append(token)
+            self._seen = "".join(self._text)
+            if '"Final Answer"' not in self._seen:
+                return
+            marker = self._seen.find('"action_input"', self._seen.find('"Final Answer"'))
+            if marker < 0:
+                return
+            colon = self._seen.find(":", marker + len('"action_input"'))
+            if colon < 0:
+                return
+            quote = self._seen.find('"', colon + 1)
+            if quote < 0:
+                return
+            self._in_answer = True
+            token = self._seen[quote + 1:]
+        self.streamer.write(self._decode(token))
+
+    def _decode(self, token: str) -> str:
+        out = []
+        for ch in token:
+            if self._finished:
+                break
+            if self._escape:
+                self._escape += ch
+                if self._escape[1] == "u":
+                    if len(self._escape) == 6:
+                        try:
+                            out.append(json.loads(f'"{self._escape}"'))
+                        except ValueError:
+                            pass
+                        self._escape = ""
+                else:
+                    out.append(self._ESCAPES.get(ch, ch))
+                    self._escape = ""
+            elif ch == "\\":
+                self._escape = ch
+            elif ch == '"':
+                self._finished = True
+            else:
+                out.append(ch)
+        return "".join(out)
@@ -0,0 +1,49 @@
+# ticker_batch.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Iterator, List, Tuple
+
+from aws_lambda_powertools import Logger, Tracer
+from lib.tools.market_data import normalize_ticker, prime_price_histories
+
+logger = Logger(service="ticker_batch")
+tracer = Tracer(service="ticker_batch")
+
+# Per-ticker model calls run at most this many at a time; their data fetches share the
+# prefetch pool (see lib/prefetch.py).
+TICKER_BATCH_MAX_CONCURRENCY = int(os.environ.get("TICKER_BATCH_MAX_CONCURRENCY", "4"))
+TICKER_BATCH_MAX_TICKERS = int(os.environ.get("TICKER_BATCH_MAX_TICKERS", "25"))
+
+# Separate from the prefetch pool: analyses block on prefetch futures.
+_executor = ThreadPoolExecutor(max_workers=TICKER_BATCH_MAX_CONCURRENCY, thread_name_prefix="ticker-batch")
+
+
+def batch_tickers(tickers) -> List[str]:
+    """Normalized tickers in request order without duplicates."""
+    return list(dict.fromkeys(normalize_ticker(ticker) for ticker in tickers if ticker and ticker.strip()))
+
+
+@tracer.capture_method
+def run_ticker_batch(tickers: List[str], analyze: Callable[[str], Any]) -> Iterator[Tuple[str, Any, Exception]]:
+    """Run ``analyze`` for every ticker and yield ``(ticker, result, error)`` as each finishes.
+
+    Price histories are primed with one batched download first. An analysis that
+    raises or returns the ``(error, None)`` tuple of a failed agent run is yielded
+    as an error.
+    """
+    prime_price_histories(tickers)
+    futures = {_executor.submit(analyze, ticker): ticker for ticker in tickers}
+    for future in as_completed(futures):
+        ticker = futures[future]
+        try:
+            result = future.result()
+        except Exception as e:
+            logger.exception(f"Analysis of {ticker} failed: {e}")
+            yield ticker, None, e
+            continue
+        if isinstance(result, tuple):
+            logger.error(f"Analysis of {ticker} failed: {result[0]}")
+            yield ticker, None, RuntimeError(result[0])
+            continue
+        yield ticker, result, None
@@ -0,0 +1,140 @@
+# token_budget.py
+
+import os
+from typing import Dict, List
+
+from aws_lambda_powertools import Logger
+from langchain_core.messages import BaseMessage, trim_messages
+from lib.tools.compact_encoding import CHARS_PER_TOKEN, compact_observation, estimate_tokens
+
+logger = Logger(service="token_budget")
+
+# Prompt token budgets per model family, well below the context windows: prompt size is
+# what drives latency. PROMPT_TOKEN_BUDGET overrides the budget for every model.
+MODEL_PROMPT_BUDGETS = {
+    "amazon.nova-micro": 24000,
+    "amazon.nova-lite": 32000,
+    "amazon.nova-pro": 32000,
+    "anthropic.claude": 32000,
+}
+DEFAULT_PROMPT_BUDGET = 16000
+PROMPT_TOKEN_BUDGET = os.environ.get("PROMPT_TOKEN_BUDGET")
+# Left for instructions, format instructions and the question around the budgeted parts
+PROMPT_RESERVED_TOKENS = int(os.environ.get("PROMPT_RESERVED_TOKENS", "3000"))
+# A document or observation is dropped rather than cut below this size
+MIN_PART_TOKENS = 64
+
+TRUNCATION_MARKER = "\n[... truncated to fit the prompt budget ...]"
+
+
+def prompt_budget(model_id: str) -> int:
+    """Tokens available for the variable parts of a prompt sent to ``model_id``."""
+    if PROMPT_TOKEN_BUDGET:
+        budget = int(PROMPT_TOKEN_BUDGET)
+    else:
+        budget = next((tokens for family, tokens in MODEL_PROMPT_BUDGETS.items() if family in model_id),
+                      DEFAULT_PROMPT_BUDGET)
+    return max(budget - PROMPT_RESERVED_TOKENS, MIN_PART_TOKENS)
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """Cut ``text`` to about ``max_tokens``, preferring a line boundary."""
+    if estimate_tokens(text) <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return TRUNCATION_MARKER.strip()
+    limit = max(max_tokens * CHARS_PER_TOKEN - len(TRUNCATION_MARKER), 0)
+    cut = text.rfind("\n", int(limit * 0.8), limit)
+    return text[:cut if cut > 0 else limit] + TRUNCATION_MARKER
+
+
+def fit_parts(parts: Dict[str, str], priorities: Dict[str, int], budget: int) -> Dict[str, str]:
+    """Trim prompt parts, lowest priority first, until they fit ``budget`` tokens.
+
+    Parts without a priority are never trimmed.
+    """
+    sizes = {name: estimate_tokens(text) for name, text in parts.items()}
+    over = sum(sizes.values()) - budget
+    if over <= 0:
+        return parts
+
+    fitted = dict(parts)
+    for name in sorted((name for name in parts if name in priorities), key=priorities.get):
+        if over <= 0:
+            break
+        keep = sizes[name] - over
+        fitted[name] = truncate_to_tokens(parts[name], keep if keep >= MIN_PART_TOKENS else 0)
+        over -= sizes[name] - estimate_tokens(fitted[name])
+        logger.info(f"Trimmed prompt part {name} from ~{sizes[name]} to ~{estimate_tokens(fitted[name])} tokens")
+    return fitted
+
+
+def fit_documents(texts: List[str], budget: int) -> List[str]:
+    """Keep ranked documents in order until ``budget`` is spent, cutting the last one."""
+    fitted = []
+    remaining = budget
+    for text in texts:
+        tokens = estimate_tokens(text)
+        if tokens <= remaining:
+            fitted.append(text)
+            remaining -= tokens
+            continue
+        if remaining >= MIN_PART_TOKENS:
+            fitted.append(truncate_to_tokens(text, remaining))
+        logger.info(f"Fitted {len(texts)} documents into {budget} tokens, kept {len(fitted)}")
+        break
+    return fitted
+
+
+def _compact(tool: str, observation):
+    if isinstance(observation, str):
+        return compact_observation(tool, observation)
+    if isinstance(observation, dict):
+        # e.g. {"income_statement": "<DataFrame JSON>"}
+        return {key: compact_observation(tool, value) if isinstance(value, str) else value
+                for key, value in observation.items()}
+    return observation
+
+
+def budget_intermediate_steps(budget: int):
+    """``AgentExecutor.trim_intermediate_steps`` callable that caps the scratchpad's tool output.
+
+    DataFrame observations are compacted, then the newest are kept whole and
+    older ones cut first. Only the prompt is affected, the executor still
+    returns the full steps.
+    """
+    def trim(intermediate_steps):
+        # DataFrame observations go to the model in the compact encoding
+        intermediate_steps = [(action, _compact(action.tool, observation))
+                              for action, observation in intermediate_steps]
+        sizes = [estimate_tokens(str(observation)) for _, observation in intermediate_steps]
+        over = sum(sizes) - budget
+        if over <= 0:
+            return intermediate_steps
+        trimmed = list(intermediate_steps)
+        for i, (action, observation) in enumerate(intermediate_steps):
+            if over <= 0:
+                break
+            keep = sizes[i] - over
+            shortened = truncate_to_tokens(str(observation), keep if keep >= MIN_PART_TOKENS else 0)
+            trimmed[i] = (action, shortened)
+            over -= sizes[i] - estimate_tokens(shortened)
+        logger.info(f"Trimmed agent scratchpad from ~{sum(sizes)} to ~{budget} tokens")
+        return trimmed
+    return trim
+
+
+def count_message_tokens(messages: List[BaseMessage]) -> int:
+    return sum(estimate_tokens(str(message.content)) for message in messages)
+
+
+def history_trimmer(budget: int):
+    """Runnable keeping the most recent chat history that fits ``budget`` tokens."""
+    return trim_messages(
+        max_tokens=budget,
+        strategy="last",
+        token_counter=count_message_tokens,
+        start_on="human",
+        include_system=True,  # the rolling summary of older turns
+        allow_partial=False,
+    )
@@ -0,0 +1,143 @@
+# compact_encoding.py
+
+import json
+import math
+import os
+import threading
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import pandas as pd
+from aws_lambda_powertools import Logger
+
+logger = Logger(service="compact_encoding")
+
+# Rough size of a model token in characters; good enough to compare encodings.
+CHARS_PER_TOKEN = 4
+FLOAT_SIGNIFICANT_DIGITS = int(os.environ.get("TOOL_OUTPUT_FLOAT_DIGITS", "6"))
+# Price histories longer than this are downsampled evenly (0 keeps every row)
+PRICE_HISTORY_MAX_ROWS = int(os.environ.get("PRICE_HISTORY_MAX_ROWS", "0"))
+
+_stats: Dict[str, Dict[str, int]] = {}
+_stats_lock = threading.Lock()
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN) if text else 0
+
+
+def _label(value: Any) -> str:
+    if isinstance(value, pd.Timestamp):
+        return value.strftime("%Y-%m-%d") if value == value.normalize() else value.isoformat()
+    return str(value)
+
+
+def _number(value: Any, digits: int):
+    if value is None or (isinstance(value, float) and math.isnan(value)) or value is pd.NaT:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return _label(value)
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float):
+        if math.isinf(value):
+            return None
+        value = float(f"{value:.{digits}g}")
+        return int(value) if value.is_integer() and abs(value) < 2 ** 53 else value
+    return value
+
+
+def downsample(frame: pd.DataFrame, max_rows: int) -> pd.DataFrame:
+    """Keep ``max_rows`` evenly spaced rows, always including the first and last."""
+    if not max_rows or len(frame) <= max_rows:
+        return frame
+    if max_rows == 1:
+        return frame.iloc[[-1]]
+    step = (len(frame) - 1) / (max_rows - 1)
+    return frame.iloc[sorted({round(i * step) for i in range(max_rows)})]
+
+
+def encode_frame(frame: pd.DataFrame, digits: int = FLOAT_SIGNIFICANT_DIGITS, max_rows: Optional[int] = None,
+                 drop_zero_columns: bool = False) -> str:
+    """Encode a DataFrame as ``{"index": [...], "columns": {name: [values]}}``.
+
+    Rows and columns without any value are dropped, floats are rounded to
+    ``digits`` significant digits and dates lose their zero time component.
+    """
+    frame = frame.dropna(how="all").dropna(axis=1, how="all")
+    if drop_zero_columns and not frame.empty:
+        numeric = frame.select_dtypes("number")
+        frame = frame.drop(columns=[name for name in numeric.columns if not numeric[name].fillna(0).any()])
+    if max_rows:
+        frame = downsample(frame, max_rows)
+    encoded = {
+        "index": [_label(value) for value in frame.index],
+        "columns": {_label(name): [_number(value, digits) for value in frame[name].tolist()]
+                    for name in frame.columns},
+    }
+    return json.dumps(encoded, separators=(",", ":"))
+
+
+def record_encoding(dataset: str, original: str, compact: str):
+    """Account for the bytes and estimated tokens an encoding saved."""
+    before, after = len(original.encode("utf-8")), len(compact.encode("utf-8"))
+    tokens_before, tokens_after = estimate_tokens(original), estimate_tokens(compact)
+    with _stats_lock:
+        counters = _stats.setdefault(dataset, {"calls": 0, "bytes_before": 0, "bytes_after": 0,
+                                               "tokens_before": 0, "tokens_after": 0})
+        counters["calls"] += 1
+        counters["bytes_before"] += before
+        counters["bytes_after"] += after
+        counters["tokens_before"] += tokens_before
+        counters["tokens_after"] += tokens_after
+    logger.info(f"{dataset}: {before} B / ~{tokens_before} tokens -> {after} B / ~{tokens_after} tokens")
+
+
+# Per-tool encoding options for observations that are DataFrame JSON
+OBSERVATION_OPTIONS = {
+    "get_price_history": {"max_rows": PRICE_HISTORY_MAX_ROWS, "drop_zero_columns": True},
+}
+
+
+def _frame_from_json(text: str) -> Optional[pd.DataFrame]:
+    """Rebuild a DataFrame from ``to_json`` output in "table" or "columns" orient."""
+    try:
+        data = json.loads(text)
+    except (TypeError, ValueError):
+        return None
+    if isinstance(data, dict) and "schema" in data and isinstance(data.get("data"), list):
+        frame = pd.DataFrame(data["data"])
+        primary_key = data["schema"].get("primaryKey") or []
+        return frame.set_index(primary_key[0]) if primary_key and primary_key[0] in frame else frame
+    if isinstance(data, dict) and data and all(isinstance(column, dict) for column in data.values()):
+        return pd.DataFrame(data)
+    return None
+
+
+@lru_cache(maxsize=128)
+def _encode_observation(dataset: str, text: str) -> Optional[str]:
+    # Pure, so repeated observations on a warm container skip the parsing
+    frame = _frame_from_json(text)
+    if frame is None:
+        return None
+    compact = encode_frame(frame, **OBSERVATION_OPTIONS.get(dataset, {}))
+    return compact if len(compact) < len(text) else None
+
+
+def compact_observation(dataset: str, text: str) -> str:
+    """Compact encoding of a tool's DataFrame JSON, for prompts only.
+
+    Tool outputs keep their ``to_json`` shape because the UI parses them; this
+    is applied where they are put in front of the model. Anything that isn't
+    DataFrame JSON is returned unchanged.
+    """
+    compact = _encode_observation(dataset, text)
+    if compact is None:
+        return text
+    record_encoding(dataset, text, compact)
+    return compact
+
+
+def encoding_stats() -> Dict[str, Dict[str, int]]:
+    with _stats_lock:
+        return {dataset: dict(counters) for dataset, counters in _stats.items()}
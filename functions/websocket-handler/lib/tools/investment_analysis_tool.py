@@ -8,6 +8,9 @@ from aws_lambda_powertools import Logger, Tracer
 from langchain.callbacks.manager import (AsyncCallbackManagerForToolRun,
                                          CallbackManagerForToolRun)
 from langchain.tools import BaseTool, tool
+from lib.prefetch import prefetchable
+from lib.retrieval_cache import cached_retrieve
+from lib.tools.market_data import cached_market_data, get_ticker
 from pydantic import BaseModel, Field
 
 logger = Logger(service="InvestmentAnalysisTool")
@@ -35,6 +38,7 @@ class InvestmentAnalysisOutput(BaseModel):
     future_projection: str = Field(description="Future projection of the company.")
 
 @tool
+@prefetchable
 @tracer.capture_method
 def search_knowledge_base(query: str) -> str:
     """
@@ -44,19 +48,20 @@ def search_knowledge_base(query: str) -> str:
     """
     logger.debug("search_knowledge_base - Retrieving context from knowledge base.")
     # retreive api for fetching only the relevant context.
-    relevant_documents = bedrock_agent_runtime_client.retrieve(
-        retrievalQuery= {
-            'text': query
-        },
-        knowledgeBaseId=KB_ID,
-        retrievalConfiguration= {
-            'vectorSearchConfiguration': {
-                'numberOfResults': 5 # will fetch top 10 documents which matches closely with the query.
+    # Same (normalized) queries within the TTL are served from the retrieval cache
+    relevant_documents = cached_retrieve(
+        {
+            'retrievalQuery': {
+                'text': query
+            },
+            'knowledgeBaseId': KB_ID,
+            'retrievalConfiguration': {
+                'vectorSearchConfiguration': {
+                    'numberOfResults': 5 # will fetch top 10 documents which matches closely with the query.
+                }
             }
-        }
-    )
-
-    relevant_documents = relevant_documents.get("retrievalResults")
+        },
+        lambda request: bedrock_agent_runtime_client.retrieve(**request).get("retrievalResults"))
     logger.info("Relevant documents = %s", relevant_documents)
     response = {}
     news_lst = []
@@ -70,15 +75,16 @@ def search_knowledge_base(query: str) -> str:
     return response
 
 @tool
+@prefetchable
 @tracer.capture_method
 def get_price_history(ticker: str) -> str:
     """This tool will provide the stock prices of past 6 months.
     The input parameter is stock ticker prices and output will be
     history of end of the day price for past 6 months"""
     logger.debug("get_price_history - Retrieving stock price history.")
-    stock = yf.Ticker(ticker)
-    stock_data = stock.history(period="6mo").to_json(date_format="iso", orient="table")
-    return stock_data
+    return cached_market_data(
+        "price_history", ticker,
+        lambda: get_ticker(ticker).history(period="6mo").to_json(date_format="iso", orient="table"))
 
 @tool
 @tracer.capture_method
@@ -87,53 +93,50 @@ def get_company_info(ticker: str) -> str:
     The input parameter is stock ticker prices and output will be
     company information"""
     logger.debug("get_company_info - Retrieving company information.")
-    stock = yf.Ticker(ticker)
-    company_info = stock.info.to_json()
-    return company_info
+    return cached_market_data("company_info", ticker, lambda: json.dumps(get_ticker(ticker).info))
 
 @tool
+@prefetchable
 @tracer.capture_method
 def get_recommendations(ticker: str) -> str:
     """This tool will provide the company recommendations.
     The input parameter is stock ticker prices and output will be
     company recommendations"""
     logger.debug("get_recommendations - Retrieving company recommendations.")
-    stock = yf.Ticker(ticker)
-    recommendations = stock.recommendations.to_json()
-    return recommendations
+    return cached_market_data("recommendations", ticker, lambda: get_ticker(ticker).recommendations.to_json())
 
 @tool
+@prefetchable
 @tracer.capture_method
 def get_income_statement(ticker: str) -> str:
     """This tool will provide the annual income statement of the company.
     The input parameter is stock ticker prices and output will be
     annual income statement of the company"""
     logger.debug("get_income_statement - Retrieving income statement.")
-    stock = yf.Ticker(ticker)
-    income_statement = stock.quarterly_income_stmt
-    if income_statement.empty:
+
+    def _load():
+        income_statement = get_ticker(ticker).quarterly_income_stmt
+        # Empty statements return None so they are not cached.
+        return None if income_statement.empty else income_statement.to_json()
+
+    income_statement_str = cached_market_data("quarterly_income_statement", ticker, _load)
+    if income_statement_str is None:
         logger.exception(f"No income statement data available for {ticker}")
         return f"No income statement data available for {ticker}."
-
-    # logger.info("Type of the statement = ", type(income_statement))
-    income_statement_str = income_statement.to_json()
-    logger.info("Income statement = ", income_statement)
-    # logger.info("Type of the statement after conversion = ", type(income_statement_str))
-    #return income_statement_str
     return income_statement_str
 
 @tool
+@prefetchable
 @tracer.capture_method
 def get_balance_sheet(ticker: str) -> str:
     """This tool will provide the annual balance sheet of the company.
     The input parameter is stock ticker prices and output will be
     annual balance sheet of the company"""
     logger.debug("get_balance_sheet - Retrieving balance sheet.")
-    stock = yf.Ticker(ticker)
-    balance_sheet = stock.balance_sheet.to_json()
-    return balance_sheet
+    return cached_market_data("balance_sheet", ticker, lambda: get_ticker(ticker).balance_sheet.to_json())
 
 @tool
+@prefetchable
 @tracer.capture_method
 def get_cash_flow(ticker: str) -> str:
     """This tool will provide the annual cash flow of the company.
@@ -141,11 +144,10 @@ def get_cash_flow(ticker: str) -> str:
     annual cash flow of the company"""
 
     logger.debug("get_cash_flow - Retrieving cash flow.")
-    stock = yf.Ticker(ticker)
-    cash_flow = stock.cashflow.to_json()
-    return cash_flow
+    return cached_market_data("cash_flow", ticker, lambda: get_ticker(ticker).cashflow.to_json())
 
 @tool
+@prefetchable
 @tracer.capture_method
 def get_latest_news(ticker: str) -> str:
     """This tool will provide the latest news about the company.
@@ -153,8 +155,7 @@ def get_latest_news(ticker: str) -> str:
     latest news about the company"""
 
     logger.debug("get_latest_news - Retrieving latest news.")
-    stock = yf.Ticker(ticker)
-    return json.dumps(stock.news)
+    return cached_market_data("latest_news", ticker, lambda: json.dumps(get_ticker(ticker).news))
 
 
 # Define the custom income statement fetching tool
@@ -0,0 +1,92 @@
+import json
+import os
+
+import yfinance as yf
+from aws_lambda_powertools import Logger, Tracer
+from lib.cache import TieredCache, default_l2_store
+
+logger = Logger(service="market_data")
+tracer = Tracer(service="market_data")
+
+# TTL in seconds per dataset. Quotes move constantly, statements change at most daily.
+MARKET_DATA_TTLS = {
+    "quote": 60,
+    "close": 24 * 60 * 60,
+    "price_history": 15 * 60,
+    "latest_news": 10 * 60,
+    "recommendations": 6 * 60 * 60,
+    "company_info": 24 * 60 * 60,
+    "income_statement": 24 * 60 * 60,
+    "quarterly_income_statement": 24 * 60 * 60,
+    "balance_sheet": 24 * 60 * 60,
+    "cash_flow": 24 * 60 * 60,
+}
+# Overrides, e.g. MARKET_DATA_TTLS='{"quote": 30}'
+MARKET_DATA_TTLS.update(json.loads(os.environ.get("MARKET_DATA_TTLS", "{}")))
+
+# Bumped whenever a cached value's format changes, so L2 entries in the old format are never served
+MARKET_DATA_KEY_VERSION = "v2"
+
+market_data_cache = TieredCache(
+    namespace="market-data",
+    ttls=MARKET_DATA_TTLS,
+    l1_max_entries=int(os.environ.get("MARKET_DATA_CACHE_MAX_ENTRIES", "1024")),
+    l2=default_l2_store(),
+)
+
+
+def normalize_ticker(ticker: str) -> str:
+    return ticker.strip().strip("'\"").upper()
+
+
+def get_ticker(ticker: str) -> yf.Ticker:
+    return yf.Ticker(normalize_ticker(ticker))
+
+
+def market_data_key(ticker: str, key_suffix: str = "") -> str:
+    key = normalize_ticker(ticker)
+    if key_suffix:
+        key = f"{key}:{key_suffix}"
+    return f"{key}:{MARKET_DATA_KEY_VERSION}"
+
+
+@tracer.capture_method
+def cached_market_data(dataset: str, ticker: str, loader, key_suffix: str = ""):
+    """Serve ``dataset`` for ``ticker`` from the market data cache, calling ``loader`` on a miss."""
+    return market_data_cache.get_or_load(dataset, market_data_key(ticker, key_suffix), loader)
+
+
+@tracer.capture_method
+def prime_price_histories(tickers, period: str = "6mo") -> int:
+    """Load the price history of every uncached ticker with one batched ``yf.download``.
+
+    Seeds the "price_history" entries ``get_price_history`` reads, so a watchlist
+    costs one round trip instead of one per ticker. Returns how many were primed.
+    """
+    missing = [ticker for ticker in dict.fromkeys(map(normalize_ticker, tickers))
+               if not market_data_cache.contains("price_history", market_data_key(ticker))]
+    if len(missing) < 2:
+        return 0
+    try:
+        frames = yf.download(missing, period=period, group_by="ticker", auto_adjust=True,
+                             actions=True, threads=True, progress=False)
+    except Exception as e:
+        logger.warning(f"Batched price history download failed, falling back per ticker: {e}")
+        return 0
+
+    primed = 0
+    for ticker in missing:
+        if ticker not in frames.columns.get_level_values(0):
+            continue
+        history = frames[ticker].dropna(how="all")
+        if history.empty:
+            continue
+        market_data_cache.set("price_history", market_data_key(ticker),
+                              history.to_json(date_format="iso", orient="table"))
+        primed += 1
+    logger.info(f"Primed price history for {primed} of {len(missing)} tickers in one download")
+    return primed
+
+
+def market_data_cache_stats():
+    return market_data_cache.stats()
@@ -1,10 +1,10 @@
 from typing import Optional, Type, Union
 
-import yfinance as yf
 from aws_lambda_powertools import Logger, Tracer
 from langchain.callbacks.manager import (AsyncCallbackManagerForToolRun,
                                          CallbackManagerForToolRun)
 from langchain.tools import BaseTool
+from lib.tools.market_data import cached_market_data, get_ticker
 from pydantic import BaseModel, Field
 
 logger = Logger(service="stock_income_statement_tool")
@@ -18,14 +18,16 @@ class IncomeStatementInput(BaseModel):
 @tracer.capture_method
 def _fetch_income_statement(ticker: str) -> str:
     try:
-        stock = yf.Ticker(ticker)
-        #income_statement = stock.financials  # Fetch only the annual financials
-        income_statement = stock.quarterly_incomestmt
-        if income_statement.empty:
+        def _load():
+            #income_statement = stock.financials  # Fetch only the annual financials
+            income_statement = get_ticker(ticker).quarterly_incomestmt
+            # Convert the Dataframe to a JSON format; empty statements are not cached
+            return None if income_statement.empty else income_statement.to_json(date_format="iso")
+
+        income_statement_str = cached_market_data("quarterly_income_statement", ticker, _load, key_suffix="iso")
+        if income_statement_str is None:
             return f"No income statement data available for {ticker}."
 
-        # Convert the Dataframe to a JSON format
-        income_statement_str = income_statement.to_json(date_format="iso")
         response = {'income_statement': income_statement_str}
         return response
     
@@ -1,17 +1,21 @@
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
 from typing import Optional, Type, Union
+from zoneinfo import ZoneInfo
 
-import pandas_market_calendars as mcal
-import yfinance as yf
 from aws_lambda_powertools import Logger, Tracer
 from langchain.callbacks.manager import (AsyncCallbackManagerForToolRun,
                                          CallbackManagerForToolRun)
 from langchain.tools import BaseTool
+from lib.tools.market_data import cached_market_data, get_ticker
+from lib.tools.trading_calendar import get_trading_calendar
 from pydantic import BaseModel, Field
 
 logger = Logger(service="stock_price_tool")
 tracer = Tracer(service="stock_price_tool")
 
+# A session's closing price is final a little after the 16:00 bell in New York
+MARKET_CLOSE_SETTLED = time(16, 30)
+
 # Define the input schema for the tool
 class StockPriceInput(BaseModel):
     ticker: str = Field(description="The stock ticker symbol to fetch the price for.")
@@ -20,26 +24,34 @@ class StockPriceInput(BaseModel):
 # Function to check if a date is a trading day
 @tracer.capture_method
 def is_trading_day(date: datetime) -> bool:
-    nyse = mcal.get_calendar('NYSE')
-    schedule = nyse.schedule(start_date=date.strftime('%Y-%m-%d'), end_date=date.strftime('%Y-%m-%d'))
-    return not schedule.empty
+    return get_trading_calendar().is_trading_day(date)
 
 # Function to get the nearest previous trading day if the given date is not a trading day
 @tracer.capture_method
 def get_previous_trading_day(date: datetime) -> datetime:
-    nyse = mcal.get_calendar('NYSE')
-    schedule = nyse.schedule(start_date=(date - timedelta(days=30)).strftime('%Y-%m-%d'), end_date=date.strftime('%Y-%m-%d'))
-    previous_trading_days = schedule[schedule.index < date]
-    if not previous_trading_days.empty:
-        return previous_trading_days.index[-1]
+    previous_trading_day = get_trading_calendar().previous_trading_day(date)
+    if previous_trading_day is not None:
+        return datetime(previous_trading_day.year, previous_trading_day.month, previous_trading_day.day)
     return date
 
+# Function to get the current trading session's date in New York, or the last one before it
+@tracer.capture_method
+def get_latest_trading_day(now: Optional[datetime] = None) -> str:
+    today = now or datetime.now(ZoneInfo("America/New_York"))
+    return get_trading_calendar().latest_trading_day(today).strftime('%Y-%m-%d')
+
+# Cache dataset for a day's closing price; while that session is still trading the
+# price is a live quote and gets the quote TTL instead of being kept for a day
+def _close_dataset(date: str, now: Optional[datetime] = None) -> str:
+    now = now or datetime.now(ZoneInfo("America/New_York"))
+    if date == now.strftime('%Y-%m-%d') and now.time() < MARKET_CLOSE_SETTLED:
+        return "quote"
+    return "close"
+
 # Function to fetch stock price using yfinance
 @tracer.capture_method
 def _fetch_stock_price(ticker: str, date: Optional[str] = None) -> str:
     try:
-        stock = yf.Ticker(ticker)
-    
         if date:
             # Parse the provided date
             try:
@@ -63,20 +75,27 @@ def _fetch_stock_price(ticker: str, date: Optional[str] = None) -> str:
             # Fetch historical data for the specified date or the nearest previous trading day
             start_date = query_date.strftime('%Y-%m-%d')
             end_date = (query_date + timedelta(days=1)).strftime('%Y-%m-%d')
-            history = stock.history(start=start_date, end=end_date)
-            
-            if history.empty:
+
+            def _load_close():
+                history = get_ticker(ticker).history(start=start_date, end=end_date)
+                # Get the closing price on the specified date
+                return None if history.empty else float(history['Close'].iloc[0])
+
+            price = cached_market_data(_close_dataset(start_date), ticker, _load_close, key_suffix=start_date)
+            if price is None:
                 return f"No trading data available for {ticker} on {start_date}. This could be due to a market holiday or incorrect date."
 
-            price = history['Close'].iloc[0]  # Get the closing price on the specified date
             return f"{fallback_message} The closing price of {ticker} on {query_date.strftime('%Y-%m-%d')} was ${price:.2f}"
         else:
             # Fetch the current price
-            history = stock.history(period="1d")
-            if history.empty:
+            def _load_quote():
+                history = get_ticker(ticker).history(period="1d")
+                return None if history.empty else float(history['Close'].iloc[-1])
+
+            price = cached_market_data("quote", ticker, _load_quote)
+            if price is None:
                 return f"No trading data available for {ticker} on the current date."
-            
-            price = history['Close'].iloc[-1]
+
             return f"The current price of {ticker} is ${price:.2f}"
             
     except Exception as e:
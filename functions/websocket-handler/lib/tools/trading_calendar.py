@@ -0,0 +1,149 @@
+# trading_calendar.py
+
+import base64
+import json
+import os
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime, timedelta
+from typing import Optional, Union
+
+from aws_lambda_powertools import Logger
+
+logger = Logger(service="trading_calendar")
+
+CALENDAR_NAME = "NYSE"
+DEFAULT_START = date(1990, 1, 1)
+DEFAULT_END = date(2040, 12, 31)
+# Shipped with the function; regenerate with `python -m lib.tools.trading_calendar`
+TRADING_CALENDAR_FILE = os.environ.get(
+    "TRADING_CALENDAR_FILE", os.path.join(os.path.dirname(__file__), "data", "nyse_trading_days.json"))
+
+DateLike = Union[date, datetime, str]
+
+
+def _to_date(value: DateLike) -> date:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _mcal_trading_days(start: date, end: date):
+    # Slow path: only used to build the index or for dates outside of it
+    import pandas_market_calendars as mcal
+    days = mcal.get_calendar(CALENDAR_NAME).valid_days(start_date=start.isoformat(), end_date=end.isoformat())
+    return [day.date() for day in days]
+
+
+class TradingCalendar:
+    """Trading days between ``start`` and ``end`` as a bitmap plus a sorted ordinal array.
+
+    ``is_trading_day`` is a bit test; previous/latest day and range counts are
+    bisections over the ordinals. Dates outside the index fall back to
+    pandas_market_calendars.
+    """
+
+    def __init__(self, start: date, end: date, bitmap: bytes):
+        self.start = start
+        self.end = end
+        self.bitmap = bytes(bitmap)
+        base = start.toordinal()
+        self.ordinals = array("i", (base + offset for offset in range((end - start).days + 1)
+                                    if self.bitmap[offset >> 3] & (1 << (offset & 7))))
+
+    @classmethod
+    def from_days(cls, days, start: date, end: date) -> "TradingCalendar":
+        bitmap = bytearray(((end - start).days >> 3) + 1)
+        for day in days:
+            offset = (day - start).days
+            if 0 <= offset <= (end - start).days:
+                bitmap[offset >> 3] |= 1 << (offset & 7)
+        return cls(start, end, bytes(bitmap))
+
+    @classmethod
+    def build(cls, start: date = DEFAULT_START, end: date = DEFAULT_END) -> "TradingCalendar":
+        return cls.from_days(_mcal_trading_days(start, end), start, end)
+
+    @classmethod
+    def load(cls, path: str) -> "TradingCalendar":
+        with open(path) as f:
+            data = json.load(f)
+        return cls(date.fromisoformat(data["start"]), date.fromisoformat(data["end"]),
+                   base64.b64decode(data["bitmap"]))
+
+    def save(self, path: str):
+        with open(path, "w") as f:
+            json.dump({
+                "calendar": CALENDAR_NAME,
+                "start": self.start.isoformat(),
+                "end": self.end.isoformat(),
+                "bitmap": base64.b64encode(self.bitmap).decode("ascii"),
+            }, f)
+            f.write("\n")
+
+    def _covers(self, day: date) -> bool:
+        return self.start <= day <= self.end
+
+    def is_trading_day(self, value: DateLike) -> bool:
+        day = _to_date(value)
+        if not self._covers(day):
+            return bool(_mcal_trading_days(day, day))
+        offset = (day - self.start).days
+        return bool(self.bitmap[offset >> 3] & (1 << (offset & 7)))
+
+    def previous_trading_day(self, value: DateLike) -> Optional[date]:
+        """The last trading day strictly before ``value``."""
+        day = _to_date(value)
+        if not self._covers(day):
+            days = _mcal_trading_days(day - timedelta(days=30), day - timedelta(days=1))
+            return days[-1] if days else None
+        index = bisect_left(self.ordinals, day.toordinal())
+        return date.fromordinal(self.ordinals[index - 1]) if index else None
+
+    def latest_trading_day(self, value: DateLike) -> Optional[date]:
+        """``value`` itself when it is a trading day, otherwise the previous one."""
+        day = _to_date(value)
+        return day if self.is_trading_day(day) else self.previous_trading_day(day)
+
+    def trading_days_between(self, start: DateLike, end: DateLike) -> int:
+        """Number of trading days from ``start`` to ``end``, both inclusive."""
+        first, last = _to_date(start), _to_date(end)
+        if first > last:
+            return 0
+        if not (self._covers(first) and self._covers(last)):
+            return len(_mcal_trading_days(first, last))
+        return bisect_right(self.ordinals, last.toordinal()) - bisect_left(self.ordinals, first.toordinal())
+
+
+_calendar = None
+_calendar_lock = threading.Lock()
+
+
+def get_trading_calendar() -> TradingCalendar:
+    """The NYSE calendar, loaded from the shipped data file or built once per container."""
+    global _calendar
+    if _calendar is None:
+        with _calendar_lock:
+            if _calendar is None:
+                try:
+                    _calendar = TradingCalendar.load(TRADING_CALENDAR_FILE)
+                except (OSError, ValueError, KeyError) as e:
+                    logger.warning(f"Couldn't load trading calendar from {TRADING_CALENDAR_FILE} ({e}), building it")
+                    _calendar = TradingCalendar.build()
+    return _calendar
+
+
+if __name__ == "__main__":
+    import argparse
+
+    ap = argparse.ArgumentParser(description="Build the NYSE trading-day index")
+    ap.add_argument("--write", default=TRADING_CALENDAR_FILE)
+    ap.add_argument("--start", default=DEFAULT_START.isoformat())
+    ap.add_argument("--end", default=DEFAULT_END.isoformat())
+    args = ap.parse_args()
+    calendar = TradingCalendar.build(date.fromisoformat(args.start), date.fromisoformat(args.end))
+    calendar.save(args.write)
+    print(f"Wrote {len(calendar.ordinals)} trading days to {args.write}")
@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The handler imports its modules as ``lib.<name>`` from the function root
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -0,0 +1,24 @@
+from lib.cache import FileCacheStore, TieredCache
+
+
+def test_l2_hit_keeps_its_remaining_lifetime_in_l1(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("lib.cache.time.time", lambda: now[0])
+    l2 = FileCacheStore(str(tmp_path))
+    TieredCache("test", {"quote": 3600}, l2=l2).set("quote", "AMZN", 181.5, ttl=60)
+
+    cache = TieredCache("test", {"quote": 3600}, l2=l2)
+    now[0] += 50
+    assert cache.get("quote", "AMZN") == (True, 181.5)
+    now[0] += 20
+    # Expired in L1 as well as in L2, though the dataset TTL is an hour
+    assert cache.get("quote", "AMZN") == (False, None)
+    assert cache.stats()["quote"] == {"l1_hits": 0, "l2_hits": 1, "misses": 1, "errors": 0}
+
+
+def test_contains_is_not_counted(tmp_path):
+    cache = TieredCache("test", {"price_history": 900}, l2=FileCacheStore(str(tmp_path)))
+    assert not cache.contains("price_history", "AMZN")
+    cache.set("price_history", "AMZN", "{}")
+    assert cache.contains("price_history", "AMZN")
+    assert cache.stats() == {}
@@ -0,0 +1,57 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_aws
+
+
+@pytest.fixture
+def chat(monkeypatch):
+    from lib import investment_chat
+
+    with mock_aws():
+        dynamodb = boto3.resource("dynamodb")
+        table = dynamodb.create_table(
+            TableName="connections", BillingMode="PAY_PER_REQUEST",
+            KeySchema=[{"AttributeName": "connection_id", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "connection_id", "AttributeType": "S"}])
+        table.put_item(Item={"connection_id": "conn-1"})
+        monkeypatch.setattr(investment_chat, "connections_table", table)
+        yield investment_chat
+
+
+class FakeHistory:
+    messages = []
+
+    def add_messages(self, messages):
+        pass
+
+
+class FakeAnswerCache:
+    def __init__(self):
+        self.bypassed = []
+
+    def lookup(self, question, context, bypass=False):
+        self.bypassed.append(bypass)
+        return "cached answer", None
+
+
+def test_bypass_is_kept_for_the_session(chat, monkeypatch):
+    answer_cache = FakeAnswerCache()
+    monkeypatch.setattr(chat, "answer_cache", answer_cache)
+    monkeypatch.setattr(chat, "get_session_history", lambda session_id: FakeHistory())
+
+    assert not chat.session_bypasses_cache("conn-1")
+    chat.chat_investment("What is AMZN trading at?", "conn-1")
+    chat.set_session_cache_bypass("conn-1", True)
+    assert chat.session_bypasses_cache("conn-1")
+    chat.chat_investment("What is AMZN trading at?", "conn-1")
+    # The per-message flag still overrides the session
+    chat.chat_investment("What is AMZN trading at?", "conn-1", bypass_cache=False)
+
+    assert answer_cache.bypassed == [False, True, False]
+
+
+def test_unknown_connection_is_not_created(chat):
+    with pytest.raises(ClientError):
+        chat.set_session_cache_bypass("conn-gone", True)
+    assert not chat.session_bypasses_cache("conn-gone")
@@ -0,0 +1,57 @@
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from langchain_core.messages import AIMessage, HumanMessage, messages_to_dict
+from moto import mock_aws
+
+from lib import chat_history
+from lib.chat_history import WindowedChatMessageHistory
+
+
+@pytest.fixture
+def table():
+    with mock_aws():
+        yield boto3.resource("dynamodb").create_table(
+            TableName="chat", BillingMode="PAY_PER_REQUEST",
+            KeySchema=[{"AttributeName": "SessionId", "KeyType": "HASH"}],
+            AttributeDefinitions=[{"AttributeName": "SessionId", "AttributeType": "S"}])
+
+
+def history(session_id="conn-1"):
+    return WindowedChatMessageHistory("chat", session_id, lambda summary, messages: "summary",
+                                      write_behind=False)
+
+
+def test_legacy_item_is_read_and_migrated(table):
+    legacy = [HumanMessage(content="What is AMZN?"), AIMessage(content="A retailer.")]
+    table.put_item(Item={"SessionId": "conn-1", "History": messages_to_dict(legacy)})
+
+    chat = history()
+    assert [message.content for message in chat.messages] == ["What is AMZN?", "A retailer."]
+    chat.add_messages([HumanMessage(content="And MSFT?"), AIMessage(content="Software.")])
+
+    item = table.get_item(Key={"SessionId": "conn-1"})["Item"]
+    assert "History" not in item and item["Version"] == 1
+    assert [message.content for message in history().messages] == [
+        "What is AMZN?", "A retailer.", "And MSFT?", "Software."]
+
+
+def test_failed_flush_is_retried_by_the_next_flush(table, monkeypatch):
+    chat = chat_history.get_chat_history("chat", "conn-2", lambda summary, messages: "summary")
+    chat.add_messages([HumanMessage(content="Hi"), AIMessage(content="Hello")])
+
+    put_item = chat.table.put_item
+
+    def unavailable(**kwargs):
+        raise ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "PutItem")
+
+    monkeypatch.setattr(chat.table, "put_item", unavailable)
+    failed = chat_history.chat_history_stats()["failed"]
+    chat_history.flush_chat_histories()
+    assert chat_history.chat_history_stats()["failed"] == failed + 1
+    assert "Item" not in table.get_item(Key={"SessionId": "conn-2"})
+
+    monkeypatch.setattr(chat.table, "put_item", put_item)
+    chat_history.flush_chat_histories()
+    assert chat_history.chat_history_stats()["pending_sessions"] == 0
+    assert [message.content for message in history("conn-2").messages] == ["Hi", "Hello"]
@@ -0,0 +1,82 @@
+import json
+
+import pytest
+from lib.jobs import FAILED, QUEUED, RUNNING, SUCCEEDED, InMemoryJobQueue, InMemoryJobStatusStore, process_job
+
+
+class Context:
+    function_name = "websocket-handler"
+    memory_limit_in_mb = 128
+    invoked_function_arn = "arn:aws:lambda:us-east-1:123456789012:function:websocket-handler"
+    aws_request_id = "request-id"
+
+
+@pytest.fixture
+def frames():
+    return []
+
+
+@pytest.fixture
+def handler(monkeypatch, frames):
+    import index
+
+    monkeypatch.setattr(index, "job_queue", InMemoryJobQueue())
+    monkeypatch.setattr(index, "job_status_store", InMemoryJobStatusStore())
+    monkeypatch.setattr(index, "send_response", lambda domain, stage, connection_id, frame: frames.append(frame))
+    return index
+
+
+def send(index, body):
+    event = {"requestContext": {"routeKey": "$default", "connectionId": "conn-1",
+                                "domainName": "example.com", "stage": "prod"},
+             "body": json.dumps(body)}
+    return index.handler(event, Context())
+
+
+def test_dispatched_job_runs_through_the_queue(handler, frames, monkeypatch):
+    seen = []
+
+    def process_action(body, connection_id, domain_name, stage, acknowledge_request=True):
+        [job_id] = handler.job_status_store._items
+        seen.append((body["tickr"], handler.job_status_store.get(job_id)["status"], acknowledge_request))
+
+    monkeypatch.setattr(handler, "process_action", process_action)
+    response = send(handler, {"action": "getInvestmentAnalysis", "tickr": "AMZN"})
+
+    assert response == {"statusCode": 200, "body": "QUEUED"}
+    assert frames == [handler.REQ_RECVD_RESPONSE]
+    [job] = list(handler.job_queue._jobs.queue)
+    assert handler.job_status_store.get(job["job_id"])["status"] == QUEUED
+
+    assert handler.job_queue.run_pending(handler.run_job, handler.job_status_store) == 1
+    assert seen == [("AMZN", RUNNING, False)]
+    assert handler.job_status_store.get(job["job_id"])["status"] == SUCCEEDED
+
+    # A redelivered message for a finished job is skipped
+    assert process_job(job, handler.run_job, handler.job_status_store)
+    assert len(seen) == 1
+
+
+def test_failed_job_is_recorded(handler, monkeypatch):
+    def process_action(*args, **kwargs):
+        raise RuntimeError("model throttled")
+
+    monkeypatch.setattr(handler, "process_action", process_action)
+    send(handler, {"action": "getFinancialData", "tickr": "MSFT"})
+    [job] = list(handler.job_queue._jobs.queue)
+
+    handler.job_queue.run_pending(handler.run_job, handler.job_status_store)
+    status = handler.job_status_store.get(job["job_id"])
+    assert (status["status"], status["job_error"]) == (FAILED, "model throttled")
+
+
+def test_worker_drops_malformed_messages(handler, monkeypatch):
+    ran = []
+    monkeypatch.setattr(handler, "process_action", lambda *args, **kwargs: ran.append(args[0]))
+    job = {"job_id": "job-1", "action": "chat", "body": {"action": "chat"}, "connection_id": "conn-1",
+           "domain_name": "example.com", "stage": "prod"}
+    event = {"Records": [{"messageId": "m1", "body": "{truncated"},
+                         {"messageId": "m2", "body": json.dumps(job)}]}
+
+    assert handler.job_handler(event, Context()) == {"batchItemFailures": []}
+    assert ran == [{"action": "chat"}]
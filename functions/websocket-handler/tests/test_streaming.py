@@ -0,0 +1,32 @@
+from lib.streaming import FinalAnswerStreamHandler
+
+
+class FakeStreamer:
+    def __init__(self):
+        self.text = []
+
+    def write(self, text):
+        self.text.append(text)
+
+
+def stream(tokens):
+    streamer = FakeStreamer()
+    handler = FinalAnswerStreamHandler(streamer)
+    handler.on_llm_start()
+    for token in tokens:
+        handler.on_llm_new_token(token)
+    return "".join(streamer.text)
+
+
+def test_streams_only_the_final_answer():
+    blob = '{"action": "Final Answer", "action_input": "Buy \\"ACME\\"\\nnow"}'
+    assert stream([blob[i:i + 3] for i in range(0, len(blob), 3)]) == 'Buy "ACME"\nnow'
+
+
+def test_waits_for_the_colon_after_action_input():
+    tokens = ['{"action": "Final Answer", ', '"action_input"', ' ', ': "Hold', ' steady"}']
+    assert stream(tokens) == "Hold steady"
+
+
+def test_tool_calls_are_not_streamed():
+    assert stream(['{"action": "get_price_history", ', '"action_input": "AMZN"}']) == ""
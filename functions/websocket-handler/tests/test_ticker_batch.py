@@ -0,0 +1,29 @@
+from lib import ticker_batch
+
+
+def test_failed_analysis_is_yielded_as_an_error(monkeypatch):
+    monkeypatch.setattr(ticker_batch, "prime_price_histories", lambda tickers: None)
+
+    def analyze(ticker):
+        if ticker == "FAIL":
+            return "Throttled by Bedrock", None
+        return {"ticker": ticker}
+
+    results = {ticker: (result, error) for ticker, result, error
+               in ticker_batch.run_ticker_batch(["AMZN", "FAIL", "MSFT"], analyze)}
+
+    assert results["AMZN"] == ({"ticker": "AMZN"}, None)
+    assert results["MSFT"] == ({"ticker": "MSFT"}, None)
+    result, error = results["FAIL"]
+    assert result is None
+    assert str(error) == "Throttled by Bedrock"
+
+
+def test_raised_exception_is_yielded_as_an_error(monkeypatch):
+    monkeypatch.setattr(ticker_batch, "prime_price_histories", lambda tickers: None)
+
+    def analyze(ticker):
+        raise ValueError(f"no data for {ticker}")
+
+    [(ticker, result, error)] = ticker_batch.run_ticker_batch(["NOPE"], analyze)
+    assert (ticker, result, str(error)) == ("NOPE", None, "no data for NOPE")
@@ -12,11 +12,14 @@ import * as cognito from "aws-cdk-lib/aws-cognito";
 import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
 import * as iam from "aws-cdk-lib/aws-iam";
 import * as lambda from "aws-cdk-lib/aws-lambda";
+import * as lambdaEventSources from "aws-cdk-lib/aws-lambda-event-sources";
 import * as lambdaNodeJs from "aws-cdk-lib/aws-lambda-nodejs";
 import * as logs from "aws-cdk-lib/aws-logs";
 import * as s3 from "aws-cdk-lib/aws-s3";
 import * as s3deploy from "aws-cdk-lib/aws-s3-deployment";
 import * as secretsmanager from "aws-cdk-lib/aws-secretsmanager";
+import * as sqs from "aws-cdk-lib/aws-sqs";
+import * as ssm from "aws-cdk-lib/aws-ssm";
 import { Construct } from "constructs";
 
 import { NagSuppressions } from "cdk-nag";
@@ -36,6 +39,7 @@ export interface FrontEndStackProps extends cdk.StackProps {
   powerToolsLayer: lambda.ILayerVersion;
   bedrockGuardrailsId: string;
   bedrockGuardrailsVersion: string;
+  kbGenerationParameterName: string;
 }
 
 export class FrontEndStack extends cdk.Stack {
@@ -290,6 +294,16 @@ export class FrontEndStack extends cdk.Stack {
     });
 
 
+    // Keys-only index over connection shards, used to page through connections for broadcasts.
+    webSocketsAuthTable.addGlobalSecondaryIndex({
+      indexName: "ConnectionsByShard",
+      partitionKey: {
+        name: "conn_shard",
+        type: dynamodb.AttributeType.STRING,
+      },
+      projectionType: dynamodb.ProjectionType.KEYS_ONLY,
+    });
+
     const webSocketAuthorizer = new WebSocketLambdaAuthorizer('WebSocketLambdaAuthorizer', websocketAuthHandler, {
       identitySource: ['route.request.querystring.idToken'],
     });
@@ -307,6 +321,72 @@ export class FrontEndStack extends cdk.Stack {
       },      
     });
 
+    const cacheTable = new dynamodb.Table(this, "CacheTbl", {
+      partitionKey: {
+        name: "cache_key",
+        type: dynamodb.AttributeType.STRING,
+      },
+      timeToLiveAttribute: "expires_at",
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      encryption: dynamodb.TableEncryption.AWS_MANAGED,
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+      pointInTimeRecoverySpecification: {
+        pointInTimeRecoveryEnabled: true,
+      },
+    });
+
+    const jobsTable = new dynamodb.Table(this, "JobsTbl", {
+      partitionKey: {
+        name: "job_id",
+        type: dynamodb.AttributeType.STRING,
+      },
+      timeToLiveAttribute: "expires_at",
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      encryption: dynamodb.TableEncryption.AWS_MANAGED,
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+      pointInTimeRecoverySpecification: {
+        pointInTimeRecoveryEnabled: true,
+      },
+    });
+
+    const jobDeadLetterQueue = new sqs.Queue(this, "JobDeadLetterQueue", {
+      encryption: sqs.QueueEncryption.SQS_MANAGED,
+      enforceSSL: true,
+      retentionPeriod: cdk.Duration.days(4),
+    });
+
+    // Long-running websocket actions are queued here and processed by the job worker.
+    // Visibility timeout is well above the worker timeout so in-flight jobs are not redelivered.
+    const jobQueue = new sqs.Queue(this, "JobQueue", {
+      encryption: sqs.QueueEncryption.SQS_MANAGED,
+      enforceSSL: true,
+      visibilityTimeout: cdk.Duration.minutes(60),
+      deadLetterQueue: {
+        queue: jobDeadLetterQueue,
+        maxReceiveCount: 2,
+      },
+    });
+
+    const kbGenerationParameter = ssm.StringParameter.fromStringParameterName(
+      this, "KbGenerationParam", props.kbGenerationParameterName);
+
+    const webSocketHandlerEnvironment = {
+      WEBSOCKET_TBL_NM: webSocketsAuthTable.tableName,
+      CONNECTIONS_INDEX_NM: "ConnectionsByShard",
+      CHAT_HISTORY_TBL_NM: chatHistoryTable.tableName,
+      CACHE_TBL_NM: cacheTable.tableName,
+      JOBS_TBL_NM: jobsTable.tableName,
+      EMBEDDINGS_MODEL_ID: "amazon.titan-embed-text-v2:0",
+      LLM_MODEL_ID: "us.amazon.nova-lite-v1:0", //"us.amazon.nova-pro-v1:0", //"amazon.nova-pro-v1:0", 
+      ALPHA_VANTAGE_APIKEY: ALPHA_VANTAGE_APIKEY,
+      KB_ID: props.investmentAnalystKBKnowledgeBaseId,
+      KB_GENERATION_PARAM: props.kbGenerationParameterName,
+      AGENT_ID: props.gentNewsSentimentAttrAgentId,
+      AGENT_ALIAS_ID: props.agentAliasNewsSentimentAttrAgentAliasId,
+      BEDROCK_GUARDRAILSID: props.bedrockGuardrailsId,
+      BEDROCK_GUARDRAILSVERSION: props.bedrockGuardrailsVersion
+    };
+
     const webSocketLambdaHandler = new lambda.DockerImageFunction(this, "WebSocketLambdaHandler", {
       code: lambda.DockerImageCode.fromImageAsset(path.join(__dirname, "../functions/websocket-handler")),
       architecture: lambdaArchitecture,
@@ -315,42 +395,61 @@ export class FrontEndStack extends cdk.Stack {
       tracing: lambda.Tracing.ACTIVE,
       logRetention: logs.RetentionDays.ONE_DAY,
       environment: {
-        WEBSOCKET_TBL_NM: webSocketsAuthTable.tableName,
-        CHAT_HISTORY_TBL_NM: chatHistoryTable.tableName,
-        EMBEDDINGS_MODEL_ID: "amazon.titan-embed-text-v2:0",
-        LLM_MODEL_ID: "us.amazon.nova-lite-v1:0", //"us.amazon.nova-pro-v1:0", //"amazon.nova-pro-v1:0", 
-        ALPHA_VANTAGE_APIKEY: ALPHA_VANTAGE_APIKEY,
-        KB_ID: props.investmentAnalystKBKnowledgeBaseId,
-        AGENT_ID: props.gentNewsSentimentAttrAgentId,
-        AGENT_ALIAS_ID: props.agentAliasNewsSentimentAttrAgentAliasId,
-        BEDROCK_GUARDRAILSID: props.bedrockGuardrailsId,
-        BEDROCK_GUARDRAILSVERSION: props.bedrockGuardrailsVersion
+        ...webSocketHandlerEnvironment,
+        JOB_QUEUE_URL: jobQueue.queueUrl,
       }
     }) ;
-    chatHistoryTable.grant(webSocketLambdaHandler, "dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:DeleteItem", "dynamodb:UpdateItem");
-
-    webSocketLambdaHandler.addToRolePolicy(
-      new iam.PolicyStatement({
-        actions: ["bedrock:InvokeModel",
-          "bedrock:InvokeAgent",
-          "bedrock:Retrieve",
-          "bedrock:RetrieveAndGenerate",
-          "bedrock:InvokeModelWithResponseStream",
-          "bedrock:InvokeFlow",
-          "bedrock:RenderPrompt",
-          "bedrock:ApplyGuardrail",
-          "apigateway:POST",
-          "apigateway:GET",
-          "apigateway:DELETE",
-          "xray:PutTelemetryRecords",
-          "xray:PutTraceSegments",
-          "execute-api:ManageConnections",
-          "execute-api:Invoke"
-        ],
-        resources: ["*"]
-      }));
 
-    webSocketsAuthTable.grant(webSocketLambdaHandler, "dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:DeleteItem");
+    // Same image as the route handler, running the SQS job worker entry point.
+    const webSocketJobWorker = new lambda.DockerImageFunction(this, "WebSocketJobWorker", {
+      code: lambda.DockerImageCode.fromImageAsset(path.join(__dirname, "../functions/websocket-handler"), {
+        cmd: ["index.job_handler"],
+      }),
+      architecture: lambdaArchitecture,
+      timeout: cdk.Duration.minutes(10),
+      memorySize: 512,
+      tracing: lambda.Tracing.ACTIVE,
+      logRetention: logs.RetentionDays.ONE_DAY,
+      environment: webSocketHandlerEnvironment,
+    });
+
+    webSocketJobWorker.addEventSource(new lambdaEventSources.SqsEventSource(jobQueue, {
+      batchSize: 1,
+      maxConcurrency: Number(this.node.tryGetContext('JOB_WORKER_MAX_CONCURRENCY') ?? 10),
+      reportBatchItemFailures: true,
+    }));
+    jobQueue.grantSendMessages(webSocketLambdaHandler);
+
+    for (const websocketFunction of [webSocketLambdaHandler, webSocketJobWorker]) {
+      chatHistoryTable.grant(websocketFunction, "dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:DeleteItem", "dynamodb:UpdateItem");
+      cacheTable.grant(websocketFunction, "dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:DeleteItem");
+      jobsTable.grant(websocketFunction, "dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:UpdateItem");
+      kbGenerationParameter.grantRead(websocketFunction);
+
+      websocketFunction.addToRolePolicy(
+        new iam.PolicyStatement({
+          actions: ["bedrock:InvokeModel",
+            "bedrock:InvokeAgent",
+            "bedrock:Retrieve",
+            "bedrock:RetrieveAndGenerate",
+            "bedrock:InvokeModelWithResponseStream",
+            "bedrock:InvokeFlow",
+            "bedrock:RenderPrompt",
+            "bedrock:ApplyGuardrail",
+            "apigateway:POST",
+            "apigateway:GET",
+            "apigateway:DELETE",
+            "xray:PutTelemetryRecords",
+            "xray:PutTraceSegments",
+            "execute-api:ManageConnections",
+            "execute-api:Invoke"
+          ],
+          resources: ["*"]
+        }));
+
+      webSocketsAuthTable.grant(websocketFunction, "dynamodb:PutItem", "dynamodb:GetItem", "dynamodb:DeleteItem",
+        "dynamodb:UpdateItem", "dynamodb:Query", "dynamodb:Scan", "dynamodb:BatchWriteItem");
+    }
 
     const webSocketApiGateway = new apigatewayv2.WebSocketApi(this, 'WebSocketApiGateway', {
       connectRouteOptions: {
@@ -618,6 +717,10 @@ export class FrontEndStack extends cdk.Stack {
       { id: 'AwsSolutions-L1', reason: 'Dependencies on libraries used.' },
     ]);    
 
+    NagSuppressions.addResourceSuppressions (webSocketJobWorker, [
+      { id: 'AwsSolutions-L1', reason: 'Dependencies on libraries used.' },
+    ]);
+
     NagSuppressions.addResourceSuppressions (webSocketApiGateway, [
       { id: 'AwsSolutions-APIG4', reason: 'Disconnect cannot have authentication. Default route has lamba authorizer configured.' },
     ], true);
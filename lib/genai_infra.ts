@@ -1,12 +1,17 @@
 import * as lambdaPython from "@aws-cdk/aws-lambda-python-alpha";
 import * as genai from '@cdklabs/generative-ai-cdk-constructs';
 import * as cdk from "aws-cdk-lib";
+import * as dynamodb from "aws-cdk-lib/aws-dynamodb";
 // import * as bedrock from "aws-cdk-lib/aws-bedrock";
 import * as iam from "aws-cdk-lib/aws-iam";
 import * as lambda from "aws-cdk-lib/aws-lambda";
+import * as lambdaEventSources from "aws-cdk-lib/aws-lambda-event-sources";
 import * as logs from "aws-cdk-lib/aws-logs";
 import * as s3 from "aws-cdk-lib/aws-s3";
 import * as s3deploy from "aws-cdk-lib/aws-s3-deployment";
+import * as s3n from "aws-cdk-lib/aws-s3-notifications";
+import * as sqs from "aws-cdk-lib/aws-sqs";
+import * as ssm from "aws-cdk-lib/aws-ssm";
 import * as cr from "aws-cdk-lib/custom-resources";
 import { NagSuppressions } from "cdk-nag";
 import { Construct } from "constructs";
@@ -22,6 +27,7 @@ export class GenAIInfraStack extends cdk.Stack {
   public powerToolsLayer: lambda.ILayerVersion;
   public bedrockGuardrailsId: string;
   public bedrockGuardrailsVersion: string;
+  public kbGenerationParameterName: string;
 
   constructor(scope: Construct, id: string, props?: cdk.StackProps) {
     super(scope, id, props);
@@ -65,6 +71,45 @@ export class GenAIInfraStack extends cdk.Stack {
         : `arn:${cdk.Aws.PARTITION}:lambda:${cdk.Aws.REGION}:017000801446:layer:AWSLambdaPowertoolsPythonV3-python38-arm64:2`
     );
 
+    // Bumped after every completed ingestion job; the websocket handler keys its
+    // retrieval cache on it so new documents are never hidden behind cached results.
+    const kbGenerationParameter = new ssm.StringParameter(this, "KbGenerationParam", {
+      description: "Generation of the investment research knowledge base, bumped on ingestion",
+      stringValue: "0",
+    });
+
+    // ETags of the data source objects as of the last completed ingestion job
+    const kbIngestionManifestTable = new dynamodb.Table(this, "KbIngestionManifest", {
+      partitionKey: {
+        name: "object_key",
+        type: dynamodb.AttributeType.STRING,
+      },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      encryption: dynamodb.TableEncryption.AWS_MANAGED,
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+    });
+
+    const kbIngestionDeadLetterQueue = new sqs.Queue(this, "KbIngestionDeadLetterQueue", {
+      encryption: sqs.QueueEncryption.SQS_MANAGED,
+      enforceSSL: true,
+      retentionPeriod: cdk.Duration.days(4),
+    });
+
+    // Data source changes land here and are debounced by the batching window; the handler
+    // also sends itself delayed messages to poll running ingestion jobs.
+    const kbIngestionQueue = new sqs.Queue(this, "KbIngestionQueue", {
+      encryption: sqs.QueueEncryption.SQS_MANAGED,
+      enforceSSL: true,
+      visibilityTimeout: cdk.Duration.minutes(6),
+      deadLetterQueue: {
+        queue: kbIngestionDeadLetterQueue,
+        maxReceiveCount: 3,
+      },
+    });
+
+    kbInvestmentResearchS3.addEventNotification(s3.EventType.OBJECT_CREATED, new s3n.SqsDestination(kbIngestionQueue));
+    kbInvestmentResearchS3.addEventNotification(s3.EventType.OBJECT_REMOVED, new s3n.SqsDestination(kbIngestionQueue));
+
     const ingestionJobLambdaHandler = new lambdaPython.PythonFunction(this, "BedrockKbDsIngestionHandler", {
       entry: path.join(__dirname, "../functions/bedrock-kb-ingestion-handler/"),
       runtime: lambda.Runtime.PYTHON_3_12,
@@ -77,6 +122,10 @@ export class GenAIInfraStack extends cdk.Stack {
       environment: {
         KB_ID: investmentAnalystVecKB.knowledgeBaseId,
         DS_ID: investmentAnalystKBS3Ds.dataSourceId,
+        KB_GENERATION_PARAM: kbGenerationParameter.parameterName,
+        KB_BUCKET: kbInvestmentResearchS3.bucketName,
+        MANIFEST_TBL_NM: kbIngestionManifestTable.tableName,
+        INGESTION_QUEUE_URL: kbIngestionQueue.queueUrl,
       },
       initialPolicy: [
         new iam.PolicyStatement({
@@ -99,6 +148,19 @@ export class GenAIInfraStack extends cdk.Stack {
       ],
     });
 
+    kbGenerationParameter.grantWrite(ingestionJobLambdaHandler);
+    kbInvestmentResearchS3.grantRead(ingestionJobLambdaHandler);
+    kbIngestionManifestTable.grantReadWriteData(ingestionJobLambdaHandler);
+    kbIngestionQueue.grantSendMessages(ingestionJobLambdaHandler);
+
+    ingestionJobLambdaHandler.addEventSource(new lambdaEventSources.SqsEventSource(kbIngestionQueue, {
+      batchSize: 100,
+      maxBatchingWindow: cdk.Duration.minutes(Number(this.node.tryGetContext('KB_INGESTION_BATCH_WINDOW_MINUTES') ?? 5)),
+      maxConcurrency: 2,
+      // Only the messages the handler lists as failed are redelivered
+      reportBatchItemFailures: true,
+    }));
+
     const ingestionJobLambdaHandlerTrigger = new cr.AwsCustomResource(this, 'IngestionJobLambdaHandlerTrigger', {
       onCreate: {
         service: 'Lambda',
@@ -131,6 +193,18 @@ export class GenAIInfraStack extends cdk.Stack {
     ingestionJobLambdaHandlerTrigger.node.addDependency(ingestionJobLambdaHandler);
     ingestionJobLambdaHandler.node.addDependency(investmentAnalystKBS3Ds);
 
+    // Alpha Vantage requests per minute, counted across every NewsSentimentHandler container
+    const newsRateLimitTable = new dynamodb.Table(this, "NewsRateLimit", {
+      partitionKey: {
+        name: "window_key",
+        type: dynamodb.AttributeType.STRING,
+      },
+      billingMode: dynamodb.BillingMode.PAY_PER_REQUEST,
+      encryption: dynamodb.TableEncryption.AWS_MANAGED,
+      timeToLiveAttribute: "expires_at",
+      removalPolicy: cdk.RemovalPolicy.DESTROY,
+    });
+
     const newsSentimentHandler = new lambdaPython.PythonFunction(this, "NewsSentimentHandler", {
       entry: path.join(__dirname, "../functions/news-sentiment-handler"),
       runtime: lambda.Runtime.PYTHON_3_12,
@@ -143,9 +217,11 @@ export class GenAIInfraStack extends cdk.Stack {
       environment: {
         API_KEY: ALPHA_VANTAGE_APIKEY || "<<api_key>>",
         NEWS_TOPICS: "earnings",
-        NEWS_LIMIT: "3"
+        NEWS_LIMIT: "3",
+        RATE_LIMIT_TBL_NM: newsRateLimitTable.tableName,
       },
     });
+    newsRateLimitTable.grantReadWriteData(newsSentimentHandler);
 
     const agentInstructions = `Provide the latest news and sentiment analysis for {ticker} and output in JSON Format as per schema below. Include the entire response from the API.
   
@@ -282,6 +358,7 @@ export class GenAIInfraStack extends cdk.Stack {
     this.agentAliasNewsSentimentAttrAgentAliasId = agentNewsSentiment.testAlias.aliasId;
     this.bedrockGuardrailsId = guardrails.guardrailId;
     this.bedrockGuardrailsVersion = guardrails.guardrailVersion;
+    this.kbGenerationParameterName = kbGenerationParameter.parameterName;
 
     new cdk.CfnOutput(this, "kbInvestmentResearchS3", {
       value: kbInvestmentResearchS3.bucketName,
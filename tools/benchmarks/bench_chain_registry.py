@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: per-request chain construction vs. the shared chain registry.
+
+Runs offline; only the websocket handler's Python dependencies are required.
+Dummy environment values are set so the modules import without AWS resources;
+no model is invoked.
+
+Usage:
+  python tools/benchmarks/bench_chain_registry.py --iterations 200
+"""
+
+import argparse
+import os
+import sys
+import time
+
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "functions", "websocket-handler")
+sys.path.insert(0, os.path.abspath(HANDLER_DIR))
+
+for name, value in {
+    "AWS_REGION": "us-east-1",
+    "AWS_DEFAULT_REGION": "us-east-1",
+    "LLM_MODEL_ID": "us.amazon.nova-lite-v1:0",
+    "KB_ID": "benchmark",
+    "CHAT_HISTORY_TBL_NM": "benchmark",
+    "BEDROCK_GUARDRAILSID": "benchmark",
+    "BEDROCK_GUARDRAILSVERSION": "1",
+    "POWERTOOLS_TRACE_DISABLED": "1",
+    "POWERTOOLS_LOG_LEVEL": "WARNING",
+}.items():
+    os.environ.setdefault(name, value)
+
+from lib import financial_analysis, investment_agent, investment_chat  # noqa: E402
+from lib.chain_registry import chain_registry  # noqa: E402
+
+CHAINS = {
+    "investment_agent": (investment_agent.build_agentic_chain, investment_agent.get_agentic_chain),
+    "investment_report": (investment_agent.build_report_chain, investment_agent.get_report_chain),
+    "financial_analysis": (financial_analysis.build_agentic_chain, financial_analysis.get_agentic_chain),
+    "investment_chat": (investment_chat.build_chat_chain,
+                        lambda: chain_registry.get("investment_chat", investment_chat.build_chat_chain)),
+}
+
+
+def _per_call_ms(fn, iterations: int) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - start) * 1000 / iterations
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Chain construction micro-benchmark")
+    ap.add_argument("--iterations", type=int, default=100)
+    args = ap.parse_args()
+
+    chain_registry.clear()
+    print(f"{'chain':<20} {'rebuild ms/req':>15} {'registry ms/req':>16} {'speedup':>9}")
+    for name, (build, get) in CHAINS.items():
+        rebuild_ms = _per_call_ms(build, args.iterations)
+        get()  # first use builds and registers the chain
+        registry_ms = _per_call_ms(get, args.iterations)
+        print(f"{name:<20} {rebuild_ms:>15.3f} {registry_ms:>16.4f} {rebuild_ms / registry_ms:>8.0f}x")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
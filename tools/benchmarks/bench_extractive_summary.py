@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Benchmark: sentence ranking for the local extractive summary, by context size.
+
+Times the previous pure-Python TF ranking (two regex tokenizations per sentence,
+Counter scoring) against the vectorized BM25/TF-IDF ranking in
+``local_macro_industry_report`` on synthetic contexts, plus the whole
+``_extractive_summary`` call.
+
+Usage:
+  python tools/benchmarks/bench_extractive_summary.py --sizes-mb 0.1 1 10 50
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from collections import Counter
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import local_macro_industry_report as report  # noqa: E402
+
+WORDS = ("demand supply capacity pricing margin semiconductor foundry tariff subsidy growth risk "
+         "volatility outlook inventory shipment revenue guidance competition market share policy "
+         "regulation trend rising shortage delay adoption leader rival the and of in to with for").split()
+
+
+def legacy_tokens(text: str) -> list:
+    return [t for t in re.findall(r"[A-Za-z][A-Za-z\-]+", text.lower()) if t not in report._STOPWORDS and len(t) > 2]
+
+
+def legacy_score_sentences(sents: list) -> list:
+    all_tokens = []
+    for s in sents:
+        all_tokens.extend(legacy_tokens(s))
+    freq = Counter(all_tokens)
+    scores = []
+    for s in sents:
+        score = sum(freq.get(t, 0) for t in legacy_tokens(s)) / (len(s.split()) + 1)
+        scores.append((score, s))
+    scores.sort(reverse=True, key=lambda x: x[0])
+    return [s for _, s in scores]
+
+
+def synthetic_context(rng: random.Random, size_bytes: int) -> str:
+    parts = []
+    total = 0
+    while total < size_bytes:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(6, 45))).capitalize() + rng.choice(".!?")
+        parts.append(sentence)
+        total += len(sentence) + 1
+    return " ".join(parts)
+
+
+def _timed(fn, *args):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Extractive summary ranking benchmark")
+    ap.add_argument("--sizes-mb", type=float, nargs="+", default=[0.1, 1, 10, 50])
+    ap.add_argument("--baseline-max-mb", type=float, default=10,
+                    help="Skip the legacy ranking above this size")
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"numpy: {'yes' if report.np is not None else 'no'}")
+    print(f"{'size MB':>8} {'sentences':>10} {'legacy s':>9} {'ranked s':>9} {'speedup':>8} {'summary s':>10}")
+    for size_mb in args.sizes_mb:
+        context = synthetic_context(rng, int(size_mb * 1e6))
+        sents = report._sentences(context)
+        _, ranked_s = _timed(report._score_sentences, sents)
+        if size_mb <= args.baseline_max_mb:
+            _, legacy_s = _timed(legacy_score_sentences, sents)
+            legacy, speedup = f"{legacy_s:.2f}", f"{legacy_s / ranked_s:.1f}x"
+        else:
+            legacy = speedup = "-"
+        summary, summary_s = _timed(report._extractive_summary, "Semiconductors", "global", "next 12 months", context, [])
+        assert summary["overview"] and set(summary) >= {"key_drivers", "risks", "outlook", "citations"}
+        print(f"{size_mb:>8g} {len(sents):>10} {legacy:>9} {ranked_s:>9.2f} {speedup:>8} {summary_s:>10.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: PDF text extraction in-process vs. the process pool, by worker count.
+
+Builds a synthetic corpus of text PDFs and extracts it with
+``local_macro_industry_report.PdfExtractor`` at 1, 2, 4, ... workers (1 is the
+in-process path), checking every run returns the same text.
+
+Usage:
+  python tools/benchmarks/bench_pdf_extraction.py --documents 16 --pages 40
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from local_macro_industry_report import PdfExtractor  # noqa: E402
+
+WORDS = ("demand supply capacity pricing margin semiconductor foundry tariff subsidy "
+         "growth risk volatility outlook inventory shipment revenue guidance").split()
+
+
+def synthetic_pdf(rng: random.Random, pages: int, lines_per_page: int = 45) -> bytes:
+    """A minimal text-only PDF with Helvetica pages of random sentences."""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None,
+               b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for _ in range(pages):
+        lines = [" ".join(rng.choice(WORDS) for _ in range(12)) + "." for _ in range(lines_per_page)]
+        stream = "BT /F1 9 Tf 11 TL 40 800 Td " + " ".join(f"({line}) '" for line in lines) + " ET"
+        stream = stream.encode("latin-1")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream))
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] "
+                       b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects)))
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        " ".join(f"{k} 0 R" for k in kids).encode(), len(kids))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return bytes(out)
+
+
+def main():
+    ap = argparse.ArgumentParser(description="PDF extraction scaling benchmark")
+    ap.add_argument("--documents", type=int, default=8)
+    ap.add_argument("--pages", type=int, default=40)
+    ap.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    corpus = [synthetic_pdf(rng, args.pages) for _ in range(args.documents)]
+    print(f"corpus: {args.documents} PDFs x {args.pages} pages, "
+          f"{sum(map(len, corpus)) / 1e6:.1f} MB, {os.cpu_count()} CPUs")
+
+    worker_counts = [1]
+    while worker_counts[-1] * 2 <= max(args.max_workers, 2):
+        worker_counts.append(worker_counts[-1] * 2)
+
+    baseline = reference = None
+    print(f"{'workers':>7} {'seconds':>9} {'pages/s':>9} {'speedup':>8}")
+    for workers in worker_counts:
+        extractor = PdfExtractor(workers=workers, max_pages=args.pages)
+        try:
+            if workers > 1:
+                # Start the workers and import pypdf in them outside the timing
+                extractor.extract(corpus[0])
+            started = time.perf_counter()
+            texts = [extractor.extract(body)[0] for body in corpus]
+            elapsed = time.perf_counter() - started
+        finally:
+            extractor.close()
+        reference = reference or texts
+        if texts != reference:
+            print(f"text mismatch with {workers} workers")
+            return 1
+        baseline = baseline or elapsed
+        pages_per_second = args.documents * args.pages / elapsed
+        print(f"{workers:>7} {elapsed:>9.2f} {pages_per_second:>9.0f} {baseline / elapsed:>7.2f}x")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: semantic answer cache lookups on the in-memory NumPy index.
+
+Fills ``InMemoryVectorIndex`` with random 1024-dimensional vectors (the size of
+Titan text embeddings v2) and measures lookups for near-duplicate queries
+(hits) and unrelated ones (misses). No model or AWS call is made.
+
+Usage:
+  python tools/benchmarks/bench_semantic_cache.py --sizes 256 2048 8192
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "functions", "websocket-handler")
+sys.path.insert(0, os.path.abspath(HANDLER_DIR))
+os.environ.setdefault("POWERTOOLS_TRACE_DISABLED", "1")
+os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+
+from lib.semantic_cache import SEMANTIC_CACHE_THRESHOLD, InMemoryVectorIndex  # noqa: E402
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Semantic cache index micro-benchmark")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[256, 1024, 4096])
+    ap.add_argument("--dim", type=int, default=1024)
+    ap.add_argument("--queries", type=int, default=500)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    print(f"{'entries':>8} {'hit us/lookup':>14} {'miss us/lookup':>15} {'hit rate':>9}")
+    for size in args.sizes:
+        index = InMemoryVectorIndex(max_entries=size)
+        vectors = rng.standard_normal((size, args.dim)).astype(np.float32)
+        for i, vector in enumerate(vectors):
+            index.add(vector, {"answer": i}, ttl=3600)
+
+        picks = rng.integers(0, size, args.queries)
+        # Paraphrases: the stored vector plus a little noise
+        near = vectors[picks] + 0.1 * rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+        far = rng.standard_normal((args.queries, args.dim)).astype(np.float32)
+
+        start = time.perf_counter()
+        hits = sum(index.search(query, SEMANTIC_CACHE_THRESHOLD)[1] is not None for query in near)
+        hit_us = (time.perf_counter() - start) * 1e6 / args.queries
+        start = time.perf_counter()
+        for query in far:
+            index.search(query, SEMANTIC_CACHE_THRESHOLD)
+        miss_us = (time.perf_counter() - start) * 1e6 / args.queries
+        print(f"{size:>8} {hit_us:>14.1f} {miss_us:>15.1f} {hits / args.queries:>9.2%}")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
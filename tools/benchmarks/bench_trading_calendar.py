@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: pandas_market_calendars lookups vs. the precomputed trading-day index.
+
+Compares the previous per-call ``mcal.get_calendar('NYSE').schedule(...)`` path
+used by StockPriceTool with ``lib.tools.trading_calendar`` for "is trading day",
+"previous trading day" and "trading days between", and checks both agree.
+
+Usage:
+  python tools/benchmarks/bench_trading_calendar.py --iterations 200
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+HANDLER_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "functions", "websocket-handler")
+sys.path.insert(0, os.path.abspath(HANDLER_DIR))
+os.environ.setdefault("POWERTOOLS_LOG_LEVEL", "WARNING")
+
+import pandas_market_calendars as mcal  # noqa: E402
+from lib.tools.trading_calendar import TradingCalendar, TRADING_CALENDAR_FILE  # noqa: E402
+
+
+def mcal_is_trading_day(day: datetime) -> bool:
+    schedule = mcal.get_calendar("NYSE").schedule(start_date=day.strftime("%Y-%m-%d"), end_date=day.strftime("%Y-%m-%d"))
+    return not schedule.empty
+
+
+def mcal_previous_trading_day(day: datetime):
+    schedule = mcal.get_calendar("NYSE").schedule(
+        start_date=(day - timedelta(days=30)).strftime("%Y-%m-%d"), end_date=day.strftime("%Y-%m-%d"))
+    previous = schedule[schedule.index < day]
+    return previous.index[-1].date() if not previous.empty else None
+
+
+def mcal_trading_days_between(start: datetime, end: datetime) -> int:
+    return len(mcal.get_calendar("NYSE").valid_days(start_date=start.strftime("%Y-%m-%d"), end_date=end.strftime("%Y-%m-%d")))
+
+
+def _per_call_us(fn, args, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        fn(*args[i % len(args)])
+    return (time.perf_counter() - start) * 1e6 / iterations
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Trading calendar micro-benchmark")
+    ap.add_argument("--iterations", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rng = random.Random(args.seed)
+    days = [datetime(2000, 1, 1) + timedelta(days=rng.randrange(9000)) for _ in range(args.iterations)]
+    ranges = [(day, day + timedelta(days=rng.randrange(1, 400))) for day in days]
+
+    started = time.perf_counter()
+    calendar = TradingCalendar.load(TRADING_CALENDAR_FILE)
+    print(f"index load: {(time.perf_counter() - started) * 1000:.2f} ms, "
+          f"{len(calendar.ordinals)} days, bitmap {len(calendar.bitmap)} bytes")
+
+    mismatches = sum(
+        mcal_is_trading_day(day) != calendar.is_trading_day(day)
+        or mcal_previous_trading_day(day) != calendar.previous_trading_day(day)
+        for day in days[:50])
+    mismatches += sum(mcal_trading_days_between(*r) != calendar.trading_days_between(*r) for r in ranges[:50])
+    print(f"mismatches vs pandas_market_calendars: {mismatches}")
+
+    cases = [
+        ("is_trading_day", mcal_is_trading_day, calendar.is_trading_day, [(d,) for d in days]),
+        ("previous_trading_day", mcal_previous_trading_day, calendar.previous_trading_day, [(d,) for d in days]),
+        ("trading_days_between", mcal_trading_days_between, calendar.trading_days_between, ranges),
+    ]
+    print(f"{'lookup':<22} {'mcal us/call':>13} {'index us/call':>14} {'speedup':>9}")
+    for name, slow, fast, call_args in cases:
+        slow_us = _per_call_us(slow, call_args, args.iterations)
+        fast_us = _per_call_us(fast, call_args, args.iterations * 100)
+        print(f"{name:<22} {slow_us:>13.1f} {fast_us:>14.2f} {slow_us / fast_us:>8.0f}x")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -25,16 +25,32 @@ Usage:
     --max-bytes 60000
 
 Output: JSON printed to stdout.
+
+PDF text is extracted on --pdf-workers processes (default: one per CPU), capped at
+PDF_MAX_PAGES pages and PDF_TIMEOUT_SECONDS per document.
+
+Extracted text is cached under ~/.cache/local-macro-industry-report (override with
+--cache-dir or REPORT_TEXT_CACHE_DIR, disable with --no-cache) and reused for as long
+as the object's ETag is unchanged.
 """
 
 import argparse
+import gzip
+import hashlib
 import io
 import json
+import multiprocessing
 import os
 import sys
-from typing import List, Tuple
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
 
 import boto3
+from botocore.config import Config
 
 try:
     from pypdf import PdfReader  # optional
@@ -42,41 +58,341 @@ except Exception:  # pragma: no cover
     PdfReader = None
 
 
-def _read_s3_object(s3, bucket: str, key: str) -> Tuple[str, str]:
-    """Return (text, source) for supported types; empty text for unsupported."""
-    obj = s3.get_object(Bucket=bucket, Key=key)
-    body = obj["Body"].read()
+# Objects are downloaded concurrently; every worker shares one client and its pool
+S3_MAX_WORKERS = int(os.environ.get("S3_MAX_WORKERS", "16"))
+TEXT_SUFFIXES = (".txt", ".md")
+TEXT_RANGE_SLACK_BYTES = 1024
+# PDF text extraction runs on worker processes, one page range per task
+PDF_WORKERS = int(os.environ.get("PDF_WORKERS", str(os.cpu_count() or 1)))
+PDF_PAGES_PER_TASK = int(os.environ.get("PDF_PAGES_PER_TASK", "8"))
+PDF_MAX_PAGES = int(os.environ.get("PDF_MAX_PAGES", "300"))
+PDF_TIMEOUT_SECONDS = float(os.environ.get("PDF_TIMEOUT_SECONDS", "120"))
+
+
+def _s3_client(max_workers: int = S3_MAX_WORKERS):
+    return boto3.client(
+        "s3",
+        region_name=os.environ.get("AWS_REGION"),
+        config=Config(max_pool_connections=max(10, max_workers), retries={"mode": "standard"}),
+    )
+
+
+def _is_supported(key: str) -> bool:
+    lower = key.lower()
+    return lower.endswith(TEXT_SUFFIXES) or (lower.endswith(".pdf") and PdfReader is not None)
+
+
+def _pdf_page_count(path: str) -> int:
+    return len(PdfReader(path).pages)
+
+
+def _pdf_extract_pages(path: str, start: int, stop: int) -> List[str]:
+    reader = PdfReader(path)
+    return [reader.pages[i].extract_text() or "" for i in range(start, stop)]
+
+
+class _PageText:
+    """Pages joined with newlines, tracking the length of the stripped text as they come in."""
+
+    def __init__(self, max_chars: Optional[int]):
+        self.max_chars = max_chars
+        self.pages: List[str] = []
+        self._length = 0
+        self._first = None  # offset of the first and past the last non-blank character
+        self._last = 0
+
+    def add(self, text: str) -> bool:
+        """Append a page; True once ``max_chars`` of stripped text are in."""
+        start = self._length + (1 if self.pages else 0)
+        self.pages.append(text)
+        self._length = start + len(text)
+        stripped = text.strip()
+        if stripped:
+            if self._first is None:
+                self._first = start + len(text) - len(text.lstrip())
+            self._last = start + len(text.rstrip())
+        stripped_length = self._last - self._first if self._first is not None else 0
+        return self.max_chars is not None and stripped_length >= self.max_chars
+
+    def text(self) -> str:
+        return "\n".join(self.pages)
+
+
+class PdfExtractor:
+    """Extracts PDF text on a process pool, spreading page ranges across cores.
+
+    Pages come back in document order and extraction stops once ``max_chars`` are
+    in. Documents are capped at ``max_pages`` and given ``timeout`` seconds from
+    when their first task starts; a document that runs over keeps the pages
+    extracted so far. ``workers <= 1`` extracts in-process, without the timeout.
+    ``extract`` returns (text, finished), finished being False after a timeout.
+
+    Tasks are only submitted while a worker is free, so a task's time in the pool
+    is time spent running and one that outlives ``timeout`` is stuck.
+    """
+
+    def __init__(self, workers: int = PDF_WORKERS, pages_per_task: int = PDF_PAGES_PER_TASK,
+                 max_pages: int = PDF_MAX_PAGES, timeout: float = PDF_TIMEOUT_SECONDS):
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self._pool = None
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        """Return the pool and the semaphore counting its free workers."""
+        with self._lock:
+            if self._pool is None:
+                # spawn: the loader threads make forking this process unsafe
+                self._pool = multiprocessing.get_context("spawn").Pool(self.workers)
+                self._slots = threading.Semaphore(self.workers)
+            return self._pool, self._slots
+
+    def _discard_pool(self, pool):
+        # A stuck worker can't be interrupted and never frees its slot; later documents
+        # get a fresh pool and this one is closed, finishing other documents' tasks
+        # (it is terminated at exit)
+        with self._lock:
+            if self._pool is pool:
+                self._pool = self._slots = None
+                pool.close()
+
+    def close(self):
+        with self._lock:
+            pool, self._pool, self._slots = self._pool, None, None
+        if pool is not None:
+            pool.terminate()
+
+    def _submit(self, pool, slots, fn, args, block: bool):
+        """Start ``fn`` on a free worker; None when none is free and ``block`` is False.
+
+        Returns (start time, AsyncResult). Raises TimeoutError once the pool is retired.
+        """
+        if block:
+            while not slots.acquire(timeout=1.0):
+                # Another document found a stuck worker; this pool's slots may never free up
+                if self._pool is not pool:
+                    raise multiprocessing.TimeoutError("PDF pool retired")
+        elif not slots.acquire(blocking=False):
+            return None
+        release = lambda _: slots.release()  # noqa: E731
+        try:
+            return time.monotonic(), pool.apply_async(fn, args, callback=release, error_callback=release)
+        except ValueError:  # the pool was closed
+            slots.release()
+            raise multiprocessing.TimeoutError("PDF pool retired")
+
+    def _result(self, pool, started: float, result, deadline: float):
+        """Wait for a task until the document's deadline, retiring the pool if it hung."""
+        hung_at = started + self.timeout
+        try:
+            return result.get(max(0.0, min(deadline, hung_at) - time.monotonic()))
+        except multiprocessing.TimeoutError:
+            if time.monotonic() >= hung_at:
+                self._discard_pool(pool)
+            raise
+
+    def extract(self, body: bytes, max_chars: Optional[int] = None) -> Tuple[str, bool]:
+        if self.workers <= 1:
+            pages = _PageText(max_chars)
+            reader = PdfReader(io.BytesIO(body))
+            for p in reader.pages[:self.max_pages]:
+                if pages.add(p.extract_text() or ""):
+                    break
+            return pages.text(), True
+
+        # Workers read the document from disk rather than each task unpickling the body
+        fd, path = tempfile.mkstemp(suffix=".pdf")
+        with os.fdopen(fd, "wb") as f:
+            f.write(body)
+        pool, slots = self._get_pool()
+        pages = _PageText(max_chars)
+        try:
+            started, result = self._submit(pool, slots, _pdf_page_count, (path,), block=True)
+            deadline = started + self.timeout
+            count = min(self._result(pool, started, result, deadline), self.max_pages)
+            ranges = deque((start, min(start + self.pages_per_task, count))
+                           for start in range(0, count, self.pages_per_task))
+            pending = deque()
+            while ranges or pending:
+                # Take every free worker, waiting for one only when nothing is running
+                while ranges:
+                    task = self._submit(pool, slots, _pdf_extract_pages, (path, *ranges[0]),
+                                        block=not pending)
+                    if task is None:
+                        break
+                    ranges.popleft()
+                    pending.append(task)
+                for text in self._result(pool, *pending.popleft(), deadline):
+                    if pages.add(text):
+                        return pages.text(), True
+        except multiprocessing.TimeoutError:
+            print(f"PDF extraction timed out after {self.timeout:g}s, keeping {len(pages.pages)} pages",
+                  file=sys.stderr)
+            return pages.text(), False
+        finally:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        return pages.text(), True
+
+
+def _read_text_prefix(s3, bucket: str, key: str, max_chars: int) -> str:
+    """Read ranges from the start of the object until ``max_chars`` of stripped text are in."""
+    data = b""
+    size = max_chars + TEXT_RANGE_SLACK_BYTES
+    while True:
+        resp = s3.get_object(Bucket=bucket, Key=key, Range=f"bytes={len(data)}-{len(data) + size - 1}")
+        data += resp["Body"].read()
+        text = data.decode("utf-8", errors="ignore")
+        object_size = int(resp["ContentRange"].rsplit("/", 1)[-1])
+        # Multi-byte characters or leading blanks can leave the first range short
+        if len(data) >= object_size or len(text.strip()) >= max_chars:
+            return text
+
+
+def _read_s3_object(s3, bucket: str, key: str, max_chars: Optional[int] = None,
+                    pdf_extractor: Optional[PdfExtractor] = None) -> Tuple[str, str, bool]:
+    """Return (text, source, finished) for supported types; empty text for unsupported.
+
+    With ``max_chars`` only what can still fit is read: byte ranges for text
+    files, and pages up to that length for PDFs (which must be fetched whole).
+    PDFs are extracted with ``pdf_extractor``, in-process when it is not given.
+    ``finished`` is False when PDF extraction failed or timed out.
+    """
     source = f"s3://{bucket}/{key}"
     lower = key.lower()
 
-    if lower.endswith(".txt") or lower.endswith(".md"):
+    if lower.endswith(TEXT_SUFFIXES):
+        if max_chars is not None:
+            return _read_text_prefix(s3, bucket, key, max(max_chars, 1)), source, True
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
         try:
-            return body.decode("utf-8", errors="ignore"), source
+            return body.decode("utf-8", errors="ignore"), source, True
         except Exception:
-            return body.decode("latin-1", errors="ignore"), source
+            return body.decode("latin-1", errors="ignore"), source, True
     if lower.endswith(".pdf") and PdfReader is not None:
+        body = s3.get_object(Bucket=bucket, Key=key)["Body"].read()
         try:
-            reader = PdfReader(io.BytesIO(body))
-            pages = [p.extract_text() or "" for p in reader.pages]
-            return "\n".join(pages), source
+            text, finished = (pdf_extractor or PdfExtractor(workers=1)).extract(body, max_chars)
+            return text, source, finished
         except Exception:
-            return "", source
+            return "", source, False
 
-    # Unsupported types silently ignored
-    return "", source
+    # Unsupported types silently ignored, without downloading them
+    return "", source, True
 
 
-def _gather_context(bucket: str, prefix: str, max_bytes: int) -> Tuple[str, list]:
-    s3 = boto3.client("s3", region_name=os.environ.get("AWS_REGION"))
+class TextCache:
+    """Extracted text on disk, one gzipped JSON file per (bucket, key), valid for one ETag."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, bucket: str, key: str) -> str:
+        name = hashlib.sha256(f"{bucket}\0{key}".encode("utf-8")).hexdigest()
+        return os.path.join(self.directory, f"{name}.json.gz")
+
+    def get(self, bucket: str, key: str, etag: str, max_chars: Optional[int] = None) -> Optional[str]:
+        try:
+            with gzip.open(self._path(bucket, key), "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("bucket") != bucket or entry.get("key") != key or entry.get("etag") != etag:
+            return None
+        text = entry["text"]
+        # A prefix read for a smaller budget can still serve this one if it is long enough
+        if entry["complete"] or (max_chars is not None and len(text.strip()) >= max_chars):
+            return text
+        return None
+
+    def put(self, bucket: str, key: str, etag: str, text: str, complete: bool):
+        entry = {"bucket": bucket, "key": key, "etag": etag, "complete": complete, "text": text}
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as raw, gzip.open(raw, "wt", encoding="utf-8") as f:
+                json.dump(entry, f, ensure_ascii=False)
+            os.replace(tmp, self._path(bucket, key))
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+
+def _default_cache_dir() -> str:
+    return os.environ.get("REPORT_TEXT_CACHE_DIR") or os.path.join(
+        os.path.expanduser("~"), ".cache", "local-macro-industry-report")
+
+
+def _load_text(s3, bucket: str, key: str, max_chars: Optional[int] = None,
+               etag: Optional[str] = None, cache: Optional[TextCache] = None,
+               pdf_extractor: Optional[PdfExtractor] = None) -> Tuple[str, str]:
+    """``_read_s3_object`` behind the text cache; ``etag`` comes from the listing or a HEAD."""
+    if cache is None or not _is_supported(key):
+        text, source, _ = _read_s3_object(s3, bucket, key, max_chars, pdf_extractor)
+        return text, source
+    if etag is None:
+        etag = s3.head_object(Bucket=bucket, Key=key)["ETag"]
+    text = cache.get(bucket, key, etag, max_chars)
+    if text is not None:
+        return text, f"s3://{bucket}/{key}"
+    text, source, finished = _read_s3_object(s3, bucket, key, max_chars, pdf_extractor)
+    if not finished:
+        # A failed or timed-out extraction is retried next run rather than cached
+        return text, source
+    # Reads stop early only once max_chars of text are in, so a shorter text is the whole object
+    complete = max_chars is None or len(text.strip()) < max_chars
+    cache.put(bucket, key, etag, text, complete)
+    return text, source
+
+
+def _list_objects(s3, bucket: str, prefix: str) -> list:
     paginator = s3.get_paginator("list_objects_v2")
+    items = []
+    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
+        items.extend(page.get("Contents", []))
+    return items
+
+
+def _gather_context(bucket: str, prefix: str, max_bytes: int, max_workers: int = S3_MAX_WORKERS,
+                    cache: Optional[TextCache] = None,
+                    pdf_extractor: Optional[PdfExtractor] = None) -> Tuple[str, list]:
+    """Concatenate the prefix's documents in listing order until ``max_bytes`` is used up.
+
+    Reads run ahead on a bounded pool, but results are consumed in listing order so
+    the context is the same as a sequential read. Each read is capped by the budget
+    left when it was submitted, and nothing is downloaded once the budget is spent.
+    """
+    s3 = _s3_client(max_workers)
+    items = [item for item in _list_objects(s3, bucket, prefix)
+             if item.get("Size", 1) > 0 and _is_supported(item["Key"])]
     ctx_parts: List[str] = []
     citations = []
     total = 0
 
-    for page in paginator.paginate(Bucket=bucket, Prefix=prefix):
-        for item in page.get("Contents", []):
-            key = item["Key"]
-            text, src = _read_s3_object(s3, bucket, key)
+    pool = ThreadPoolExecutor(max_workers=max_workers)
+    pending = deque()
+    next_index = 0
+
+    def submit():
+        nonlocal next_index
+        while next_index < len(items) and len(pending) < 2 * max_workers:
+            key = items[next_index]["Key"]
+            etag = items[next_index].get("ETag")
+            pending.append((key, pool.submit(_load_text, s3, bucket, key, max_bytes - total, etag, cache,
+                                                  pdf_extractor)))
+            next_index += 1
+
+    try:
+        submit()
+        while pending:
+            key, future = pending.popleft()
+            text, src = future.result()
+            submit()
             if not text:
                 continue
             snippet = text.strip()
@@ -95,7 +411,9 @@ def _gather_context(bucket: str, prefix: str, max_bytes: int) -> Tuple[str, list
             ctx_parts.append(chunk)
             citations.append({"title": os.path.basename(key), "source": src})
             total += len(chunk)
-    return "\n\n".join(ctx_parts), citations
+        return "\n\n".join(ctx_parts), citations
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
 
 
 def _build_prompt(industry: str, region: str, horizon: str, context: str) -> dict:
@@ -120,8 +438,14 @@ def _build_prompt(industry: str, region: str, horizon: str, context: str) -> dic
     }
 
 
-def run(industry: str, region: str, horizon: str, bucket: str, prefix: str, max_bytes: int, *, local_extractive: bool=False) -> dict:
-    context, cites = _gather_context(bucket, prefix, max_bytes)
+def run(industry: str, region: str, horizon: str, bucket: str, prefix: str, max_bytes: int, *, local_extractive: bool=False,
+        max_workers: int = S3_MAX_WORKERS, cache_dir: Optional[str] = None, pdf_workers: int = PDF_WORKERS) -> dict:
+    cache = TextCache(cache_dir) if cache_dir else None
+    pdf_extractor = PdfExtractor(workers=pdf_workers)
+    try:
+        context, cites = _gather_context(bucket, prefix, max_bytes, max_workers, cache, pdf_extractor)
+    finally:
+        pdf_extractor.close()
     if not context:
         return {
             "industry": industry,
@@ -208,37 +532,103 @@ def run(industry: str, region: str, horizon: str, bucket: str, prefix: str, max_
 # -----------------------------
 # Local extractive summarization
 # -----------------------------
+import math
 import re
 from collections import Counter
+from functools import lru_cache
+from itertools import chain
+
+try:
+    import numpy as np  # optional, vectorizes sentence ranking
+except Exception:  # pragma: no cover
+    np = None
 
 _STOPWORDS = set(
     "the a an and or of in on at by for to from with as is are was were be been being have has had do does did this that these those it its their his her our your not no if then than into over under between after before more less most least such also however therefore thus while during among across per via about against without within according including".split()
 )
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+# Words of three or more letters, matched on lower-cased text
+_TOKEN_RE = re.compile(r"[a-z][a-z\-]{2,}")
+# BM25 term-frequency saturation and length normalization
+BM25_K1 = 1.2
+BM25_B = 0.75
 
 def _sentences(text: str) -> list:
     # Split on sentence boundaries; keep reasonable length
-    parts = re.split(r"(?<=[.!?])\s+", text)
-    return [s.strip() for s in parts if 40 <= len(s.strip()) <= 400]
-
-def _tokens(text: str) -> list:
-    return [t for t in re.findall(r"[A-Za-z][A-Za-z\-]+", text.lower()) if t not in _STOPWORDS and len(t) > 2]
+    parts = _SENTENCE_SPLIT_RE.split(text)
+    return [s for s in map(str.strip, parts) if 40 <= len(s) <= 400]
 
 def _score_sentences(sents: list) -> list:
-    # Simple TF scoring
-    all_tokens = []
-    for s in sents:
-        all_tokens.extend(_tokens(s))
-    freq = Counter(all_tokens)
+    """Rank sentences by BM25 against the corpus's TF-IDF centroid, best first.
+
+    Each term is weighted by its share of the corpus times its IDF over sentences,
+    so sentences built from the corpus's characteristic (frequent but not
+    ubiquitous) terms rank first; ties keep document order.
+    """
+    if not sents:
+        return []
+    token_lists = [_TOKEN_RE.findall(s.lower()) for s in sents]
+    if np is None:
+        scores = _bm25_centroid_scores_python(token_lists)
+        order = sorted(range(len(sents)), key=lambda i: -scores[i])
+    else:
+        scores = _bm25_centroid_scores(token_lists)
+        order = np.argsort(-scores, kind="stable")
+    return [sents[i] for i in order]
+
+def _bm25_centroid_scores(token_lists: list):
+    """NumPy scoring over a sparse sentence x term matrix built in one tokenization pass."""
+    n = len(token_lists)
+    flat = list(chain.from_iterable(token_lists))
+    vocab = {t: i for i, t in enumerate(dict.fromkeys(flat))}
+    term_ids = np.fromiter(map(vocab.__getitem__, flat), dtype=np.int64, count=len(flat))
+    doc_ids = np.repeat(np.arange(n, dtype=np.int64), np.fromiter(map(len, token_lists), dtype=np.int64, count=n))
+    stop = np.zeros(len(vocab), dtype=bool)
+    stop[[i for t, i in vocab.items() if t in _STOPWORDS]] = True
+    keep = ~stop[term_ids]
+    term_ids, doc_ids = term_ids[keep], doc_ids[keep]
+    if not len(term_ids):
+        return np.zeros(n)
+
+    # Non-zero (sentence, term) cells with their counts
+    cells, tf = np.unique(doc_ids * len(vocab) + term_ids, return_counts=True)
+    cell_docs, cell_terms = cells // len(vocab), cells % len(vocab)
+    df = np.bincount(cell_terms, minlength=len(vocab))
+    cf = np.bincount(term_ids, minlength=len(vocab))
+    idf = np.log1p((n - df + 0.5) / (df + 0.5))
+    weight = cf / len(term_ids) * idf
+
+    doc_len = np.bincount(doc_ids, minlength=n)
+    norm = BM25_K1 * (1 - BM25_B + BM25_B * doc_len / doc_len.mean())
+    cell_scores = weight[cell_terms] * tf * (BM25_K1 + 1) / (tf + norm[cell_docs])
+    return np.bincount(cell_docs, weights=cell_scores, minlength=n)
+
+def _bm25_centroid_scores_python(token_lists: list) -> list:
+    """Same scores as ``_bm25_centroid_scores`` without NumPy."""
+    n = len(token_lists)
+    counts = [Counter(t for t in tokens if t not in _STOPWORDS) for tokens in token_lists]
+    df = Counter(chain.from_iterable(counts))
+    cf = Counter()
+    for c in counts:
+        cf.update(c)
+    total = sum(cf.values())
+    if not total:
+        return [0.0] * n
+    weight = {t: cf[t] / total * math.log1p((n - df[t] + 0.5) / (df[t] + 0.5)) for t in cf}
+    avg_len = total / n
     scores = []
-    for s in sents:
-        score = sum(freq.get(t, 0) for t in _tokens(s)) / (len(s.split()) + 1)
-        scores.append((score, s))
-    scores.sort(reverse=True, key=lambda x: x[0])
-    return [s for _, s in scores]
+    for c in counts:
+        norm = BM25_K1 * (1 - BM25_B + BM25_B * sum(c.values()) / avg_len)
+        scores.append(sum(weight[t] * tf * (BM25_K1 + 1) / (tf + norm) for t, tf in c.items()))
+    return scores
+
+@lru_cache(maxsize=None)
+def _keyword_pattern(keywords: tuple):
+    return re.compile(r"|".join(re.escape(k) for k in keywords), re.IGNORECASE)
 
 def _pick_by_keywords(sents: list, keywords: list, limit: int=4) -> list:
     out = []
-    patt = re.compile(r"|".join(re.escape(k) for k in keywords), re.IGNORECASE)
+    patt = _keyword_pattern(tuple(keywords))
     for s in sents:
         if patt.search(s):
             out.append(s)
@@ -312,6 +702,11 @@ def main():
     ap.add_argument("--region", default="global")
     ap.add_argument("--horizon", default="next 12 months")
     ap.add_argument("--max-bytes", type=int, default=120000, help="Max context bytes")
+    ap.add_argument("--workers", type=int, default=S3_MAX_WORKERS, help="Concurrent S3 downloads")
+    ap.add_argument("--pdf-workers", type=int, default=PDF_WORKERS,
+                    help="Processes for PDF text extraction (1 extracts in-process)")
+    ap.add_argument("--cache-dir", default=_default_cache_dir(), help="Directory for cached extracted text")
+    ap.add_argument("--no-cache", action="store_true", help="Always download and extract documents")
     ap.add_argument("--local-extractive", action="store_true", help="Use local extractive summarizer (no Bedrock)")
     ap.add_argument("--model-id", help="Override Bedrock modelId (e.g., us.amazon.nova-micro-v1:0)")
     ap.add_argument("--inference-profile-arn", help="Bedrock inference profile ARN to use")
@@ -331,6 +726,9 @@ def main():
         prefix=args.prefix,
         max_bytes=args.max_bytes,
         local_extractive=args.local_extractive,
+        max_workers=args.workers,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        pdf_workers=args.pdf_workers,
     )
     print(json.dumps(result, ensure_ascii=False, indent=2))
 